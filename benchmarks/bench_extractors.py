@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+"""Micro-benchmark: the extractors module vs the original inline action, due date and URL regexes.
+
+The results are not identical by design, so instead of asserting equality
+the script reports where they differ: the legacy code emits one action item
+per matching pattern, parses only ``%d/%m/%Y`` due dates, and its URL class
+``[$-_@.&+]`` runs on into trailing punctuation.
+
+Usage: python benchmarks/bench_extractors.py [n_messages] [repeats]
+"""
+import re
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from whatsapp_crew.synthetic import generate_messages  # noqa: E402
+from whatsapp_crew.tools.extractors import extract_action, extract_due_date, find_urls  # noqa: E402
+
+LEGACY_ACTION_PATTERNS = [
+    r'(?i)(?:todo|to-do|to do):?\s*(.+)',
+    r'(?i)(?:action item|task):?\s*(.+)',
+    r'(?i)(?:please|pls|kindly)\s+(?:do|handle|take care of)\s+(.+)',
+    r'(?i)need\s+to\s+(?:do|handle|complete)\s+(.+)'
+]
+LEGACY_DUE_DATE_PATTERNS = [
+    r'(?i)due\s+(?:by|on|before)?\s*(\d{1,2}[-/]\d{1,2}[-/]\d{2,4})',
+    r'(?i)deadline:?\s*(\d{1,2}[-/]\d{1,2}[-/]\d{2,4})',
+    r'(?i)by\s+(\d{1,2}[-/]\d{1,2}[-/]\d{2,4})'
+]
+LEGACY_URL_PATTERN = r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+'
+
+# Texts the synthetic generator does not produce
+EDGE_CASES = [
+    "TODO: send the invoice due by 5-3-26",
+    "need to complete the migration, to do before 1/2/2025",
+    "docs at https://example.com/guide. Slides: (https://en.wikipedia.org/wiki/Foo_(bar)).",
+    "multitasking is hard",
+]
+
+
+def legacy_due_date(text: str) -> Optional[str]:
+    """The original MessageAnalyzer._extract_due_date."""
+    for pattern in LEGACY_DUE_DATE_PATTERNS:
+        match = re.search(pattern, text)
+        if match:
+            try:
+                return datetime.strptime(match.group(1), '%d/%m/%Y').strftime('%Y-%m-%d')
+            except ValueError:
+                continue
+    return None
+
+
+def legacy_extract(texts: List[str]) -> Dict[str, list]:
+    """The original per-message action item and URL loops."""
+    actions, urls = [], []
+    for text in texts:
+        for pattern in LEGACY_ACTION_PATTERNS:
+            match = re.search(pattern, text)
+            if match:
+                actions.append((match.group(1).strip(), legacy_due_date(text)))
+        urls.extend(re.findall(LEGACY_URL_PATTERN, text))
+    return {"actions": actions, "urls": urls}
+
+
+def compiled_extract(texts: List[str]) -> Dict[str, list]:
+    actions, urls = [], []
+    for text in texts:
+        description = extract_action(text)
+        if description is not None:
+            actions.append((description, extract_due_date(text)))
+        urls.extend(find_urls(text))
+    return {"actions": actions, "urls": urls}
+
+
+def best_of(fn, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    texts = [msg['content']['text'] for msg in generate_messages(n, action_rate=0.1, url_rate=0.1)]
+    legacy = legacy_extract(texts)
+    compiled = compiled_extract(texts)
+
+    def due_dates(actions):
+        return sum(1 for _, due_date in actions if due_date)
+
+    print(f"messages: {n}, best of {repeats}")
+    print(f"{'':<16} {'legacy':>10} {'extractors':>10}")
+    print(f"{'action items':<16} {len(legacy['actions']):>10} {len(compiled['actions']):>10}")
+    print(f"{'with due date':<16} {due_dates(legacy['actions']):>10} {due_dates(compiled['actions']):>10}")
+    print(f"{'urls':<16} {len(legacy['urls']):>10} {len(compiled['urls']):>10}")
+    print(f"{'differing urls':<16} {sum(a != b for a, b in zip(legacy['urls'], compiled['urls'])):>10}")
+
+    print("\nedge cases (legacy | extractors):")
+    for text in EDGE_CASES:
+        print(f"  {text}\n    {legacy_extract([text])}\n    {compiled_extract([text])}")
+
+    legacy_time = best_of(lambda: legacy_extract(texts), repeats)
+    compiled_time = best_of(lambda: compiled_extract(texts), repeats)
+    print()
+    print(f"legacy regexes:  {legacy_time * 1000:8.1f} ms  ({n / legacy_time:,.0f} msg/s)")
+    print(f"extractors:      {compiled_time * 1000:8.1f} ms  ({n / compiled_time:,.0f} msg/s)")
+    print(f"speedup:         {legacy_time / compiled_time:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
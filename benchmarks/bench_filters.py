@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+"""Micro-benchmark: compiled MessageFilter vs the per-pattern re.match loop.
+
+Usage: python benchmarks/bench_filters.py [n_messages] [repeats]
+"""
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+import yaml  # noqa: E402
+
+from whatsapp_crew.tools.message_filter import MessageFilter  # noqa: E402
+
+SAMPLE_TEXTS = [
+    "👍",
+    "ok",
+    "thanks",
+    "+1",
+    "image omitted",
+    "Alice changed the group name to Team",
+    "Bob joined the group",
+    "Carol added Dave to the group",
+    "See https://example.com/docs for the details",
+    "@everyone please read this",
+    "Release notes are in #changelog",
+    "The deadline moved to Friday",
+    "lunch?",
+    "I think we should refactor the storage layer before the next sprint",
+    "can someone review my PR when they get a chance",
+    "sure thing",
+]
+
+
+def legacy_filter(filters: Dict, messages: List[Dict]) -> List[Dict]:
+    """The original MessageAnalyzer._filter_messages loop."""
+    filtered = []
+    for msg in messages:
+        text = msg['content']['text']
+        if any(re.match(pattern, text) for pattern in filters['exclude_patterns']):
+            continue
+        if any(re.match(pattern, text) for pattern in filters['include_patterns']):
+            filtered.append(msg)
+            continue
+        if len(text.split()) > 3:
+            filtered.append(msg)
+    return filtered
+
+
+def make_messages(n: int, seed: int = 0) -> List[Dict]:
+    rng = random.Random(seed)
+    return [
+        {"message_id": str(i), "content": {"type": "text", "text": rng.choice(SAMPLE_TEXTS)}}
+        for i in range(n)
+    ]
+
+
+def best_of(fn, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    with open(ROOT / "knowledge/rules/filters.yaml") as f:
+        filters = yaml.safe_load(f)
+    messages = make_messages(n)
+    engine = MessageFilter(filters)
+
+    assert engine.filter(messages) == legacy_filter(filters, messages), "results differ"
+
+    legacy = best_of(lambda: legacy_filter(filters, messages), repeats)
+    compiled = best_of(lambda: engine.filter(messages), repeats)
+
+    print(f"messages: {n}, best of {repeats}")
+    print(f"legacy loop:     {legacy * 1000:8.1f} ms  ({n / legacy:,.0f} msg/s)")
+    print(f"MessageFilter:   {compiled * 1000:8.1f} ms  ({n / compiled:,.0f} msg/s)")
+    print(f"speedup:         {legacy / compiled:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+"""Benchmark: map-reduce summarisation latency against the number of workers.
+
+Runs ``MapReduceSummarizer`` over a synthetic day with a fake LLM that
+sleeps for a fixed latency per call, so wall time shows how the map and
+reduce calls overlap. Also checks that the merged sections equal a single
+``analyze_messages`` pass over the same day.
+
+Usage: python benchmarks/bench_map_reduce.py [n_messages] [llm_latency_ms] [chunking]
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from whatsapp_crew.synthetic import generate_messages  # noqa: E402
+from whatsapp_crew.tools.map_reduce import MapReduceSummarizer  # noqa: E402
+from whatsapp_crew.tools.message_analyzer import MessageAnalyzer  # noqa: E402
+
+
+def fake_llm(latency: float):
+    async def summarize(prompt: str) -> str:
+        await asyncio.sleep(latency)
+        if prompt.startswith("Several parts"):
+            return "Merged summary of the topic."
+        return "- Planning: The group planned the release.\n- Technical Discussion: Bugs were triaged."
+    return summarize
+
+
+def normalized(section):
+    """Participants are collected in sets, so their order is not significant."""
+    if isinstance(section, list):
+        return [{**item, "participants": sorted(item["participants"])} if "participants" in item else item
+                for item in section]
+    return section
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    latency = (int(sys.argv[2]) if len(sys.argv) > 2 else 200) / 1000
+    chunking = sys.argv[3] if len(sys.argv) > 3 else "window"
+
+    analyzer = MessageAnalyzer(str(ROOT / "knowledge"))
+    messages = generate_messages(n, "bench")
+    single_pass = analyzer.analyze_messages(messages)
+
+    print(f"{n:,} messages, fake LLM latency {latency * 1000:.0f} ms, {chunking} chunks")
+    print(f"{'workers':>8} {'chunks':>7} {'calls':>6} {'seconds':>8}")
+    for workers in (1, 4, 16, 64):
+        summarizer = MapReduceSummarizer(analyzer, fake_llm(latency), max_workers=workers, chunking=chunking)
+        started = time.perf_counter()
+        result = summarizer.summarize_day("bench", "2024-03-12", messages)
+        elapsed = time.perf_counter() - started
+        if chunking == "window":
+            for name in ("activity", "action_items", "notable_interactions", "resources"):
+                assert normalized(result["summary"][name]) == normalized(single_pass[name]), \
+                    f"{name} differs from a single pass"
+        print(f"{workers:>8} {result['stats']['chunks']:>7} {result['stats']['llm_calls']:>6} {elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
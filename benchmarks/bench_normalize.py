@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+"""Benchmark: per-record WhatsAppMessage normalisation vs the bulk page path.
+
+Replays the recorded Graph API pages in ``fixtures/api_messages_page_*.json``
+(text, media with captions, replies, mentions and hashtags) until
+``n_messages`` are reached, checks that ``normalize_page`` returns exactly
+``to_stored(normalize_message(msg))`` for every message, then times:
+
+- per record: ``WhatsAppTool._process_messages`` followed by ``to_stored``
+- bulk, validated: ``normalize_page`` with one ``TypeAdapter`` call per page
+- bulk, trusted: ``normalize_page(..., trusted=True)``
+
+Usage: python benchmarks/bench_normalize.py [n_messages] [repeats]
+"""
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from whatsapp_crew.tools.whatsapp_message import normalize_message, normalize_page, to_stored  # noqa: E402
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+
+def load_pages(n: int) -> List[List[Dict]]:
+    """Recorded pages, repeated (with unique ids) until they hold ``n`` messages."""
+    recorded = [
+        json.loads(path.read_text())["data"]
+        for path in sorted(FIXTURES.glob("api_messages_page_*.json"))
+    ]
+    pages = []
+    total = 0
+    while total < n:
+        copy = len(pages) // len(recorded)
+        page = [
+            {**msg, "id": f"{msg['id']}.{copy}"}
+            for msg in recorded[len(pages) % len(recorded)][:n - total]
+        ]
+        pages.append(page)
+        total += len(page)
+    return pages
+
+
+def per_record(pages: List[List[Dict]]) -> List[Dict]:
+    """The original path: one model per message, then the stored format."""
+    return [to_stored(normalize_message(msg)) for page in pages for msg in page]
+
+
+def bulk(pages: List[List[Dict]], trusted: bool) -> List[Dict]:
+    return [msg for page in pages for msg in normalize_page(page, trusted)]
+
+
+def best_of(fn, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    pages = load_pages(n)
+
+    expected = per_record(pages)
+    assert bulk(pages, trusted=False) == expected, "validated bulk results differ"
+    assert bulk(pages, trusted=True) == expected, "trusted bulk results differ"
+
+    timings = {
+        "per record": best_of(lambda: per_record(pages), repeats),
+        "bulk, validated": best_of(lambda: bulk(pages, trusted=False), repeats),
+        "bulk, trusted": best_of(lambda: bulk(pages, trusted=True), repeats),
+    }
+    print(f"messages: {n:,} in {len(pages)} pages, best of {repeats}")
+    for name, seconds in timings.items():
+        speedup = timings["per record"] / seconds
+        print(f"{name:<16} {seconds * 1000:8.1f} ms  ({n / seconds:>10,.0f} msg/s)  {speedup:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
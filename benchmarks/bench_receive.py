@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""Benchmark: pooled concurrent receive vs one fresh connection per request.
+
+Runs against the local Graph API stub (``graph_api_stub.py``) with a fixed
+per-response latency standing in for network round trips. The baseline
+fetches groups one after another with a new connection per page, like the
+original ``requests.get`` calls; ``WhatsAppClient.receive_many`` fetches them
+concurrently over a shared keep-alive pool.
+
+Usage: python benchmarks/bench_receive.py [n_groups] [messages_per_group] [latency_ms]
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import httpx  # noqa: E402
+
+from graph_api_stub import GraphAPIStub, make_group_messages  # noqa: E402
+from whatsapp_crew.tools.whatsapp_client import WhatsAppClient  # noqa: E402
+
+API_VERSION = "v17.0"
+PHONE_NUMBER_ID = "1234567890"
+
+
+def sequential_receive(base_url: str, group_ids: List[str], page_size: int) -> Dict[str, List[Dict]]:
+    """Each page over a new connection, one group after another."""
+    endpoint = f"{base_url}/{API_VERSION}/{PHONE_NUMBER_ID}/messages"
+    results = {}
+    for group_id in group_ids:
+        params = {"group_id": group_id, "limit": page_size}
+        messages = []
+        while True:
+            page = httpx.get(endpoint, params=params, timeout=30).json()
+            messages.extend(page["data"])
+            after = page.get("paging", {}).get("cursors", {}).get("after")
+            if not after:
+                break
+            params["after"] = after
+        results[group_id] = messages
+    return results
+
+
+async def pooled_receive(base_url: str, group_ids: List[str], page_size: int) -> Dict[str, List[Dict]]:
+    async with WhatsAppClient("token", PHONE_NUMBER_ID, API_VERSION, base_url=base_url,
+                              page_size=page_size, timeout=30) as client:
+        return await client.receive_many(group_ids)
+
+
+def main() -> None:
+    n_groups = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    per_group = int(sys.argv[2]) if len(sys.argv) > 2 else 250
+    latency = (float(sys.argv[3]) if len(sys.argv) > 3 else 20) / 1000
+    page_size = 100
+
+    groups = {f"group-{i}": make_group_messages(f"group-{i}", per_group) for i in range(n_groups)}
+    group_ids = list(groups)
+
+    with GraphAPIStub(groups, latency=latency, max_page_size=page_size) as stub:
+        started = time.perf_counter()
+        baseline = sequential_receive(stub.base_url, group_ids, page_size)
+        sequential_time = time.perf_counter() - started
+        sequential_connections, stub.connections = stub.connections, 0
+
+        started = time.perf_counter()
+        pooled = asyncio.run(pooled_receive(stub.base_url, group_ids, page_size))
+        pooled_time = time.perf_counter() - started
+        pooled_connections = stub.connections
+
+    assert pooled == baseline == groups, "results differ"
+    requests = sum(-(-per_group // page_size) for _ in group_ids)
+    print(f"{n_groups} groups x {per_group} messages ({requests} pages, {latency * 1000:.0f} ms latency)")
+    print(f"  sequential, fresh connections: {sequential_time:7.2f} s  ({sequential_connections} connections)")
+    print(f"  pooled, concurrent:            {pooled_time:7.2f} s  ({pooled_connections} connections, "
+          f"{sequential_time / pooled_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""Micro-benchmark: MessageRecord vs nested message dicts in the analysis path.
+
+Measures the memory held by a day of messages loaded from stored JSON lines
+as nested dicts and as ``MessageRecord`` objects, and the throughput of
+``MessageAnalyzer.analyze_messages`` on each.
+
+Usage: python benchmarks/bench_records.py [n_messages] [repeats]
+"""
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from whatsapp_crew.tools.message_analyzer import MessageAnalyzer  # noqa: E402
+from whatsapp_crew.tools.message_record import MessageRecord  # noqa: E402
+
+TEXTS = [
+    "ok", "thanks", "👍", "TODO: fix the flaky deploy job before the release",
+    "please handle the merge request today, due by 12/05/2024",
+    "See https://example.com/docs?id=1 for the details of the roadmap",
+    "I think we should refactor the storage layer before the next sprint",
+    "urgent blocker in prod, can someone look at the error log ASAP",
+    "meeting moved to tomorrow, we need a decision on the plan",
+]
+NAMES = ["Alice", "Bob", "Carol", "Dave", "Eve", "Frank", "Grace", "Heidi"]
+
+
+def make_lines(n: int, seed: int = 0) -> List[bytes]:
+    """Messages as stored in the JSON Lines layout."""
+    rng = random.Random(seed)
+    lines = []
+    for i in range(n):
+        sender = rng.randrange(len(NAMES))
+        msg = {
+            "message_id": f"wamid.{i}",
+            "timestamp": str(1700000000 + i * 7),
+            "sender": {"id": f"4915{sender:08d}", "name": NAMES[sender]},
+            "content": {"type": "text", "text": rng.choice(TEXTS)},
+            "metadata": {
+                "quoted_message_id": f"wamid.{rng.randrange(i)}" if i and rng.random() < 0.3 else None,
+                "mentions": [{"name": rng.choice(NAMES)}] if rng.random() < 0.2 else [],
+                "tags": []
+            }
+        }
+        lines.append(json.dumps(msg, separators=(",", ":")).encode())
+    return lines
+
+
+def load_dicts(lines: List[bytes]) -> list:
+    return [json.loads(line) for line in lines]
+
+
+def load_records(lines: List[bytes]) -> list:
+    from_dict = MessageRecord.from_dict
+    return [from_dict(json.loads(line)) for line in lines]
+
+
+def retained(load: Callable[[List[bytes]], list], lines: List[bytes]):
+    """Return the loaded messages and the bytes they keep alive."""
+    gc.collect()
+    tracemalloc.start()
+    messages = load(lines)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return messages, size
+
+
+def best_of(fn, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    analyzer = MessageAnalyzer(str(ROOT / "knowledge"))
+    lines = make_lines(n)
+
+    dicts, dict_bytes = retained(load_dicts, lines)
+    records, record_bytes = retained(load_records, lines)
+    assert analyzer.analyze_messages(dicts) == analyzer.analyze_messages(records), "results differ"
+
+    load_dict_time = best_of(lambda: load_dicts(lines), repeats)
+    load_record_time = best_of(lambda: load_records(lines), repeats)
+    dict_time = best_of(lambda: analyzer.analyze_messages(dicts), repeats)
+    record_time = best_of(lambda: analyzer.analyze_messages(records), repeats)
+
+    print(f"{n} messages")
+    print(f"  memory   dicts:   {dict_bytes / 1e6:8.1f} MB  ({dict_bytes / n:.0f} B/message)")
+    print(f"           records: {record_bytes / 1e6:8.1f} MB  ({record_bytes / n:.0f} B/message, "
+          f"{dict_bytes / record_bytes:.1f}x smaller)")
+    print(f"  load     dicts:   {load_dict_time * 1000:8.1f} ms")
+    print(f"           records: {load_record_time * 1000:8.1f} ms")
+    print(f"  analyze  dicts:   {dict_time * 1000:8.1f} ms  ({n / dict_time:,.0f} msg/s, converted on the fly)")
+    print(f"           records: {record_time * 1000:8.1f} ms  ({n / record_time:,.0f} msg/s, "
+          f"{dict_time / record_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
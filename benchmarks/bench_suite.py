@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+"""Benchmark suite for the summary pipeline on synthetic workloads.
+
+Generates one group's day with ``whatsapp_crew.synthetic`` at each size and
+measures, per stage, wall time, throughput and peak traced memory:
+
+- ``MessageAnalyzer.analyze_messages`` and each private stage
+  (filtering, topics, activity, action items, interactions, resources)
+- ``MessageStorage`` store, get and archive (both layouts)
+- ``SummaryStorage._generate_markdown``, store and archival
+
+Each stage runs once untraced for timing and once under ``tracemalloc`` for
+peak memory. Results can be saved as JSON and compared with an earlier run,
+which fails when a stage got slower than the tolerance.
+
+Usage: python benchmarks/bench_suite.py [--sizes 1000,100000,1000000]
+           [--layouts json,jsonl] [--no-memory] [--save results.json]
+           [--compare baseline.json] [--tolerance 0.2]
+"""
+import argparse
+import gc
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from whatsapp_crew.synthetic import generate_messages  # noqa: E402
+from whatsapp_crew.tools.message_analyzer import MessageAnalyzer  # noqa: E402
+from whatsapp_crew.tools.message_storage import MessageStorage  # noqa: E402
+from whatsapp_crew.tools.summary_storage import SummaryStorage  # noqa: E402
+
+GROUP_ID = "bench-group"
+OLD_DAY = (date.today() - timedelta(days=60)).isoformat()
+
+
+def measure(fn: Callable, memory: bool, setup: Optional[Callable] = None) -> Dict:
+    """Time ``fn()`` and, with ``memory``, rerun it under tracemalloc for its peak."""
+    if setup:
+        setup()
+    gc.collect()
+    started = time.perf_counter()
+    fn()
+    result = {"seconds": time.perf_counter() - started}
+
+    if memory:
+        if setup:
+            setup()
+        gc.collect()
+        tracemalloc.start()
+        fn()
+        result["peak_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    return result
+
+
+def analyzer_stages(analyzer: MessageAnalyzer, messages: List[Dict], memory: bool) -> Dict[str, Dict]:
+    filtered = analyzer._filter_messages(messages)
+    stages = {
+        "analyze_messages": lambda: analyzer.analyze_messages(messages),
+        "analyze_messages (unfused)": lambda: analyzer.analyze_messages(messages, fused=False),
+        "_filter_messages": lambda: analyzer._filter_messages(messages),
+        "_classify_topics": lambda: analyzer._classify_topics(filtered),
+        "_analyze_activity": lambda: analyzer._analyze_activity(filtered),
+        "_extract_action_items": lambda: analyzer._extract_action_items(filtered),
+        "_analyze_interactions": lambda: analyzer._analyze_interactions(filtered),
+        "_extract_resources": lambda: analyzer._extract_resources(filtered),
+    }
+    return {name: measure(fn, memory) for name, fn in stages.items()}
+
+
+def storage_stages(messages: List[Dict], layout: str, memory: bool) -> Dict[str, Dict]:
+    results = {}
+    data_dir = tempfile.mkdtemp(prefix="bench-storage-")
+    try:
+        def fresh_storage():
+            shutil.rmtree(data_dir)
+            os.makedirs(data_dir)
+
+        def store():
+            MessageStorage(data_dir, layout=layout).store_messages(GROUP_ID, messages)
+
+        results[f"MessageStorage.store_messages ({layout})"] = measure(store, memory, fresh_storage)
+        storage = MessageStorage(data_dir, layout=layout)
+        today = datetime.now().strftime("%Y-%m-%d")
+        results[f"MessageStorage.get_messages ({layout})"] = measure(
+            lambda: storage.get_messages(GROUP_ID, today), memory
+        )
+
+        def age_day():
+            # Store again and move the day out of the retention window
+            fresh_storage()
+            store()
+            current = Path(data_dir, "messages", "current")
+            (current / today).rename(current / OLD_DAY)
+
+        results[f"MessageStorage.archive_old_messages ({layout})"] = measure(
+            lambda: MessageStorage(data_dir, layout=layout).archive_old_messages(7), memory, age_day
+        )
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+    return results
+
+
+def summary_stages(analysis: Dict, memory: bool) -> Dict[str, Dict]:
+    results = {}
+    data_dir = tempfile.mkdtemp(prefix="bench-summary-")
+    try:
+        storage = SummaryStorage(data_dir)
+        summary = {
+            "date": OLD_DAY,
+            "group_id": GROUP_ID,
+            "summary": analysis,
+            "metadata": {"generated_at": datetime.now().isoformat(), "version": "1.0"},
+        }
+        results["SummaryStorage._generate_markdown"] = measure(lambda: storage._generate_markdown(summary), memory)
+        results["SummaryStorage.store_summary"] = measure(
+            lambda: storage.store_summary(GROUP_ID, dict(summary), OLD_DAY), memory
+        )
+
+        def restore():
+            storage.store_summary(GROUP_ID, dict(summary), OLD_DAY)
+
+        results["SummaryStorage.archive_old_summaries"] = measure(
+            lambda: storage.archive_old_summaries(30), memory, restore
+        )
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+    return results
+
+
+def run(sizes: List[int], layouts: List[str], memory: bool) -> Dict[str, Dict[str, Dict]]:
+    analyzer = MessageAnalyzer(str(ROOT / "knowledge"))
+    results = {}
+    for n in sizes:
+        started = time.perf_counter()
+        messages = generate_messages(n, GROUP_ID)
+        print(f"\n{n:,} messages (generated in {time.perf_counter() - started:.1f} s)")
+
+        stages = analyzer_stages(analyzer, messages, memory)
+        for layout in layouts:
+            stages.update(storage_stages(messages, layout, memory))
+        stages.update(summary_stages(analyzer.analyze_messages(messages), memory))
+
+        for name, stage in stages.items():
+            stage["messages_per_second"] = n / stage["seconds"] if stage["seconds"] else None
+            peak = f"{stage['peak_mb']:>9.1f} MB" if "peak_mb" in stage else ""
+            print(f"  {name:<48} {stage['seconds']:>9.3f} s {n / stage['seconds']:>14,.0f} msg/s {peak}")
+        results[str(n)] = stages
+    return results
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Stages slower than the baseline by more than ``tolerance`` (a fraction)."""
+    regressions = []
+    for size, stages in results.items():
+        for name, stage in stages.items():
+            before = baseline.get(size, {}).get(name)
+            if before and stage["seconds"] > before["seconds"] * (1 + tolerance):
+                regressions.append(
+                    f"{name} at {int(size):,}: {before['seconds']:.3f} s -> {stage['seconds']:.3f} s"
+                )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,100000,1000000")
+    parser.add_argument("--layouts", default="json,jsonl")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc runs")
+    parser.add_argument("--save", help="write the results as JSON")
+    parser.add_argument("--compare", help="JSON results of an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = run(
+        [int(size) for size in args.sizes.split(",")],
+        args.layouts.split(","),
+        not args.no_memory
+    )
+    if args.save:
+        Path(args.save).write_text(json.dumps(results, indent=2))
+    if args.compare:
+        regressions = compare(results, json.loads(Path(args.compare).read_text()), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
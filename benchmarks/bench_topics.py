@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+"""Micro-benchmark: KeywordIndex topic matching vs per-keyword substring checks.
+
+Runs against topics.yaml as shipped and against a synthetic taxonomy with
+several hundred topics to show how both approaches scale.
+
+Usage: python benchmarks/bench_topics.py [n_messages] [n_synthetic_topics]
+"""
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+import yaml  # noqa: E402
+
+from whatsapp_crew.tools.keyword_index import KeywordIndex  # noqa: E402
+
+WORDS = (
+    "the deploy failed again after merge can someone look at the error log before the "
+    "meeting we need a decision on the roadmap and the sprint goal heads up FYI release "
+    "is scheduled for tomorrow please assist with the question about support tickets"
+).split()
+
+
+def legacy_topics(topics: List[Dict], texts: List[str]) -> List[List[str]]:
+    """The original keyword loop from MessageAnalyzer._classify_topics."""
+    result = []
+    for text in texts:
+        text = text.lower()
+        result.append([
+            topic['name'] for topic in topics
+            if any(keyword.lower() in text for keyword in topic['keywords'])
+        ])
+    return result
+
+
+def indexed_topics(topics: List[Dict], index: KeywordIndex, texts: List[str]) -> List[List[str]]:
+    return [[topics[position]['name'] for position in sorted(index.scan(text))] for text in texts]
+
+
+def synthetic_topics(n: int, seed: int = 0) -> List[Dict]:
+    rng = random.Random(seed)
+    alphabet = "abcdefghijklmnopqrstuvwxyz"
+    return [
+        {
+            "name": f"Topic {i}",
+            "keywords": ["".join(rng.choice(alphabet) for _ in range(rng.randint(4, 9)))
+                         for _ in range(10)],
+        }
+        for i in range(n)
+    ]
+
+
+def make_texts(n: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 25))) for _ in range(n)]
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def compare(label: str, topics: List[Dict], texts: List[str]) -> None:
+    index = KeywordIndex(
+        (keyword, position)
+        for position, topic in enumerate(topics)
+        for keyword in topic['keywords']
+    ).build()
+    assert indexed_topics(topics, index, texts) == legacy_topics(topics, texts), "results differ"
+
+    legacy = timed(lambda: legacy_topics(topics, texts))
+    indexed = timed(lambda: indexed_topics(topics, index, texts))
+    print(f"{label} ({len(topics)} topics, {len(texts)} messages)")
+    print(f"  substring loop: {legacy * 1000:8.1f} ms")
+    print(f"  KeywordIndex:   {indexed * 1000:8.1f} ms  ({legacy / indexed:.1f}x)")
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    n_topics = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    with open(ROOT / "knowledge/patterns/topics.yaml") as f:
+        shipped = yaml.safe_load(f)['topics']
+    texts = make_texts(n)
+
+    compare("topics.yaml", shipped, texts)
+    compare("synthetic taxonomy", shipped + synthetic_topics(n_topics), texts)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+"""Local stand-in for the WhatsApp Graph API messages endpoint.
+
+Serves ``GET /{version}/{phone_number_id}/messages`` with cursor pagination
+over synthetic messages per group, and ``POST`` to the same path as a send.
+Connections are kept alive (HTTP/1.1) and counted, so clients can be checked
+for connection reuse. Point ``WhatsAppClient`` (or ``base_url`` in
+``whatsapp_config.yaml``) at ``stub.base_url``.
+
+Usage: python benchmarks/graph_api_stub.py [port] [n_groups] [messages_per_group]
+"""
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+def make_group_messages(group_id: str, n: int, start: int = 1700000000) -> List[Dict]:
+    """Raw webhook-style messages as returned by the Graph API."""
+    return [
+        {
+            "id": f"wamid.{group_id}.{i}",
+            "from": f"4915{i % 7:08d}",
+            "timestamp": str(start + i * 30),
+            "type": "text",
+            "text": {"body": f"message {i} in {group_id} #standup"},
+            "contact": {"name": f"User {i % 7}"},
+            **({"context": {"id": f"wamid.{group_id}.{i - 1}"}} if i % 5 == 4 else {}),
+        }
+        for i in range(n)
+    ]
+
+
+class GraphAPIStub:
+    """Threaded stub server holding ``{group_id: [raw message, ...]}``.
+
+    ``latency`` adds a fixed delay to every response to model network round
+    trips. ``fail_every`` answers every n-th request with a 429 and a
+    ``Retry-After`` of ``retry_after`` seconds.
+    """
+
+    def __init__(
+        self,
+        groups: Dict[str, List[Dict]],
+        port: int = 0,
+        latency: float = 0.0,
+        max_page_size: int = 100,
+        fail_every: int = 0,
+        retry_after: float = 0.0
+    ):
+        self.groups = groups
+        self.latency = latency
+        self.max_page_size = max_page_size
+        self.fail_every = fail_every
+        self.retry_after = retry_after
+        self.requests = 0
+        self.connections = 0
+        self.sent: List[Dict] = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'GraphAPIStub':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'GraphAPIStub':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _count_request(self) -> bool:
+        """Count a request and return whether it should be rejected with a 429."""
+        with self._lock:
+            self.requests += 1
+            return bool(self.fail_every) and self.requests % self.fail_every == 0
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status: int, body: Dict, headers: Optional[Dict] = None) -> None:
+                if stub.latency:
+                    time.sleep(stub.latency)
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _throttled(self) -> bool:
+                if not stub._count_request():
+                    return False
+                self._reply(
+                    429,
+                    {"error": {"message": "Rate limit hit", "code": 130429}},
+                    {"Retry-After": str(stub.retry_after)}
+                )
+                return True
+
+            def do_GET(self):
+                if self._throttled():
+                    return
+                url = urlparse(self.path)
+                query = {key: values[0] for key, values in parse_qs(url.query).items()}
+                messages = stub.groups.get(query.get("group_id"))
+                if not url.path.endswith("/messages") or messages is None:
+                    self._reply(404, {"error": {"message": "Unknown group", "code": 100}})
+                    return
+
+                limit = min(int(query.get("limit", 25)), stub.max_page_size)
+                offset = int(query.get("after", 0))
+                body = {"data": messages[offset:offset + limit]}
+                cursors = {"before": str(offset)}
+                if offset + limit < len(messages):
+                    cursors["after"] = str(offset + limit)
+                    body["paging"] = {"cursors": cursors, "next": f"{url.path}?after={offset + limit}"}
+                else:
+                    body["paging"] = {"cursors": cursors}
+                self._reply(200, body)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                if self._throttled():
+                    return
+                with stub._lock:
+                    stub.sent.append({"payload": payload, "headers": dict(self.headers)})
+                    message_id = f"wamid.sent.{len(stub.sent)}"
+                self._reply(200, {"messages": [{"id": message_id}]})
+
+        return Handler
+
+
+def main() -> None:
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    n_groups = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    per_group = int(sys.argv[3]) if len(sys.argv) > 3 else 250
+
+    groups = {f"group-{i}": make_group_messages(f"group-{i}", per_group) for i in range(n_groups)}
+    stub = GraphAPIStub(groups, port=port)
+    print(f"Serving {n_groups} groups on {stub.base_url} (Ctrl+C to stop)")
+    try:
+        stub._server.serve_forever()
+    except KeyboardInterrupt:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
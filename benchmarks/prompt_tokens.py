@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+"""Report prompt tokens for a day of messages before and after pre-analysis.
+
+"Before" is what the summarization LLM had to read without tools: every
+stored message of the day as JSON. "After" is the digest returned by
+``MessageAnalyzerTool``, which runs the analyzer over the same stored
+messages. Token counts use ``tiktoken`` when it is installed and the
+four-characters-per-token estimate otherwise.
+
+Usage: python benchmarks/prompt_tokens.py [sizes] [token_budget]
+       e.g. python benchmarks/prompt_tokens.py 200,2000,20000 1500
+"""
+import json
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from whatsapp_crew.synthetic import generate_messages  # noqa: E402
+from whatsapp_crew.tools.analysis_tools import MessageAnalyzerTool, estimate_tokens  # noqa: E402
+from whatsapp_crew.tools.message_storage import MessageStorage  # noqa: E402
+
+
+def token_counter() -> Callable[[str], int]:
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("cl100k_base")
+    except Exception:  # Not installed, or the encoding cannot be downloaded
+        return estimate_tokens
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+def main() -> None:
+    sizes = [int(size) for size in (sys.argv[1] if len(sys.argv) > 1 else "200,2000,20000").split(",")]
+    budget = int(sys.argv[2]) if len(sys.argv) > 2 else 1500
+    count_tokens = token_counter()
+    exact = count_tokens is not estimate_tokens
+
+    print(f"token budget {budget}, counts {'from tiktoken' if exact else 'estimated'}")
+    print(f"{'messages':>9} {'raw tokens':>12} {'digest tokens':>14} {'reduction':>10} {'digest time':>12}")
+    date = datetime.now().strftime("%Y-%m-%d")  # MessageStorage stores under today's date
+    with tempfile.TemporaryDirectory() as data_dir:
+        storage = MessageStorage(data_dir)
+        tool = MessageAnalyzerTool(knowledge_dir=str(ROOT / "knowledge"), data_dir=data_dir, token_budget=budget)
+        for n in sizes:
+            group_id = f"group-{n}"
+            messages = generate_messages(n, group_id)
+            storage.store_messages(group_id, messages)
+
+            raw = "\n".join(json.dumps(msg, ensure_ascii=False) for msg in messages)
+            started = time.perf_counter()
+            digest = tool.run(group_id=group_id, date=date)
+            elapsed = time.perf_counter() - started
+
+            before, after = count_tokens(raw), count_tokens(digest)
+            print(f"{n:>9,} {before:>12,} {after:>14,} {before / after:>9.0f}x {elapsed:>11.2f}s")
+
+    print("\nDigest for the last size:\n")
+    print(digest)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+"""Replay recorded webhook payloads against a local WebhookReceiver.
+
+Starts a receiver on a temporary data directory, checks the subscription
+handshake, posts the recorded payloads in ``benchmarks/fixtures`` and then a
+burst of synthetic payloads derived from them. Payloads refused with 503
+because the buffer is full are redelivered, as the Cloud API does, until
+everything is accepted. Finally checks that every message was stored once.
+
+Usage: python benchmarks/replay_webhooks.py [n_payloads] [concurrency] [max_buffer]
+"""
+import asyncio
+import copy
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+import httpx  # noqa: E402
+
+from whatsapp_crew.tools.message_storage import MessageStorage  # noqa: E402
+from whatsapp_crew.tools.webhook_server import WebhookReceiver, parse_webhook  # noqa: E402
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+VERIFY_TOKEN = "replay-token"
+
+
+def load_fixtures() -> List[Dict]:
+    return [json.loads(path.read_text()) for path in sorted(FIXTURES.glob("webhook_*.json"))]
+
+
+def synthetic_payloads(template: Dict, n: int, groups: int = 20) -> List[Dict]:
+    """Copies of a recorded payload with unique message ids spread over several groups."""
+    payloads = []
+    for i in range(n):
+        payload = copy.deepcopy(template)
+        for entry in payload["entry"]:
+            for change in entry["changes"]:
+                for j, msg in enumerate(change["value"].get("messages", [])):
+                    msg["id"] = f"{msg['id']}.{i}.{j}"
+                    msg["group_id"] = f"group-{i % groups}"
+                    msg["timestamp"] = str(int(msg["timestamp"]) + i)
+        payloads.append(payload)
+    return payloads
+
+
+async def _post(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, path: str, body: bytes) -> int:
+    """Send one POST over a kept-alive connection and return the status code."""
+    writer.write(
+        f"POST {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode().partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def post_all(port: int, path: str, payloads: List[Dict], concurrency: int) -> Dict[str, int]:
+    """Post every payload over ``concurrency`` keep-alive connections.
+
+    Payloads refused with 503 are redelivered after a short pause. A minimal
+    client is used so the timings reflect the receiver, not client overhead.
+    """
+    counts = {"posts": 0, "refused": 0}
+    pending: asyncio.Queue = asyncio.Queue()
+    for payload in payloads:
+        pending.put_nowait(json.dumps(payload).encode())
+
+    async def connection() -> None:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        try:
+            while not pending.empty():
+                body = pending.get_nowait()
+                status = await _post(reader, writer, path, body)
+                counts["posts"] += 1
+                if status == 503:
+                    counts["refused"] += 1
+                    pending.put_nowait(body)
+                    await asyncio.sleep(0.05)
+                elif status != 200:
+                    raise RuntimeError(f"Receiver answered {status}")
+        finally:
+            writer.close()
+
+    await asyncio.gather(*(connection() for _ in range(concurrency)))
+    return counts
+
+
+async def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    max_buffer = int(sys.argv[3]) if len(sys.argv) > 3 else 1000
+
+    fixtures = load_fixtures()
+    payloads = fixtures + synthetic_payloads(fixtures[0], n)
+    expected = sum(len(parse_webhook(payload)) for payload in payloads)
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        storage = MessageStorage(data_dir, layout="jsonl")
+        receiver = WebhookReceiver(storage, VERIFY_TOKEN, default_group_id="default",
+                                   max_buffer=max_buffer)
+        await receiver.start(port=0)
+        url = f"http://127.0.0.1:{receiver.port}/webhook"
+
+        async with httpx.AsyncClient() as http:
+            challenge = await http.get(url, params={
+                "hub.mode": "subscribe", "hub.verify_token": VERIFY_TOKEN, "hub.challenge": "1158201444"
+            })
+        assert challenge.status_code == 200 and challenge.text == "1158201444", "handshake failed"
+
+        started = time.perf_counter()
+        counts = await post_all(receiver.port, "/webhook", payloads, concurrency)
+        await receiver.close()
+        elapsed = time.perf_counter() - started
+
+        stored = sum(
+            len(storage.get_messages(path.stem, path.parent.name))
+            for path in Path(data_dir, "messages", "current").glob("*/*.jsonl")
+        )
+
+    assert stored == expected, f"stored {stored} of {expected} messages"
+    print(f"{len(payloads)} payloads, {expected} messages, buffer {max_buffer}")
+    print(f"  {elapsed:.2f} s  ({expected / elapsed:,.0f} messages/s)")
+    print(f"  {counts['posts']} posts, {counts['refused']} refused with 503 and redelivered")
+    print(f"  {receiver.stats['batches']} storage batches, {stored} messages stored")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
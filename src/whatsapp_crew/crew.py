@@ -1,23 +1,77 @@
+import time
 from crewai import Agent, Crew, Process, Task
-from crewai.project import CrewBase, agent, crew, task
+from crewai.project import CrewBase, agent, crew, task, tool
+from crewai.tasks.task_output import TaskOutput
+from typing import Dict, List, Optional
+
+from whatsapp_crew.metrics import METRICS
+from whatsapp_crew.tools.analysis_tools import MessageAnalyzerTool, SummaryStorageTool
+from whatsapp_crew.tools.map_reduce import MapReduceSummarizer, SummarizeFn
+from whatsapp_crew.tools.message_analyzer import MessageAnalyzer
+from whatsapp_crew.tools.summary_cache import SummaryCache
+from whatsapp_crew.tools.whatsapp_tool import WhatsAppTool
+
+
+class TaskTimer:
+    """Records ``crew_task_seconds`` for each task of a sequential crew run.
+
+    Use as the crew's ``task_callback`` with ``start`` among its
+    ``before_kickoff_callbacks``; each task is timed from the end of the
+    previous one, or from the start of the run.
+    """
+
+    def __init__(self, crew_name: str):
+        self.crew_name = crew_name
+        self.mark: Optional[float] = None
+
+    def start(self, inputs: Optional[Dict]) -> Optional[Dict]:
+        self.mark = time.perf_counter()
+        return inputs
+
+    def __call__(self, output: TaskOutput) -> None:
+        now = time.perf_counter()
+        if self.mark is not None:
+            METRICS.observe("crew_task_seconds", now - self.mark, crew=self.crew_name,
+                            task=output.name or output.agent)
+        self.mark = now
 
 
 @CrewBase
 class WhatsappCrew():
     """WhatsApp Group Activity Summary Crew"""
 
+    def __init__(self, data_dir: str = "data", knowledge_dir: str = "knowledge",
+                 cache: Optional[SummaryCache] = None):
+        self.data_dir = data_dir
+        self.knowledge_dir = knowledge_dir
+        self.cache = cache
+
+    # @tool methods are memoized per crew, so agents and tasks share one
+    # configured instance of each, also when named in agents.yaml / tasks.yaml
+    @tool
+    def whatsapp(self) -> WhatsAppTool:
+        return WhatsAppTool()
+
+    @tool
+    def analysis_digest(self) -> MessageAnalyzerTool:
+        return MessageAnalyzerTool(knowledge_dir=self.knowledge_dir, data_dir=self.data_dir, cache=self.cache)
+
+    @tool
+    def summary_storage(self) -> SummaryStorageTool:
+        return SummaryStorageTool(data_dir=self.data_dir)
+
     @agent
     def message_handler(self) -> Agent:
         return Agent(
             config=self.agents_config['message_handler'],
-            tools=[],
+            tools=[self.whatsapp(), self.summary_storage()],
         )
 
     @agent
     def summarization_expert(self) -> Agent:
         return Agent(
             config=self.agents_config['summarization_expert'],
-            tools=[],
+            tools=[self.analysis_digest(), self.summary_storage()],
         )
 
 
@@ -25,30 +79,78 @@ class WhatsappCrew():
     def receive_messages_task(self) -> Task:
         return Task(
             config=self.tasks_config['receive_messages_task'],
-            tools=[],
+            tools=[self.whatsapp()],
         )
 
     @task
     def summarize_messages_task(self) -> Task:
         return Task(
             config=self.tasks_config['summarize_messages_task'],
-            tools=[],
+            tools=[self.analysis_digest(), self.summary_storage()],
         )
 
     @task
     def send_summary_task(self) -> Task:
         return Task(
             config=self.tasks_config['send_summary_task'],
-            tools=[],
+            tools=[self.whatsapp(), self.summary_storage()],
         )
 
 
     @crew
     def crew(self) -> Crew:
         """Creates the WhatsApp Group Activity Summary Crew"""
+        timer = TaskTimer("summary")
         return Crew(
             agents=self.agents, # Automatically created by the @agent decorator
             tasks=self.tasks, # Automatically created by the @task decorator
             process=Process.sequential,
             verbose=True,
+            task_callback=timer,
+            before_kickoff_callbacks=[timer.start],
+        )
+
+    def summarize(self, group_id: str, date: str, messages: List[Dict],
+                  cache: Optional[SummaryCache] = None) -> str:
+        """Summarize one group's day, reusing a cached result for unchanged inputs.
+
+        ``cache`` defaults to the crew's own.
+        """
+        cache = cache or self.cache
+        inputs = {'group_id': group_id, 'scheduled_time': date}
+        with METRICS.timer("crew_kickoff_seconds", crew="summary"):
+            if cache is None:
+                return self.crew().kickoff(inputs=inputs).raw
+            return cache.kickoff(self.crew, group_id, date, messages, inputs)
+
+    async def summarize_prompt(self, prompt: str) -> str:
+        """Answer one prompt with the summarization expert as a single async crewAI task."""
+        config = self.agents_config['summarization_expert']
+        expert = Agent(
+            role=config['role'],
+            goal=config['goal'].replace('{group_id}', 'the group'),
+            backstory=config['backstory'],
+            tools=[],
+        )
+        # Braces in the digest would be read as template variables
+        task = Task(
+            description=prompt.replace('{', '(').replace('}', ')'),
+            expected_output="Only the requested text, without preamble.",
+            agent=expert,
+        )
+        with METRICS.timer("crew_kickoff_seconds", crew="prompt"):
+            result = await Crew(agents=[expert], tasks=[task], process=Process.sequential).kickoff_async()
+        return result.raw
+
+    def summarize_map_reduce(self, group_id: str, date: str, messages: List[Dict],
+                             summarize: Optional[SummarizeFn] = None,
+                             analyzer: Optional[MessageAnalyzer] = None, **options) -> Dict:
+        """Summarize a large day as concurrent chunk summaries reduced into the SummaryStorage schema.
+
+        ``summarize`` defaults to ``summarize_prompt``; pass any function of a
+        prompt to use another (or a fake) LLM. ``options`` go to ``MapReduceSummarizer``.
+        """
+        summarizer = MapReduceSummarizer(
+            analyzer or MessageAnalyzer(self.knowledge_dir), summarize or self.summarize_prompt, **options
         )
+        return summarizer.summarize_day(group_id, date, messages)
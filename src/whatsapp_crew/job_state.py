@@ -0,0 +1,114 @@
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import pytz
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    name TEXT PRIMARY KEY,
+    last_run TEXT,
+    last_success TEXT,
+    last_error TEXT
+);
+
+CREATE TABLE IF NOT EXISTS pending_runs (
+    name TEXT NOT NULL,
+    occurrence TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    PRIMARY KEY (name, occurrence)
+);
+"""
+
+
+def _key(moment: datetime) -> str:
+    # UTC ISO strings sort chronologically, so MAX() works on them
+    return moment.astimezone(pytz.utc).isoformat()
+
+
+def _moment(key: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(key) if key else None
+
+
+class JobStateStore:
+    """Run history of scheduled jobs, kept in a local SQLite file.
+
+    For every job name it records the latest occurrence that was dispatched
+    (``last_run``) and the latest that succeeded (``last_success``). Runs
+    still in progress are kept in ``pending_runs`` with their attempt count
+    until they succeed or exhaust their retries, so a run interrupted by a
+    restart can resume where it stopped. Occurrences are the scheduled times,
+    not the times the runs actually started.
+    """
+
+    def __init__(self, path: Union[str, Path] = "data/scheduler_state.db"):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def job(self, name: str) -> Optional[Dict]:
+        """``last_run``, ``last_success`` and ``last_error`` of a job, or None if it never ran."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT last_run, last_success, last_error FROM jobs WHERE name = ?", (name,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {'last_run': _moment(row[0]), 'last_success': _moment(row[1]), 'last_error': row[2]}
+
+    def pending(self, name: str) -> List[Tuple[datetime, int]]:
+        """Interrupted runs of a job as ``(occurrence, attempts made)``, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT occurrence, attempts FROM pending_runs WHERE name = ? ORDER BY occurrence", (name,)
+            ).fetchall()
+        return [(_moment(occurrence), attempts) for occurrence, attempts in rows]
+
+    def started(self, name: str, occurrence: datetime, attempts: int = 0) -> None:
+        """Record that a run was dispatched."""
+        key = _key(occurrence)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (name, last_run) VALUES (?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET last_run = MAX(COALESCE(last_run, ''), excluded.last_run)",
+                (name, key)
+            )
+            self._conn.execute(
+                "INSERT OR IGNORE INTO pending_runs (name, occurrence, attempts) VALUES (?, ?, ?)",
+                (name, key, attempts)
+            )
+
+    def attempted(self, name: str, occurrence: datetime, attempts: int, error: str) -> None:
+        """Record a failed attempt so retries resume from ``attempts`` after a restart."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE pending_runs SET attempts = ?, last_error = ? WHERE name = ? AND occurrence = ?",
+                (attempts, error, name, _key(occurrence))
+            )
+
+    def finished(self, name: str, occurrence: datetime, error: Optional[str] = None) -> None:
+        """Record the outcome of a run; ``error`` is set when it exhausted its retries."""
+        key = _key(occurrence)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM pending_runs WHERE name = ? AND occurrence = ?", (name, key)
+            )
+            if error is None:
+                self._conn.execute(
+                    "UPDATE jobs SET last_success = MAX(COALESCE(last_success, ''), ?), last_error = NULL "
+                    "WHERE name = ?",
+                    (key, name)
+                )
+            else:
+                self._conn.execute("UPDATE jobs SET last_error = ? WHERE name = ?", (error, name))
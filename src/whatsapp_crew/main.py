@@ -1,20 +1,35 @@
 #!/usr/bin/env python
 import sys
+from datetime import datetime
+from pathlib import Path
+
+import yaml
+
 from whatsapp_crew.crew import WhatsappCrew
+from whatsapp_crew.synthetic import SyntheticGroup
 
 # This main file is intended to be a way for your to run your
 # crew locally, so refrain from adding unnecessary logic into this file.
 # Replace with inputs you want to test with, it will automatically
 # interpolate any tasks and agents information
 
+def _inputs():
+    """Group and summary time from whatsapp_config.yaml, or the synthetic demo group."""
+    config_path = Path(__file__).parent / "config" / "whatsapp_config.yaml"
+    whatsapp = {}
+    if config_path.exists():
+        with open(config_path) as f:
+            whatsapp = (yaml.safe_load(f) or {}).get('whatsapp') or {}
+    return {
+        'group_id': whatsapp.get('group_id', SyntheticGroup().group_id),
+        'scheduled_time': whatsapp.get('summary_time', datetime.now().strftime("%H:%M"))
+    }
+
 def run():
     """
     Run the crew.
     """
-    inputs = {
-        'group_id': 'sample_value',
-        'scheduled_time': 'sample_value'
-    }
+    inputs = _inputs()
     WhatsappCrew().crew().kickoff(inputs=inputs)
 
 
@@ -22,10 +37,7 @@ def train():
     """
     Train the crew for a given number of iterations.
     """
-    inputs = {
-        'group_id': 'sample_value',
-        'scheduled_time': 'sample_value'
-    }
+    inputs = _inputs()
     try:
         WhatsappCrew().crew().train(n_iterations=int(sys.argv[1]), filename=sys.argv[2], inputs=inputs)
 
@@ -46,10 +58,7 @@ def test():
     """
     Test the crew execution and returns the results.
     """
-    inputs = {
-        'group_id': 'sample_value',
-        'scheduled_time': 'sample_value'
-    }
+    inputs = _inputs()
     try:
         WhatsappCrew().crew().test(n_iterations=int(sys.argv[1]), openai_model_name=sys.argv[2], inputs=inputs)
 
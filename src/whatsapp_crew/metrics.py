@@ -0,0 +1,262 @@
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _key(labels: Dict) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+class Metrics:
+    """In-process counters and timers with Prometheus text and JSONL export.
+
+    Updates are a dict lookup and an add under one lock, cheap enough for
+    every stage, storage call and HTTP request (not for every message).
+    Timers keep count, sum and max per label set. With ``enabled`` false,
+    every update returns immediately.
+    """
+
+    def __init__(self, prefix: str = "whatsapp_crew", enabled: bool = True):
+        self.prefix = prefix
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._timers: Dict[str, Dict[LabelKey, List[float]]] = {}
+        self._help: Dict[str, str] = {}
+
+    def describe(self, name: str, help_text: str) -> None:
+        self._help[name] = help_text
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """Add ``value`` to a counter."""
+        if not self.enabled:
+            return
+        key = _key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        """Record one duration of a timer."""
+        if not self.enabled:
+            return
+        key = _key(labels)
+        with self._lock:
+            stats = self._timers.setdefault(name, {}).get(key)
+            if stats is None:
+                self._timers[name][key] = [1, seconds, seconds]
+            else:
+                stats[0] += 1
+                stats[1] += seconds
+                if seconds > stats[2]:
+                    stats[2] = seconds
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        """Time the body of a ``with`` block, including when it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def timed(self, name: str, **labels) -> Callable:
+        """Decorator timing every call of a plain or coroutine function."""
+        def decorate(fn: Callable) -> Callable:
+            if inspect.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    started = time.perf_counter()
+                    try:
+                        return await fn(*args, **kwargs)
+                    finally:
+                        self.observe(name, time.perf_counter() - started, **labels)
+                return async_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.observe(name, time.perf_counter() - started, **labels)
+            return wrapper
+        return decorate
+
+    def snapshot(self) -> Dict:
+        """Current values as JSON-compatible data."""
+        with self._lock:
+            return {
+                "counters": {
+                    name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                    for name, series in self._counters.items()
+                },
+                "timers": {
+                    name: [
+                        {"labels": dict(key), "count": count, "sum": total, "max": longest}
+                        for key, (count, total, longest) in series.items()
+                    ]
+                    for name, series in self._timers.items()
+                }
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._timers.clear()
+
+    def prometheus_text(self) -> str:
+        """Render all series in the Prometheus text exposition format."""
+        def labels_text(key: LabelKey) -> str:
+            if not key:
+                return ""
+            return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in key) + "}"
+
+        lines = []
+        snapshot = self.snapshot()
+        for name, series in sorted(snapshot["counters"].items()):
+            metric = f"{self.prefix}_{name}"
+            if name in self._help:
+                lines.append(f"# HELP {metric} {self._help[name]}")
+            lines.append(f"# TYPE {metric} counter")
+            for item in series:
+                lines.append(f"{metric}{labels_text(_key(item['labels']))} {item['value']:g}")
+        for name, series in sorted(snapshot["timers"].items()):
+            metric = f"{self.prefix}_{name}"
+            if name in self._help:
+                lines.append(f"# HELP {metric} {self._help[name]}")
+            lines.append(f"# TYPE {metric} summary")
+            for item in series:
+                labels = labels_text(_key(item['labels']))
+                lines.append(f"{metric}_count{labels} {item['count']}")
+                lines.append(f"{metric}_sum{labels} {item['sum']:.6f}")
+            lines.append(f"# TYPE {metric}_max gauge")
+            for item in series:
+                lines.append(f"{metric}_max{labels_text(_key(item['labels']))} {item['max']:.6f}")
+        return "\n".join(lines) + "\n"
+
+    def write_jsonl(self, path: str) -> None:
+        """Append the current snapshot, with a timestamp, as one JSON line."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'a') as f:
+            f.write(json.dumps({"time": time.time(), **self.snapshot()}) + "\n")
+
+    def serve(self, host: str = "127.0.0.1", port: int = 9464) -> ThreadingHTTPServer:
+        """Serve ``GET /metrics`` in Prometheus format from a daemon thread."""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+class SamplingProfiler:
+    """Statistical profiler that samples the stacks of running threads.
+
+    Every ``interval`` seconds a background thread records the current stack
+    of each thread (or only ``thread_id``). The cost is independent of how
+    many functions run, so it can stay on in production for a slow run.
+    ``write_collapsed`` produces the folded format read by flame graph tools.
+    """
+
+    def __init__(self, interval: float = 0.005, thread_id: Optional[int] = None, max_depth: int = 64):
+        self.interval = interval
+        self.thread_id = thread_id
+        self.max_depth = max_depth
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or (self.thread_id is not None and thread_id != self.thread_id):
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                self.samples[";".join(reversed(stack))] += 1
+
+    def start(self) -> 'SamplingProfiler':
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> 'SamplingProfiler':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def top(self, limit: int = 10) -> List[Tuple[str, int]]:
+        """Functions with the most samples at the top of the stack."""
+        leaves: Counter = Counter()
+        for stack, count in self.samples.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return leaves.most_common(limit)
+
+    def write_collapsed(self, path: str) -> None:
+        with open(path, 'w') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+# Process-wide registry used by the instrumented modules
+METRICS = Metrics(enabled=os.environ.get("WHATSAPP_CREW_METRICS", "1") != "0")
+for _name, _help in {
+    "analyzer_stage_seconds": "Time spent in MessageAnalyzer stages",
+    "storage_seconds": "Time spent in message and summary storage operations",
+    "storage_messages_total": "Messages written to storage",
+    "storage_listener_errors_total": "Exceptions raised by storage listeners after a save",
+    "http_request_seconds": "WhatsApp Cloud API request latency",
+    "http_requests_total": "WhatsApp Cloud API requests by status",
+    "crew_kickoff_seconds": "Duration of crew runs",
+    "crew_task_seconds": "Duration of each task of a crew run",
+    "tool_run_seconds": "Duration of tool runs made by agents",
+    "tool_runs_total": "Tool runs made by agents by outcome",
+    "llm_call_seconds": "Duration of LLM calls made outside a crew run",
+    "scheduler_job_seconds": "Duration of scheduled job attempts",
+    "scheduler_job_attempts_total": "Scheduled job attempts by outcome",
+    "scheduler_job_failures_total": "Scheduled job runs that failed after all retries",
+}.items():
+    METRICS.describe(_name, _help)
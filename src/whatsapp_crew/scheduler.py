@@ -1,19 +1,175 @@
-import schedule
-import time
+import asyncio
+import heapq
+import inspect
+import itertools
+import logging
+import os
+import zlib
 import yaml
 import pytz
-from datetime import datetime, timedelta
-from pathlib import Path
-from typing import Callable, Dict, Optional
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Set, Union
 
-class Scheduler:
-    """Scheduler for managing periodic WhatsApp group summary tasks."""
+from .job_state import JobStateStore
+from .metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+# Longest single sleep, so wall-clock jumps (suspend, NTP) are noticed
+MAX_SLEEP = 300
+
+
+class PriorityLimiter:
+    """Concurrency cap that admits waiting jobs highest priority first."""
+    
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self._waiters: List = []
+        self._order = itertools.count()
     
-    def __init__(self):
-        self.config = self._load_config()
-        self.timezone = pytz.timezone(self.config['timezone'])
-        self.scheduled_jobs = {}
+    async def acquire(self, priority: int = 0) -> None:
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return
         
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (-priority, next(self._order), waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just before cancellation; pass it on
+                self.release()
+            raise
+    
+    def release(self) -> None:
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                waiter.set_result(None)  # Hand the slot over directly
+                return
+        self.active -= 1
+
+
+class ScheduledJob:
+    """A task due at a wall-clock time every ``interval_days`` days in a timezone.
+    
+    ``offset`` shifts every occurrence, e.g. to stagger groups within a
+    window. The job also keeps its own failure and retry state. ``catch_up``
+    is how many missed occurrences are run after a restart.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        task: Callable,
+        at: str,
+        timezone: pytz.BaseTzInfo,
+        interval_days: int = 1,
+        max_retries: int = 3,
+        retry_delay: int = 300,
+        priority: int = 0,
+        offset: timedelta = timedelta(0),
+        kwargs: Optional[Dict] = None,
+        catch_up: int = 1
+    ):
+        self.name = name
+        self.task = task
+        self.at = datetime.strptime(at, "%H:%M").time()
+        self.timezone = timezone
+        self.interval_days = interval_days
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.priority = priority
+        self.offset = offset
+        self.kwargs = kwargs or {}
+        self.catch_up = catch_up
+        self.next_run: Optional[datetime] = None
+        self.last_success: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self.attempts = 0
+        self.consecutive_failures = 0
+    
+    def _occurrence(self, day: date) -> datetime:
+        # Times skipped by a DST change resolve to the same wall time after the change
+        start = self.timezone.normalize(
+            self.timezone.localize(datetime.combine(day, self.at), is_dst=False)
+        )
+        return self.timezone.normalize(start + self.offset)
+    
+    def next_after(self, moment: datetime) -> datetime:
+        """First due time strictly after ``moment``, keeping the day interval."""
+        if self.next_run is None:
+            day, step = moment.astimezone(self.timezone).date() - timedelta(days=1), timedelta(days=1)
+        else:
+            day, step = (self.next_run - self.offset).astimezone(self.timezone).date(), timedelta(days=self.interval_days)
+        candidate = self._occurrence(day)
+        while candidate <= moment:
+            day += step
+            candidate = self._occurrence(day)
+        return candidate
+    
+    def occurrences_between(self, after: datetime, before: datetime) -> List[datetime]:
+        """Due times strictly between two moments, stepping from the occurrence ``after``."""
+        day = (after - self.offset).astimezone(self.timezone).date()
+        occurrences = []
+        candidate = self._occurrence(day)
+        while candidate < before:
+            if candidate > after:
+                occurrences.append(candidate)
+            day += timedelta(days=self.interval_days)
+            candidate = self._occurrence(day)
+        return occurrences
+
+
+class Scheduler:
+    """Scheduler for managing periodic WhatsApp group summary tasks.
+    
+    Runs on an asyncio event loop and sleeps until the next job is due
+    rather than polling. Every due job runs in its own task, and retries wait
+    on timers inside that task, so a failing job never delays the others.
+    Plain functions run in a worker thread; coroutine functions run on the
+    loop. Times are interpreted in the ``timezone`` from the config.
+    
+    With ``max_concurrent_jobs`` set, at most that many job attempts run at
+    once; jobs waiting for a slot start highest ``priority`` first, and a job
+    waiting to retry does not hold a slot.
+    
+    With ``state_path`` set, every run is recorded in a ``JobStateStore``.
+    When the loop starts, runs interrupted by a restart resume with the
+    attempts they have left, and occurrences missed while the process was
+    down (up to each job's ``catch_up``) are run with ``current_time`` set to
+    the time they were due, at most ``catch_up_concurrency`` at once.
+    Occurrences that already ran are never repeated.
+    
+    With ``metrics_port`` set, ``METRICS`` is served in Prometheus format on
+    that port while the loop runs; with ``metrics_path`` set, a snapshot is
+    appended to that JSONL file after every job run.
+    """
+    
+    def __init__(
+        self,
+        config: Optional[Dict] = None,
+        max_concurrent_jobs: Optional[int] = None,
+        state_path: Optional[str] = None
+    ):
+        self.config = config if config is not None else self._load_config()
+        self.timezone = pytz.timezone(self.config.get('timezone', 'UTC'))
+        self.max_concurrent_jobs = max_concurrent_jobs or self.config.get('max_concurrent_jobs')
+        self.catch_up_concurrency = self.config.get('catch_up_concurrency', 4)
+        state_path = state_path or self.config.get('state_path')
+        self.state = JobStateStore(state_path) if state_path else None
+        self.metrics_port = self.config.get('metrics_port')
+        self.metrics_path = self.config.get('metrics_path')
+        self.scheduled_jobs: Dict[str, ScheduledJob] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._limiter: Optional[PriorityLimiter] = None
+        self._catch_up_slots: Optional[PriorityLimiter] = None
+        self._recovered: Set[str] = set()
+        self._running: Set[asyncio.Task] = set()
+    
     def _load_config(self) -> Dict:
         """Load WhatsApp configuration."""
         config_path = "whatsapp_config.yaml"
@@ -24,82 +180,274 @@ class Scheduler:
             config = yaml.safe_load(f)
             return config['whatsapp']
     
-    def schedule_daily_summary(self, task: Callable) -> None:
-        """Schedule daily summary generation."""
-        summary_time = self.config['summary_time']
+    def _now(self) -> datetime:
+        return datetime.now(self.timezone)
+    
+    def _add_job(self, job: ScheduledJob) -> None:
+        history = self.state.job(job.name) if self.state else None
+        if history and history['last_run']:
+            # Keep the day interval in step with the runs before the restart
+            job.next_run = history['last_run'].astimezone(job.timezone)
+            job.last_success = history['last_success'] and history['last_success'].astimezone(job.timezone)
+            job.last_error = history['last_error']
+        job.next_run = job.next_after(self._now())
+        self.scheduled_jobs[job.name] = job
+        self._wake()
+    
+    def _wake(self) -> None:
+        """Make the run loop recompute its next wakeup; safe from any thread."""
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+    
+    def _group_registry(self, groups: Optional[Iterable[Union[str, Dict]]]) -> List[Dict]:
+        """Normalise group entries to dicts with ``group_id``, ``summary_time``, ``timezone`` and ``priority``."""
+        registry = []
+        for group in groups or []:
+            if isinstance(group, str):
+                group = {'group_id': group}
+            registry.append({
+                'group_id': group['group_id'],
+                'summary_time': group.get('summary_time', self.config['summary_time']),
+                'timezone': group.get('timezone', self.timezone.zone),
+                'priority': group.get('priority', 0)
+            })
+        return registry
+    
+    def schedule_daily_summary(
+        self,
+        task: Callable,
+        groups: Optional[Iterable[Union[str, Dict]]] = None,
+        stagger_minutes: Optional[float] = None
+    ) -> None:
+        """Schedule daily summary generation.
         
-        # Schedule the task
-        job = schedule.every().day.at(summary_time).do(
-            self._run_task_with_retry,
-            task=task,
-            max_retries=3,
-            retry_delay=300  # 5 minutes
-        )
+        With a group registry (``groups``, else ``groups`` in the config) one
+        job named ``daily_summary:{group_id}`` is created per group, at the
+        group's own ``summary_time`` and ``timezone``, and ``task`` is called
+        with ``group_id``. ``stagger_minutes`` (or ``summary_stagger_minutes``)
+        spreads the groups over a window after their time; each group's offset
+        is derived from its id so it stays the same across restarts.
+        """
+        registry = self._group_registry(groups if groups is not None else self.config.get('groups'))
+        catch_up = self.config.get('max_catch_up_runs', 7)
+        if not registry:
+            self._add_job(ScheduledJob(
+                'daily_summary',
+                task,
+                self.config['summary_time'],
+                self.timezone,
+                max_retries=3,
+                retry_delay=300,  # 5 minutes
+                catch_up=catch_up
+            ))
+            return
         
-        self.scheduled_jobs['daily_summary'] = job
+        if stagger_minutes is None:
+            stagger_minutes = self.config.get('summary_stagger_minutes', 0)
+        window = int(stagger_minutes * 60)
+        for group in registry:
+            group_id = group['group_id']
+            offset = zlib.crc32(group_id.encode('utf-8')) % window if window else 0
+            self._add_job(ScheduledJob(
+                f'daily_summary:{group_id}',
+                task,
+                group['summary_time'],
+                pytz.timezone(group['timezone']),
+                max_retries=3,
+                retry_delay=300,  # 5 minutes
+                priority=group['priority'],
+                offset=timedelta(seconds=offset),
+                kwargs={'group_id': group_id},
+                catch_up=catch_up
+            ))
     
     def schedule_archival(self, task: Callable, interval_days: int = 1) -> None:
         """Schedule periodic data archival."""
         # Run at midnight
-        job = schedule.every(interval_days).days.at("00:00").do(
-            self._run_task_with_retry,
-            task=task,
+        self._add_job(ScheduledJob(
+            'archival',
+            task,
+            "00:00",
+            self.timezone,
+            interval_days=interval_days,
             max_retries=3,
             retry_delay=600  # 10 minutes
-        )
-        
-        self.scheduled_jobs['archival'] = job
+        ))
+    
+    async def _call(self, task: Callable, **kwargs) -> None:
+        if inspect.iscoroutinefunction(task):
+            await task(**kwargs)
+            return
+        result = await asyncio.to_thread(task, **kwargs)
+        if inspect.isawaitable(result):
+            await result
     
-    def _run_task_with_retry(
+    async def _run_job(
         self,
-        task: Callable,
-        max_retries: int = 3,
-        retry_delay: int = 300,
-        **kwargs
+        job: ScheduledJob,
+        occurrence: datetime,
+        attempts: int = 0,
+        catch_up: bool = False
     ) -> None:
-        """Run a task with retry logic."""
-        attempt = 0
-        last_error = None
+        """Run one occurrence of a job with retry logic, recording its failure and retry state."""
+        retry_delay = job.retry_delay * 2 ** attempts
+        if self.state:
+            self.state.started(job.name, occurrence, attempts)
+        if catch_up:
+            await self._catch_up_slots.acquire(job.priority)
         
-        while attempt < max_retries:
-            try:
-                # Add timezone info to kwargs
-                kwargs['current_time'] = datetime.now(self.timezone)
-                
-                # Run the task
-                task(**kwargs)
-                return  # Success
-            except Exception as e:
-                attempt += 1
-                last_error = e
+        try:
+            while attempts < job.max_retries:
+                if self._limiter is not None:
+                    await self._limiter.acquire(job.priority)
+                try:
+                    # Add timezone info to kwargs; catch-up runs see the time they were due
+                    current_time = occurrence if catch_up else datetime.now(job.timezone)
+                    with METRICS.timer("scheduler_job_seconds", job=job.name):
+                        await self._call(job.task, **job.kwargs, current_time=current_time)
+                except Exception as e:
+                    METRICS.inc("scheduler_job_attempts_total", job=job.name, outcome="error")
+                    attempts += 1
+                    job.attempts = attempts
+                    job.last_error = f"{type(e).__name__}: {e}"
+                    logger.warning("Task %s attempt %d of %d failed: %s",
+                                   job.name, attempts, job.max_retries, job.last_error)
+                    if self.state:
+                        self.state.attempted(job.name, occurrence, attempts, job.last_error)
+                else:
+                    METRICS.inc("scheduler_job_attempts_total", job=job.name, outcome="success")
+                    job.attempts = attempts
+                    job.last_success = max(filter(None, (job.last_success, occurrence)))
+                    job.last_error = None
+                    job.consecutive_failures = 0
+                    if self.state:
+                        self.state.finished(job.name, occurrence)
+                    return  # Success
+                finally:
+                    if self._limiter is not None:
+                        self._limiter.release()
                 
-                if attempt < max_retries:
-                    # Wait before retry
-                    time.sleep(retry_delay)
+                if attempts < job.max_retries:
+                    # Wait before retry without holding up other jobs
+                    await asyncio.sleep(retry_delay)
                     # Increase delay for next retry
                     retry_delay *= 2
+            
+            # Log the failure after all retries
+            job.consecutive_failures += 1
+            METRICS.inc("scheduler_job_failures_total", job=job.name)
+            if self.state:
+                self.state.finished(job.name, occurrence, job.last_error)
+            logger.error("Task %s failed after %d attempts. Last error: %s",
+                         job.name, job.max_retries, job.last_error)
+        finally:
+            if catch_up:
+                self._catch_up_slots.release()
+    
+    def _start(self, job: ScheduledJob, occurrence: datetime, attempts: int = 0, catch_up: bool = False) -> None:
+        execution = asyncio.create_task(self._run_job(job, occurrence, attempts, catch_up))
+        self._running.add(execution)
+        
+        def finished(done: asyncio.Task) -> None:
+            self._running.discard(done)
+            if self.metrics_path:
+                # File I/O off the loop; the executor is drained when asyncio.run ends
+                asyncio.get_running_loop().run_in_executor(None, METRICS.write_jsonl, self.metrics_path)
+            if self._wakeup is not None:
+                self._wakeup.set()
+        
+        execution.add_done_callback(finished)
+    
+    def _recover(self, job: ScheduledJob) -> None:
+        """Resume interrupted runs of a job and catch up occurrences missed while stopped."""
+        self._recovered.add(job.name)
+        history = self.state.job(job.name) if self.state else None
+        if not history:
+            return
+        
+        for occurrence, attempts in self.state.pending(job.name):
+            occurrence = occurrence.astimezone(job.timezone)
+            if attempts < job.max_retries:
+                self._start(job, occurrence, attempts, catch_up=True)
+            else:
+                # Interrupted after its last attempt failed
+                self.state.finished(job.name, occurrence, history['last_error'] or "retries exhausted")
         
-        # Log the failure after all retries
-        print(f"Task failed after {max_retries} attempts. Last error: {last_error}")
+        if history['last_run'] and job.catch_up:
+            missed = job.occurrences_between(history['last_run'], job.next_run)
+            for occurrence in missed[-job.catch_up:]:
+                self._start(job, occurrence, catch_up=True)
+    
+    async def run_async(self) -> None:
+        """Run due jobs until the scheduler is stopped."""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        if self.max_concurrent_jobs:
+            self._limiter = PriorityLimiter(self.max_concurrent_jobs)
+        self._catch_up_slots = PriorityLimiter(self.catch_up_concurrency)
+        self._recovered.clear()
+        metrics_server = None
+        if self.metrics_port:
+            metrics_server = METRICS.serve(self.config.get('metrics_host', '127.0.0.1'), self.metrics_port)
+        try:
+            while self.scheduled_jobs or self._running:
+                self._wakeup.clear()
+                for job in list(self.scheduled_jobs.values()):
+                    if job.name not in self._recovered:
+                        self._recover(job)
+                now = self._now()
+                
+                due = sorted(
+                    (job for job in self.scheduled_jobs.values() if job.next_run <= now),
+                    key=lambda job: (job.next_run, -job.priority)
+                )
+                for job in due:
+                    self._start(job, job.next_run)
+                    # Occurrences missed while the process was busy or asleep are skipped
+                    job.next_run = job.next_after(now)
+                
+                timeout = None
+                if self.scheduled_jobs:
+                    next_run = min(job.next_run for job in self.scheduled_jobs.values())
+                    timeout = min(MAX_SLEEP, max(0.0, (next_run - self._now()).total_seconds()))
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            for execution in list(self._running):
+                execution.cancel()
+            await asyncio.gather(*self._running, return_exceptions=True)
+            if metrics_server is not None:
+                metrics_server.shutdown()
+                metrics_server.server_close()
+            self._loop = None
+            self._wakeup = None
+            self._limiter = None
+            self._catch_up_slots = None
     
     def run(self) -> None:
         """Run the scheduler."""
         try:
-            while True:
-                schedule.run_pending()
-                time.sleep(60)  # Check every minute
+            asyncio.run(self.run_async())
         except KeyboardInterrupt:
-            print("Scheduler stopped by user.")
+            logger.info("Scheduler stopped by user.")
+    
+    def _cancel_running(self) -> None:
+        for execution in list(self._running):
+            execution.cancel()
     
     def stop(self) -> None:
         """Stop all scheduled jobs."""
-        for job_name, job in self.scheduled_jobs.items():
-            schedule.cancel_job(job)
         self.scheduled_jobs.clear()
+        if self._loop is not None:
+            # Pending retries are cancelled too; the run loop then returns
+            self._loop.call_soon_threadsafe(self._cancel_running)
+        self._wake()
     
     def get_next_run(self, job_name: str) -> Optional[datetime]:
         """Get the next scheduled run time for a job."""
         job = self.scheduled_jobs.get(job_name)
         if job:
             return job.next_run
-        return None 
\ No newline at end of file
+        return None
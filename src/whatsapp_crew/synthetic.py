@@ -0,0 +1,202 @@
+import itertools
+import random
+from datetime import date as date_type, datetime, time, timezone
+from typing import Dict, Iterator, List, Optional
+
+FIRST_NAMES = [
+    "Alice", "Bob", "Carol", "Dave", "Eve", "Frank", "Grace", "Heidi", "Ivan", "Judy",
+    "Mallory", "Niaj", "Olivia", "Peggy", "Rupert", "Sybil", "Trent", "Uma", "Victor", "Wendy",
+]
+
+# Relative message volume per hour of the day
+HOURLY_PROFILE = [1, 1, 1, 1, 1, 2, 4, 8, 12, 14, 14, 13, 10, 12, 14, 14, 13, 11, 9, 8, 7, 5, 3, 2]
+
+CHATTER = [
+    "I think we should {verb} the {thing} before the {event}",
+    "has anyone looked at the {thing}? the {issue} is back",
+    "the {issue} in {thing} is fixed, deploying after the {event}",
+    "can someone help with the {thing}? not sure how the {issue} happens",
+    "let's plan the {event} for next week, the schedule is tight",
+    "we need a decision on the {thing}, can we vote at the {event}",
+    "important update: the {event} moved to tomorrow",
+    "quick question about the {thing}, is the {issue} expected?",
+    "agreed, the roadmap for the {thing} looks good",
+    "heads up, the {thing} review is at the {event}",
+]
+ACTIONS = [
+    "TODO: {verb} the {thing}",
+    "action item: {verb} the {thing}",
+    "please handle the {thing} {issue}",
+    "need to complete the {thing} before the {event}",
+    "task: {verb} the {thing}",
+]
+DUE_FORMATS = [" due by {d}/{m}/{y}", " deadline: {d}-{m}-{y2}", " by {d}/{m}/{y}"]
+NOISE = [
+    "ok", "okay", "thanks", "ty", "yes", "no", "+1", "👍", "👌", "✅", "🙏",
+    "image omitted", "video omitted", "{name} joined the group", "{name} left the group",
+]
+VERBS = ["fix", "review", "refactor", "update", "test", "document", "deploy", "migrate"]
+THINGS = ["storage layer", "release notes", "deploy job", "API client", "dashboard", "budget", "onboarding docs", "roadmap"]
+ISSUES = ["bug", "error", "timeout", "flaky test", "regression", "merge request"]
+EVENTS = ["meeting", "release", "sprint review", "standup", "demo"]
+DOMAINS = ["example.com", "github.com/acme/app", "docs.acme.dev", "drive.example.org", "youtu.be"]
+TAGS = ["release", "planning", "bug", "announcement", "design", "ops"]
+EMOJI = ["😂", "🔥", "🎉", "🙌", "😅", "👀", "💯", "🚀", "🤔", "❤️"]
+MEDIA = [("image", "jpg"), ("video", "mp4"), ("document", "pdf"), ("audio", "ogg")]
+
+
+class SyntheticGroup:
+    """Generator of realistic WhatsApp group traffic in the stored message schema.
+
+    Messages follow a daytime activity curve, senders a Zipf-like
+    distribution (a few people write most messages), and replies form chains
+    through ``quoted_message_id`` rather than only direct answers. The mix of
+    acknowledgements and system messages (which the filters drop), topic
+    chatter, action items with due dates, links, media, mentions, hashtags
+    and emoji is set by the ``*_rate`` arguments. Output is deterministic
+    for a given ``seed``.
+    """
+
+    def __init__(
+        self,
+        group_id: str = "synthetic-group",
+        participants: int = 12,
+        sender_skew: float = 1.1,
+        reply_rate: float = 0.3,
+        thread_continue_rate: float = 0.6,
+        noise_rate: float = 0.25,
+        action_rate: float = 0.04,
+        due_date_rate: float = 0.5,
+        url_rate: float = 0.05,
+        media_rate: float = 0.04,
+        mention_rate: float = 0.1,
+        tag_rate: float = 0.05,
+        emoji_rate: float = 0.15,
+        seed: int = 0
+    ):
+        self.group_id = group_id
+        self.sender_skew = sender_skew
+        self.reply_rate = reply_rate
+        self.thread_continue_rate = thread_continue_rate
+        self.noise_rate = noise_rate
+        self.action_rate = action_rate
+        self.due_date_rate = due_date_rate
+        self.url_rate = url_rate
+        self.media_rate = media_rate
+        self.mention_rate = mention_rate
+        self.tag_rate = tag_rate
+        self.emoji_rate = emoji_rate
+        self.seed = seed
+        self.senders = [
+            {"id": f"49{1500000000 + index * 7919}", "name": self._name(index)}
+            for index in range(participants)
+        ]
+        weights = [1 / (rank + 1) ** sender_skew for rank in range(participants)]
+        self._sender_weights = list(itertools.accumulate(weights))
+
+    @staticmethod
+    def _name(index: int) -> str:
+        name = FIRST_NAMES[index % len(FIRST_NAMES)]
+        return name if index < len(FIRST_NAMES) else f"{name} {index // len(FIRST_NAMES) + 1}"
+
+    def _timestamps(self, rng: random.Random, n: int, day: date_type) -> List[int]:
+        """Sorted epoch seconds spread over ``day`` along the hourly profile."""
+        start = int(datetime.combine(day, time(), timezone.utc).timestamp())
+        hours = rng.choices(range(24), weights=HOURLY_PROFILE, k=n)
+        return sorted(start + hour * 3600 + rng.randrange(3600) for hour in hours)
+
+    def _fill(self, rng: random.Random, template: str) -> str:
+        return template.format(
+            verb=rng.choice(VERBS), thing=rng.choice(THINGS), issue=rng.choice(ISSUES),
+            event=rng.choice(EVENTS), name=rng.choice(self.senders)["name"]
+        )
+
+    def _due_date(self, rng: random.Random, day: date_type) -> str:
+        due = day.toordinal() + rng.randrange(1, 30)
+        due = date_type.fromordinal(due)
+        return rng.choice(DUE_FORMATS).format(
+            d=due.day, m=due.month, y=due.year, y2=f"{due.year % 100:02d}"
+        )
+
+    def messages(self, n: int, day: Optional[date_type] = None) -> Iterator[Dict]:
+        """Yield ``n`` messages of one day in timestamp order."""
+        day = day or datetime.now(timezone.utc).date()
+        rng = random.Random(f"{self.seed}:{self.group_id}:{day}")
+        prefix = f"wamid.{self.group_id}.{day:%Y%m%d}"
+        recent: List[str] = []
+        last_reply: Optional[str] = None
+
+        for i, timestamp in enumerate(self._timestamps(rng, n, day)):
+            message_id = f"{prefix}.{i}"
+            sender = rng.choices(self.senders, cum_weights=self._sender_weights)[0]
+            content = {"type": "text", "text": "", "media_url": None, "caption": None}
+            mentions: List[Dict] = []
+            tags: List[str] = []
+
+            roll = rng.random()
+            noise = roll < self.noise_rate
+            if noise:
+                text = self._fill(rng, rng.choice(NOISE))
+            elif roll < self.noise_rate + self.media_rate:
+                kind, extension = rng.choice(MEDIA)
+                content.update(type=kind, media_url=f"https://media.example.net/{message_id}.{extension}")
+                content["caption"] = self._fill(rng, rng.choice(CHATTER)) if rng.random() < 0.5 else None
+                text = content["caption"] or f"{kind} omitted"
+            elif roll < self.noise_rate + self.media_rate + self.action_rate:
+                text = self._fill(rng, rng.choice(ACTIONS))
+                if rng.random() < self.due_date_rate:
+                    text += self._due_date(rng, day)
+            else:
+                text = self._fill(rng, rng.choice(CHATTER))
+                if rng.random() < self.url_rate:
+                    text += f" https://{rng.choice(DOMAINS)}/{rng.choice(THINGS).replace(' ', '-')}?id={i}"
+
+            if content["type"] == "text" and not noise:
+                if rng.random() < self.mention_rate:
+                    name = rng.choice(self.senders)["name"]
+                    mentions.append({"name": name})
+                    text = f"@{name} {text}"
+                if rng.random() < self.tag_rate:
+                    tags.append(rng.choice(TAGS))
+                    text += f" #{tags[0]}"
+                if rng.random() < self.emoji_rate:
+                    text += " " + "".join(rng.choices(EMOJI, k=rng.randint(1, 3)))
+
+            quoted = None
+            if recent and rng.random() < self.reply_rate:
+                # Continuing the latest reply builds chains A -> B -> C
+                if last_reply and rng.random() < self.thread_continue_rate:
+                    quoted = last_reply
+                else:
+                    quoted = rng.choice(recent)
+                last_reply = message_id
+            recent.append(message_id)
+            if len(recent) > 50:
+                recent.pop(0)
+
+            content["text"] = text
+            yield {
+                "message_id": message_id,
+                "timestamp": str(timestamp),
+                "sender": dict(sender),
+                "content": content,
+                "metadata": {"quoted_message_id": quoted, "mentions": mentions, "tags": tags}
+            }
+
+
+def generate_messages(n: int, group_id: str = "synthetic-group", day: Optional[date_type] = None,
+                      **options) -> List[Dict]:
+    """``n`` messages of one group's day; ``options`` go to ``SyntheticGroup``."""
+    return list(SyntheticGroup(group_id, **options).messages(n, day))
+
+
+def generate_groups(n_groups: int, messages_per_group: int, day: Optional[date_type] = None,
+                    **options) -> Dict[str, List[Dict]]:
+    """Several groups of different sizes around ``messages_per_group``, keyed by group id."""
+    rng = random.Random(options.get("seed", 0))
+    groups = {}
+    for index in range(n_groups):
+        group_id = f"synthetic-group-{index}"
+        size = max(1, int(messages_per_group * rng.uniform(0.5, 1.5)))
+        groups[group_id] = generate_messages(size, group_id, day, **options)
+    return groups
@@ -0,0 +1,300 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Type
+
+from .message_record import MessageRecord, as_records
+from .thread_index import ThreadIndex
+
+
+class SectionAccumulator(ABC):
+    """Base class for a summary section built from one message at a time.
+
+    The pipeline calls ``add`` for every message as a ``MessageRecord``,
+    with its text already extracted, then ``result`` once to get the
+    section's output. Subclasses are registered with
+    ``MessageAnalyzer.register_section``.
+
+    ``add`` and ``result`` are required. ``to_state``, ``load_state`` and
+    ``merge`` are optional: accumulators that implement them can also be
+    persisted and combined across shards by the incremental analyzer, and
+    ``merge`` is needed for map-reduce summaries. Merging appends the other
+    accumulator's messages after this one's.
+    """
+
+    section: str = ""
+
+    def __init__(self, analyzer):
+        self.analyzer = analyzer
+
+    @abstractmethod
+    def add(self, msg: MessageRecord, text: str) -> None:
+        """Fold one message into the section."""
+
+    @abstractmethod
+    def result(self):
+        """Return the section's output for the messages added so far."""
+
+    def to_state(self) -> Dict:
+        """Optional: return the running state as JSON-serialisable data."""
+        raise NotImplementedError
+
+    def load_state(self, state: Dict) -> None:
+        """Optional: restore the running state produced by ``to_state``."""
+        raise NotImplementedError
+
+    def merge(self, other: 'SectionAccumulator') -> None:
+        """Optional: fold another accumulator of the same type into this one."""
+        raise NotImplementedError
+
+    @classmethod
+    def implements(cls, method: str) -> bool:
+        """Whether this accumulator overrides the optional ``method``."""
+        return getattr(cls, method) is not getattr(SectionAccumulator, method)
+
+
+class TopicAccumulator(SectionAccumulator):
+    """Group message texts and participants by topic."""
+
+    section = "key_discussions"
+
+    def __init__(self, analyzer):
+        super().__init__(analyzer)
+        self.topics = {}
+
+    def add(self, msg: MessageRecord, text: str) -> None:
+        for topic_name in self.analyzer._match_keywords(text)['topics']:
+            topic = self.topics.get(topic_name)
+            if topic is None:
+                topic = self.topics[topic_name] = {'content': [], 'participants': set()}
+            topic['content'].append(text)
+            topic['participants'].add(msg.sender_name)
+
+    def result(self) -> List[Dict]:
+        return [
+            {
+                'topic': topic_name,
+                'content': ' | '.join(data['content']),
+                'participants': list(data['participants'])
+            }
+            for topic_name, data in self.topics.items()
+        ]
+
+    def to_state(self) -> Dict:
+        return {
+            name: {'content': data['content'], 'participants': list(data['participants'])}
+            for name, data in self.topics.items()
+        }
+
+    def load_state(self, state: Dict) -> None:
+        self.topics = {
+            name: {'content': list(data['content']), 'participants': set(data['participants'])}
+            for name, data in state.items()
+        }
+
+    def merge(self, other: 'TopicAccumulator') -> None:
+        for name, data in other.topics.items():
+            topic = self.topics.setdefault(name, {'content': [], 'participants': set()})
+            topic['content'].extend(data['content'])
+            topic['participants'] |= data['participants']
+
+
+class ActivityAccumulator(SectionAccumulator):
+    """Count messages per hour and distinct participants."""
+
+    section = "activity"
+
+    def __init__(self, analyzer):
+        super().__init__(analyzer)
+        self.total = 0
+        self.hour_counts = {}
+        self.participants = set()
+
+    def add(self, msg: MessageRecord, text: str) -> None:
+        hour = datetime.fromtimestamp(int(msg.timestamp)).strftime('%H:00')
+        self.hour_counts[hour] = self.hour_counts.get(hour, 0) + 1
+        self.participants.add(msg.sender_name)
+        self.total += 1
+
+    def result(self) -> Dict:
+        if not self.total:
+            return {
+                'total_messages': 0,
+                'active_participants': 0,
+                'peak_time': '00:00'
+            }
+
+        return {
+            'total_messages': self.total,
+            'active_participants': len(self.participants),
+            'peak_time': max(self.hour_counts.items(), key=lambda x: x[1])[0]
+        }
+
+    def to_state(self) -> Dict:
+        return {
+            'total': self.total,
+            'hour_counts': self.hour_counts,
+            'participants': list(self.participants)
+        }
+
+    def load_state(self, state: Dict) -> None:
+        self.total = state['total']
+        self.hour_counts = dict(state['hour_counts'])
+        self.participants = set(state['participants'])
+
+    def merge(self, other: 'ActivityAccumulator') -> None:
+        self.total += other.total
+        for hour, count in other.hour_counts.items():
+            self.hour_counts[hour] = self.hour_counts.get(hour, 0) + count
+        self.participants |= other.participants
+
+
+class ActionItemAccumulator(SectionAccumulator):
+    """Collect action items in message order."""
+
+    section = "action_items"
+
+    def __init__(self, analyzer):
+        super().__init__(analyzer)
+        self.items = []
+
+    def add(self, msg: MessageRecord, text: str) -> None:
+        self.items.extend(self.analyzer._message_action_items(msg, text))
+
+    def result(self) -> List[Dict]:
+        return self.items
+
+    def to_state(self) -> Dict:
+        return {'items': self.items}
+
+    def load_state(self, state: Dict) -> None:
+        self.items = list(state['items'])
+
+    def merge(self, other: 'ActionItemAccumulator') -> None:
+        self.items.extend(other.items)
+
+
+class InteractionAccumulator(SectionAccumulator):
+    """Track whole reply trees (chains included) with a ``ThreadIndex``.
+
+    The section lists at most ``analyzer.max_interactions`` threads: of the
+    largest threads, those with 3+ replies between 2+ people, biggest first.
+    Each entry has ``description`` and ``participants`` as before, plus the
+    thread's ``replies`` and reply ``depth``.
+    """
+
+    section = "notable_interactions"
+
+    def __init__(self, analyzer):
+        super().__init__(analyzer)
+        self.index = ThreadIndex()
+
+    def add(self, msg: MessageRecord, text: str) -> None:
+        self.index.add_record(msg, text)
+
+    def result(self) -> List[Dict]:
+        interactions = []
+        for thread in self.index.largest(self.analyzer.max_interactions):
+            if thread['replies'] >= 3 and len(thread['participants']) >= 2:
+                interactions.append({
+                    'description': thread['description'] + '...',
+                    'participants': thread['participants'],
+                    'replies': thread['replies'],
+                    'depth': thread['depth']
+                })
+        return interactions
+
+    def to_state(self) -> Dict:
+        return self.index.to_state()
+
+    def load_state(self, state: Dict) -> None:
+        self.index.load_state(state)
+
+    def merge(self, other: 'InteractionAccumulator') -> None:
+        self.index.merge(other.index)
+
+
+class ResourceAccumulator(SectionAccumulator):
+    """Collect shared links and media."""
+
+    section = "resources"
+
+    def __init__(self, analyzer):
+        super().__init__(analyzer)
+        self.resources = []
+
+    def add(self, msg: MessageRecord, text: str) -> None:
+        self.resources.extend(self.analyzer._message_resources(msg, text))
+
+    def result(self) -> List[Dict]:
+        return self.resources
+
+    def to_state(self) -> Dict:
+        return {'resources': self.resources}
+
+    def load_state(self, state: Dict) -> None:
+        self.resources = list(state['resources'])
+
+    def merge(self, other: 'ResourceAccumulator') -> None:
+        self.resources.extend(other.resources)
+
+
+DEFAULT_SECTIONS: Dict[str, Type[SectionAccumulator]] = {
+    accumulator.section: accumulator
+    for accumulator in (
+        TopicAccumulator,
+        ActivityAccumulator,
+        ActionItemAccumulator,
+        InteractionAccumulator,
+        ResourceAccumulator,
+    )
+}
+
+
+class AnalysisPipeline:
+    """Feed every message once to a set of section accumulators."""
+
+    def __init__(self, analyzer, accumulators: Dict[str, Type[SectionAccumulator]],
+                 sections: Optional[Sequence[str]] = None):
+        if sections is None:
+            sections = list(accumulators)
+
+        unknown = [name for name in sections if name not in accumulators]
+        if unknown:
+            raise ValueError(f"Unknown analysis sections: {', '.join(unknown)}")
+
+        # Keep the registered section order regardless of how they were requested
+        self.accumulators = {
+            name: accumulator(analyzer)
+            for name, accumulator in accumulators.items()
+            if name in sections
+        }
+
+    def require(self, methods: Sequence[str], purpose: str) -> None:
+        """Raise ``TypeError`` if a section lacks an optional method ``purpose`` needs."""
+        for name, accumulator in self.accumulators.items():
+            missing = [method for method in methods if not accumulator.implements(method)]
+            if missing:
+                raise TypeError(
+                    f"Analysis section {name!r} ({type(accumulator).__name__}) does not "
+                    f"implement {', '.join(missing)}, which {purpose} needs"
+                )
+
+    def feed(self, messages: Iterable) -> int:
+        """Add messages (records or stored dicts) to every accumulator and return how many were seen."""
+        adders = [accumulator.add for accumulator in self.accumulators.values()]
+        count = 0
+        for msg in as_records(messages):
+            text = msg.text
+            for add in adders:
+                add(msg, text)
+            count += 1
+        return count
+
+    def results(self) -> Dict:
+        """Return the output of every section for the messages fed so far."""
+        return {name: accumulator.result() for name, accumulator in self.accumulators.items()}
+
+    def run(self, messages: Iterable) -> Dict:
+        """Visit each message exactly once and return the combined sections."""
+        self.feed(messages)
+        return self.results()
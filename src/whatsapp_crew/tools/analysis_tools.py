@@ -0,0 +1,229 @@
+import json
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Type
+
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field, PrivateAttr
+
+from .message_analyzer import MessageAnalyzer
+from .message_storage import MessageStorage
+from .summary_cache import SummaryCache
+from .summary_storage import SummaryStorage
+
+DEFAULT_TOKEN_BUDGET = 1500
+
+# Share of the budget each section may use; unused tokens roll over to the next
+SECTION_SHARES = (
+    ("key_discussions", 0.35),
+    ("action_items", 0.25),
+    ("notable_interactions", 0.2),
+    ("resources", 0.2),
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English text)."""
+    return (len(text) + 3) // 4
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+def _names(names: List[str], limit: int = 4) -> str:
+    shown = ", ".join(sorted(names)[:limit])
+    return shown + (f" +{len(names) - limit}" if len(names) > limit else "")
+
+
+def _discussion_lines(discussions: List[Dict]) -> List[str]:
+    lines = []
+    for discussion in discussions:
+        messages = len(discussion['content'].split(' | ')) if discussion['content'] else 0
+        lines.append(
+            f"- {discussion['topic']}: {messages} msgs, "
+            f"{len(discussion['participants'])} people ({_names(discussion['participants'])})"
+        )
+    return lines
+
+
+def _action_lines(items: List[Dict]) -> List[str]:
+    grouped: Dict[str, Dict] = {}
+    for item in items:
+        entry = grouped.setdefault(item['description'].strip().lower(), {
+            'description': item['description'], 'assigned_to': set(), 'due_date': None, 'count': 0
+        })
+        entry['count'] += 1
+        entry['assigned_to'].update(item.get('assigned_to') or [])
+        entry['due_date'] = entry['due_date'] or item.get('due_date')
+
+    lines = []
+    for entry in sorted(grouped.values(), key=lambda entry: -entry['count']):
+        line = f"- {_clip(entry['description'], 100)}"
+        if entry['assigned_to']:
+            line += f" [{_names(['@' + name for name in entry['assigned_to']])}]"
+        if entry['due_date']:
+            line += f" (due {entry['due_date']})"
+        if entry['count'] > 1:
+            line += f" x{entry['count']}"
+        lines.append(line)
+    return lines
+
+
+def _interaction_lines(interactions: List[Dict]) -> List[str]:
+    return [
+        f"- {interaction['replies']} replies, depth {interaction['depth']} [{_names(interaction['participants'])}]"
+        for interaction in sorted(
+            interactions, key=lambda interaction: (-len(interaction['participants']), -interaction['replies'])
+        )
+    ]
+
+
+def _resource_lines(resources: List[Dict]) -> List[str]:
+    counts = Counter(resource['url'] for resource in resources)
+    kinds = {resource['url']: resource['type'] for resource in resources}
+    return [
+        f"- {kinds[url]}: {_clip(url, 120)}" + (f" x{count}" if count > 1 else "")
+        for url, count in counts.most_common()
+    ]
+
+
+SECTION_LINES = {
+    "key_discussions": ("Topics", _discussion_lines),
+    "action_items": ("Action items", _action_lines),
+    "notable_interactions": ("Threads", _interaction_lines),
+    "resources": ("Resources", _resource_lines),
+}
+
+
+def build_digest(group_id: str, date: str, analysis: Dict, token_budget: int = DEFAULT_TOKEN_BUDGET) -> str:
+    """Render ``analyze_messages`` output as a compact text digest for an LLM prompt.
+
+    Only derived fields are rendered: counts, participant names, extracted
+    action items, due dates and links, never message text. Repeated action
+    items and links are merged with a count and long values clipped. Each
+    section gets a share of ``token_budget``; a section that needs less
+    passes the rest on, and items that do not fit are counted instead of
+    listed.
+    """
+    activity = analysis.get('activity') or {}
+    header = (
+        f"Group {group_id}, {date}: {activity.get('total_messages', 0)} messages, "
+        f"{activity.get('active_participants', 0)} participants, peak {activity.get('peak_time') or 'n/a'}"
+    )
+    lines = [header]
+    remaining = token_budget - estimate_tokens(header)
+    carry = 0
+
+    for name, share in SECTION_SHARES:
+        if name not in analysis:
+            continue
+        title, render = SECTION_LINES[name]
+        items = render(analysis[name])
+        allowance = int(token_budget * share) + carry
+        section = [f"{title}:"]
+        used = estimate_tokens(section[0])
+        for line in items:
+            cost = estimate_tokens(line) + 1
+            if used + cost > min(allowance, remaining):
+                break
+            section.append(line)
+            used += cost
+        shown = len(section) - 1
+        if shown < len(items):
+            section.append(f"- ({len(items) - shown} more)")
+            used += 3
+        if not items:
+            section.append("- none")
+        lines.extend(section)
+        remaining -= used
+        carry = max(0, allowance - used)
+
+    return "\n".join(lines)
+
+
+class MessageAnalyzerToolInput(BaseModel):
+    """Input schema for MessageAnalyzerTool."""
+    group_id: str = Field(..., description="ID of the WhatsApp group to analyze.")
+    date: Optional[str] = Field(None, description="Day to analyze as YYYY-MM-DD (defaults to today).")
+
+
+class MessageAnalyzerTool(BaseTool):
+    name: str = "Message Analysis Digest"
+    description: str = (
+        "Returns a compact, pre-computed digest of a group's messages for one day: activity, "
+        "topics, action items with assignees and due dates, notable threads and shared links. "
+        "Use it instead of reading raw messages when writing a summary."
+    )
+    args_schema: Type[BaseModel] = MessageAnalyzerToolInput
+    knowledge_dir: str = "knowledge"
+    data_dir: str = "data"
+    token_budget: int = DEFAULT_TOKEN_BUDGET
+    cache: Optional[SummaryCache] = Field(default=None, exclude=True)
+    _analyzer: Optional[MessageAnalyzer] = PrivateAttr(default=None)
+    _storage: Optional[MessageStorage] = PrivateAttr(default=None)
+
+    def analyze(self, group_id: str, date: Optional[str] = None) -> Dict:
+        """Analysis of a group's stored messages for a day, from the cache when possible."""
+        date = date or datetime.now().strftime("%Y-%m-%d")
+        if self._analyzer is None:
+            self._analyzer = MessageAnalyzer(self.knowledge_dir)
+            self._storage = MessageStorage(self.data_dir)
+        messages = self._storage.get_messages(group_id, date)
+        if self.cache is not None:
+            return self.cache.analyze(self._analyzer, group_id, date, messages)
+        return self._analyzer.analyze_messages(messages)
+
+    def _run(self, group_id: str, date: Optional[str] = None) -> str:
+        """Build the digest for a group's day."""
+        date = date or datetime.now().strftime("%Y-%m-%d")
+        return build_digest(group_id, date, self.analyze(group_id, date), self.token_budget)
+
+
+class SummaryStorageToolInput(BaseModel):
+    """Input schema for SummaryStorageTool."""
+    operation: str = Field(..., description="Operation to perform: 'store' or 'get'")
+    group_id: str = Field(..., description="ID of the WhatsApp group.")
+    date: Optional[str] = Field(None, description="Summary day as YYYY-MM-DD (defaults to today).")
+    summary: Optional[str] = Field(
+        None,
+        description="Summary JSON with a 'summary' object holding key_discussions, activity, "
+                    "action_items, notable_interactions and resources (for 'store' operation)."
+    )
+
+
+class SummaryStorageTool(BaseTool):
+    name: str = "Summary Storage"
+    description: str = (
+        "Stores a finished daily summary as JSON and Markdown, or returns the stored Markdown "
+        "summary of a group for a day."
+    )
+    args_schema: Type[BaseModel] = SummaryStorageToolInput
+    data_dir: str = "data"
+    token_budget: int = DEFAULT_TOKEN_BUDGET
+    _storage: Optional[SummaryStorage] = PrivateAttr(default=None)
+
+    def _run(self, operation: str, group_id: str, date: Optional[str] = None,
+             summary: Optional[str] = None) -> str:
+        """Execute the summary storage operation."""
+        if self._storage is None:
+            self._storage = SummaryStorage(self.data_dir)
+        try:
+            if operation == "store" and summary:
+                data = json.loads(summary)
+                data.setdefault("group_id", group_id)
+                if date:
+                    data.setdefault("date", date)
+                paths = self._storage.store_summary(group_id, data, date)
+                return f"Summary stored successfully: {paths['markdown']}"
+            elif operation == "get":
+                markdown = self._storage.get_summary(group_id, date, format="markdown")
+                if markdown is None:
+                    return f"No summary stored for {group_id} on {date or 'today'}"
+                limit = self.token_budget * 4
+                return markdown if len(markdown) <= limit else markdown[:limit] + "\n…"
+            else:
+                raise ValueError("Invalid operation or missing parameters")
+        except Exception as e:
+            return f"Operation failed: {str(e)}"
@@ -0,0 +1,22 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, TypeVar
+
+T = TypeVar("T")
+
+
+def run_sync(coroutine: Awaitable[T]) -> T:
+    """Run a coroutine to completion from synchronous code and return its result.
+
+    Uses ``asyncio.run`` when no event loop is running in this thread. Called
+    from code that is itself running on a loop (a sync tool method invoked by
+    an async agent), where ``asyncio.run`` would raise, the coroutine runs on
+    a fresh loop in a worker thread instead and the caller blocks until it
+    is done.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
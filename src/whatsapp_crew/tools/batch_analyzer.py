@@ -0,0 +1,136 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .message_analyzer import MessageAnalyzer
+from .message_storage import MessageStorage
+from .summary_storage import SummaryStorage
+
+# Per-process analyzer and storage, created once by the pool initializer so
+# rules are loaded and compiled once per worker rather than once per group.
+_worker_analyzer: Optional[MessageAnalyzer] = None
+_worker_storage: Optional[MessageStorage] = None
+
+
+def _init_worker(base_dir: str, knowledge_dir: str) -> None:
+    """Load rules and open storage once in each worker process."""
+    global _worker_analyzer, _worker_storage
+    _worker_analyzer = MessageAnalyzer(knowledge_dir)
+    _worker_storage = MessageStorage(base_dir)
+
+
+def _analyze_chunk(jobs: Sequence[Tuple[str, str]]) -> List[Dict]:
+    """Load and analyze each (group_id, date) pair, isolating failures per group."""
+    results = []
+    for group_id, date in jobs:
+        result = {"group_id": group_id, "date": date}
+        try:
+            started = time.perf_counter()
+            messages = _worker_storage.get_messages(group_id, date)
+            loaded = time.perf_counter()
+            analysis = _worker_analyzer.analyze_messages(messages)
+            finished = time.perf_counter()
+
+            result.update({
+                "status": "ok",
+                "message_count": len(messages),
+                "load_seconds": loaded - started,
+                "analysis_seconds": finished - loaded,
+                "summary": analysis
+            })
+        except Exception as e:
+            result.update({"status": "error", "error": f"{type(e).__name__}: {e}"})
+        results.append(result)
+    return results
+
+
+def _chunks(jobs: List[Tuple[str, str]], chunk_size: int) -> Iterable[List[Tuple[str, str]]]:
+    for start in range(0, len(jobs), chunk_size):
+        yield jobs[start:start + chunk_size]
+
+
+def analyze_batch(
+    jobs: Iterable[Tuple[str, str]],
+    base_dir: str = "data",
+    knowledge_dir: str = "knowledge",
+    workers: Optional[int] = None,
+    chunk_size: int = 1,
+    summary_storage: Optional[SummaryStorage] = None
+) -> List[Dict]:
+    """Analyze many (group_id, date) pairs in parallel and store their summaries.
+
+    Messages are loaded and analyzed in a pool of ``workers`` processes
+    (defaults to the CPU count), ``chunk_size`` pairs per task. Summaries are
+    written by the calling process through ``SummaryStorage.store_summary``.
+
+    Returns one report per pair, in completion order, with its status, message
+    count, per-stage timings and stored paths, or the error that stopped it.
+    A failing group never affects the others.
+    """
+    jobs = list(jobs)
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    if summary_storage is None:
+        summary_storage = SummaryStorage(base_dir)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    reports = []
+
+    def collect(results: List[Dict]) -> None:
+        for result in results:
+            analysis = result.pop("summary", None)
+            if result["status"] == "ok":
+                started = time.perf_counter()
+                try:
+                    result["paths"] = summary_storage.store_summary(
+                        result["group_id"],
+                        {"group_id": result["group_id"], "date": result["date"], "summary": analysis},
+                        date=result["date"]
+                    )
+                    result["store_seconds"] = time.perf_counter() - started
+                except Exception as e:
+                    result.update({"status": "error", "error": f"{type(e).__name__}: {e}"})
+            reports.append(result)
+
+    if workers <= 1:
+        # Run in-process; useful for debugging and tiny batches
+        _init_worker(base_dir, knowledge_dir)
+        for chunk in _chunks(jobs, chunk_size):
+            collect(_analyze_chunk(chunk))
+        return reports
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(base_dir, knowledge_dir)
+    ) as executor:
+        futures = {executor.submit(_analyze_chunk, chunk): chunk for chunk in _chunks(jobs, chunk_size)}
+        for future in as_completed(futures):
+            try:
+                collect(future.result())
+            except Exception as e:
+                # The worker itself died; report every group of its chunk
+                collect([
+                    {"group_id": group_id, "date": date, "status": "error",
+                     "error": f"{type(e).__name__}: {e}"}
+                    for group_id, date in futures[future]
+                ])
+
+    return reports
+
+
+def format_batch_report(reports: List[Dict]) -> str:
+    """Render batch reports as a plain-text table."""
+    lines = [f"{'group':<24} {'date':<10} {'status':<6} {'msgs':>8} {'load s':>8} {'analyze s':>10}"]
+    for report in sorted(reports, key=lambda r: (r["date"], r["group_id"])):
+        if report["status"] == "ok":
+            lines.append(
+                f"{report['group_id']:<24} {report['date']:<10} ok     "
+                f"{report['message_count']:>8} {report['load_seconds']:>8.3f} "
+                f"{report['analysis_seconds']:>10.3f}"
+            )
+        else:
+            lines.append(f"{report['group_id']:<24} {report['date']:<10} error  {report['error']}")
+    return "\n".join(lines)
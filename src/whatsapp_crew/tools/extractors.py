@@ -0,0 +1,95 @@
+import re
+from datetime import date
+from typing import List, Optional
+
+# Compiled once at import time; module-level patterns are shared by every
+# analyzer in the process and rebuilt once per worker process on import.
+
+# One alternation of the action phrases. The leftmost phrase wins, and the
+# name of the group that captured tells which phrase it was.
+ACTION_PATTERN = re.compile(
+    r'(?i)\b(?:'
+    r'(?:todo|to-do|to do):?\s*(?P<todo>.+)'
+    r'|(?:action item|task):?\s*(?P<task>.+)'
+    r'|(?:please|pls|kindly)\s+(?:do|handle|take care of)\s+(?P<request>.+)'
+    r'|need\s+to\s+(?:do|handle|complete)\s+(?P<need>.+)'
+    r')'
+)
+
+# Day-first dates after "due (by|on|before)", "deadline" or "by", split into
+# parts so no second parse is needed. Separators are "/", "-" or "." and
+# must agree; years have two or four digits.
+DUE_DATE_PATTERN = re.compile(
+    r'(?i)\b(?:due\s+(?:by|on|before)?\s*|deadline:?\s*|by\s+)'
+    r'(?P<day>\d{1,2})(?P<sep>[-/.])(?P<month>\d{1,2})(?P=sep)(?P<year>\d{4}|\d{2})(?!\d)'
+)
+
+DATE_PATTERN = re.compile(
+    r'(?P<day>\d{1,2})(?P<sep>[-/.])(?P<month>\d{1,2})(?P=sep)(?P<year>\d{4}|\d{2})'
+)
+
+# Scheme, then everything up to whitespace, quotes or angle brackets
+URL_PATTERN = re.compile(r'(?i)\bhttps?://[^\s<>"\'`]+')
+
+# Sentence punctuation that ends a URL in running text
+URL_TRAILING = '.,;:!?\'"'
+
+
+def _iso_date(day: str, month: str, year: str) -> Optional[str]:
+    """``YYYY-MM-DD`` for day-first parts, or None if they are not a real date."""
+    year_number = int(year)
+    if len(year) == 2:
+        year_number += 2000
+    try:
+        return date(year_number, int(month), int(day)).isoformat()
+    except ValueError:
+        return None
+
+
+def parse_date(value: str) -> Optional[str]:
+    """Parse a day-first date (``31/12/2024``, ``31-12-24``, ``1.2.2025``) to ``YYYY-MM-DD``.
+
+    Two-digit years are read as 20xx. Returns None for anything else,
+    including impossible dates such as ``31/02/2024``.
+    """
+    match = DATE_PATTERN.fullmatch(value.strip())
+    if match is None:
+        return None
+    return _iso_date(match['day'], match['month'], match['year'])
+
+
+def extract_action(text: str) -> Optional[str]:
+    """Description of the action item in ``text``, or None.
+
+    A message yields at most one action item, taken from the leftmost
+    action phrase.
+    """
+    match = ACTION_PATTERN.search(text)
+    if match is None:
+        return None
+    return match[match.lastgroup].strip()
+
+
+def extract_due_date(text: str) -> Optional[str]:
+    """First valid due date in ``text`` as ``YYYY-MM-DD``, or None."""
+    for match in DUE_DATE_PATTERN.finditer(text):
+        due_date = _iso_date(match['day'], match['month'], match['year'])
+        if due_date:
+            return due_date
+    return None
+
+
+def _trim_url(url: str) -> str:
+    url = url.rstrip(URL_TRAILING)
+    # Keep a closing bracket only when the URL opened it, e.g. wiki/Foo_(bar)
+    for opening, closing in ('()', '[]', '{}'):
+        while url.endswith(closing) and url.count(closing) > url.count(opening):
+            url = url[:-1].rstrip(URL_TRAILING)
+    return url
+
+
+def find_urls(text: str) -> List[str]:
+    """http(s) URLs in ``text``, without trailing punctuation."""
+    if '://' not in text:
+        return []
+    return [_trim_url(url) for url in URL_PATTERN.findall(text)]
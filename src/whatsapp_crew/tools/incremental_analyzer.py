@@ -0,0 +1,179 @@
+import copy
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .analysis_pipeline import AnalysisPipeline
+from .message_analyzer import MessageAnalyzer
+
+STATE_VERSION = 2
+
+# Optional accumulator methods a section needs to be saved and merged
+STATE_METHODS = ("to_state", "load_state", "merge")
+
+
+class AnalysisState:
+    """Running analysis of one group's day that can be saved and merged."""
+
+    def __init__(self, analyzer: MessageAnalyzer, group_id: str, date: str):
+        self.analyzer = analyzer
+        self.group_id = group_id
+        self.date = date
+        self.pipeline = AnalysisPipeline(analyzer, analyzer.sections)
+        self.pipeline.require(STATE_METHODS, "incremental analysis")
+        self.messages_analyzed = 0
+        # Built on demand and kept until the state changes
+        self._summary: Optional[Dict] = None
+
+    def update(self, messages: Iterable[Dict]) -> int:
+        """Fold new messages into the state and return how many passed the filters."""
+        accepted = self.pipeline.feed(self.analyzer.iter_filtered(messages))
+        self.messages_analyzed += accepted
+        if accepted:
+            self._summary = None
+        return accepted
+
+    def merge(self, other: 'AnalysisState') -> 'AnalysisState':
+        """Append another shard of the same group and day to this state."""
+        if (other.group_id, other.date) != (self.group_id, self.date):
+            raise ValueError(
+                f"Cannot merge state for {other.group_id}/{other.date} "
+                f"into {self.group_id}/{self.date}"
+            )
+
+        for name, accumulator in self.pipeline.accumulators.items():
+            accumulator.merge(other.pipeline.accumulators[name])
+        self.messages_analyzed += other.messages_analyzed
+        self._summary = None
+        return self
+
+    def summary(self) -> Dict:
+        """Return the same dict as ``MessageAnalyzer.analyze_messages``.
+
+        The result is built once per change of the state; each call returns
+        a copy of it.
+        """
+        if self._summary is None:
+            self._summary = self.pipeline.results()
+        return copy.deepcopy(self._summary)
+
+    def to_dict(self) -> Dict:
+        """Serialise the state to JSON-compatible data."""
+        return {
+            "version": STATE_VERSION,
+            "group_id": self.group_id,
+            "date": self.date,
+            "messages_analyzed": self.messages_analyzed,
+            "sections": {
+                name: accumulator.to_state()
+                for name, accumulator in self.pipeline.accumulators.items()
+            }
+        }
+
+    @classmethod
+    def from_dict(cls, analyzer: MessageAnalyzer, data: Dict) -> 'AnalysisState':
+        """Rebuild a state produced by ``to_dict``."""
+        if data.get("version") != STATE_VERSION:
+            raise ValueError(f"Unsupported analysis state version: {data.get('version')}")
+
+        state = cls(analyzer, data["group_id"], data["date"])
+        missing = set(state.pipeline.accumulators) - set(data["sections"])
+        if missing:
+            raise ValueError(f"Analysis state is missing sections: {', '.join(sorted(missing))}")
+
+        for name, accumulator in state.pipeline.accumulators.items():
+            accumulator.load_state(data["sections"][name])
+        state.messages_analyzed = data["messages_analyzed"]
+        return state
+
+
+class IncrementalAnalyzer:
+    """Keep per-group running analyses that update in O(new messages).
+
+    Messages are fed as they arrive (for example from ``MessageStorage``
+    saves via ``attach``), and the summary can be read at any time without
+    re-analyzing the day. States are persisted under
+    ``{base_dir}/analysis/current/YYYY-MM-DD/{group_id}_state.json``.
+    """
+
+    def __init__(
+        self,
+        base_dir: str = "data",
+        knowledge_dir: str = "knowledge",
+        analyzer: Optional[MessageAnalyzer] = None
+    ):
+        self.analyzer = analyzer or MessageAnalyzer(knowledge_dir)
+        self.state_dir = Path(base_dir) / "analysis" / "current"
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        self.states: Dict[Tuple[str, str], AnalysisState] = {}
+
+    def attach(self, storage) -> None:
+        """Feed every batch saved through a ``MessageStorage`` into this analyzer."""
+        storage.add_listener(self.update)
+
+    def get_state(self, group_id: str, date: Optional[str] = None) -> AnalysisState:
+        """Return the running state for a group and day, loading it from disk if needed."""
+        if date is None:
+            date = datetime.now().strftime("%Y-%m-%d")
+
+        key = (group_id, date)
+        state = self.states.get(key)
+        if state is None:
+            state = self.load(group_id, date) or AnalysisState(self.analyzer, group_id, date)
+            self.states[key] = state
+        return state
+
+    def update(self, group_id: str, messages: List[Dict], date: Optional[str] = None) -> int:
+        """Analyze newly arrived messages for a group."""
+        return self.get_state(group_id, date).update(messages)
+
+    def summary(self, group_id: str, date: Optional[str] = None) -> Dict:
+        """Return the current summary dict for a group and day."""
+        return self.get_state(group_id, date).summary()
+
+    def merge_shards(self, states: Iterable[AnalysisState]) -> AnalysisState:
+        """Combine shard states of one group and day, in order, into a single state."""
+        states = list(states)
+        if not states:
+            raise ValueError("No analysis states to merge")
+
+        merged = AnalysisState.from_dict(self.analyzer, states[0].to_dict())
+        for state in states[1:]:
+            merged.merge(state)
+        return merged
+
+    def _state_path(self, group_id: str, date: str) -> Path:
+        return self.state_dir / date / f"{group_id}_state.json"
+
+    def save(self, group_id: str, date: Optional[str] = None) -> str:
+        """Persist the running state for a group and day."""
+        state = self.get_state(group_id, date)
+        path = self._state_path(group_id, state.date)
+        path.parent.mkdir(exist_ok=True)
+
+        # Write to a temporary file first so a crash never leaves a torn state
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(state.to_dict(), f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+        return str(path)
+
+    def save_all(self) -> List[str]:
+        """Persist every state held in memory."""
+        return [self.save(group_id, date) for group_id, date in list(self.states)]
+
+    def load(self, group_id: str, date: str) -> Optional[AnalysisState]:
+        """Load a persisted state, or return None if there is none."""
+        path = self._state_path(group_id, date)
+        if not path.exists():
+            return None
+
+        with open(path) as f:
+            return AnalysisState.from_dict(self.analyzer, json.load(f))
+
+    def evict(self, group_id: str, date: str) -> None:
+        """Drop a state from memory, e.g. once its day is over and saved."""
+        self.states.pop((group_id, date), None)
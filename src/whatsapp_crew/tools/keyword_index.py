@@ -0,0 +1,84 @@
+from collections import deque
+from typing import Dict, Hashable, Iterable, List, Set, Tuple
+
+
+class KeywordIndex:
+    """Aho–Corasick automaton for case-insensitive multi-keyword matching.
+
+    Every keyword is attached to a label. Scanning a text once returns the
+    labels of all keywords that occur in it as substrings, which is the same
+    as checking ``keyword.lower() in text.lower()`` for each keyword.
+    """
+
+    def __init__(self, keywords: Iterable[Tuple[str, Hashable]] = ()):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[frozenset] = [frozenset()]
+        self._always: Set[Hashable] = set()
+        self._built = False
+
+        for keyword, label in keywords:
+            self.add(keyword, label)
+
+    def add(self, keyword: str, label: Hashable) -> None:
+        """Register a keyword under a label."""
+        keyword = keyword.lower()
+        if not keyword:
+            # The empty string is a substring of every text
+            self._always.add(label)
+            return
+
+        node = 0
+        for char in keyword:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(frozenset())
+            node = next_node
+        self._output[node] = self._output[node] | {label}
+        self._built = False
+
+    def build(self) -> 'KeywordIndex':
+        """Compute failure links; called automatically before the first scan."""
+        queue = deque(self._goto[0].values())
+        for node in queue:
+            self._fail[node] = 0
+
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                # Inherit matches that end at the same position
+                self._output[child] = self._output[child] | self._output[self._fail[child]]
+
+        self._built = True
+        return self
+
+    def scan(self, text: str) -> Set[Hashable]:
+        """Return the labels of every keyword found in the text."""
+        if not self._built:
+            self.build()
+
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+
+        found = set(self._always)
+        node = 0
+        for char in text.lower():
+            transitions = goto[node]
+            while node and char not in transitions:
+                node = fail[node]
+                transitions = goto[node]
+            node = transitions.get(char, 0)
+            if output[node]:
+                found |= output[node]
+
+        return found
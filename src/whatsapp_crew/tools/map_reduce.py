@@ -0,0 +1,220 @@
+import asyncio
+import inspect
+import re
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Union
+
+from ..metrics import METRICS
+from .analysis_pipeline import AnalysisPipeline
+from .analysis_tools import build_digest
+from .async_utils import run_sync
+from .message_analyzer import MessageAnalyzer
+from .message_record import MessageRecord, as_records
+from .thread_index import ThreadIndex
+
+# A summarize function takes a prompt and returns the LLM's text, sync or async
+SummarizeFn = Callable[[str], Union[str, Awaitable[str]]]
+
+CHUNK_PROMPT = """You are summarizing part {part} of {parts} of the WhatsApp group {group_id} on {date} ({start}-{end} UTC).
+Pre-computed analysis of this part:
+{digest}
+
+List the key discussions of this part, one per line, formatted as:
+- <topic>: <two or three sentence summary>"""
+
+REDUCE_PROMPT = """Several parts of the WhatsApp group {group_id} on {date} discussed "{topic}".
+Partial summaries, in time order:
+{partials}
+
+Write one summary of "{topic}" for the whole day in two to four sentences."""
+
+DISCUSSION_LINE = re.compile(r'^\s*(?:[-*•]|\d+[.)])?\s*\**([^:*]{1,80}?)\**\s*:\s*(.+)$')
+
+
+def chunk_by_window(
+    records: List[MessageRecord],
+    window_minutes: int = 60,
+    max_messages: int = 500
+) -> List[List[MessageRecord]]:
+    """Split time-ordered records into fixed time windows of at most ``max_messages``."""
+    window = window_minutes * 60
+    chunks: List[List[MessageRecord]] = []
+    current_window = None
+    for record in records:
+        slot = int(record.timestamp // window)
+        if slot != current_window or len(chunks[-1]) >= max_messages:
+            chunks.append([])
+            current_window = slot
+        chunks[-1].append(record)
+    return chunks
+
+
+def chunk_by_thread(records: List[MessageRecord], max_messages: int = 500) -> List[List[MessageRecord]]:
+    """Pack whole reply trees (via ``quoted_message_id``) into chunks of up to ``max_messages``.
+
+    Trees are packed in order of their first message. A tree larger than
+    ``max_messages`` is split into consecutive pieces.
+    """
+    index = ThreadIndex()
+    for record in records:
+        index.add_record(record)
+    roots = index.roots()
+    threads: Dict[Union[str, int], List[MessageRecord]] = {}
+    for record in records:
+        # Messages without an id join the tree they quote, or stand alone
+        root = roots.get(record.message_id) or roots.get(record.quoted_message_id) or id(record)
+        threads.setdefault(root, []).append(record)
+
+    chunks: List[List[MessageRecord]] = [[]]
+    for thread in threads.values():  # Insertion order is the order of first messages
+        if chunks[-1] and len(chunks[-1]) + len(thread) > max_messages:
+            chunks.append([])
+        for start in range(0, len(thread), max_messages):
+            if len(chunks[-1]) >= max_messages:
+                chunks.append([])
+            chunks[-1].extend(thread[start:start + max_messages])
+    return [sorted(chunk, key=lambda record: record.timestamp) for chunk in chunks if chunk]
+
+
+def parse_discussions(text: str) -> List[Dict]:
+    """Read ``- topic: summary`` lines from LLM output; other text becomes one general entry."""
+    discussions = []
+    for line in text.splitlines():
+        match = DISCUSSION_LINE.match(line)
+        if match:
+            discussions.append({'topic': match.group(1).strip(), 'content': match.group(2).strip()})
+    if not discussions and text.strip():
+        discussions.append({'topic': 'General', 'content': text.strip()})
+    return discussions
+
+
+class MapReduceSummarizer:
+    """Summarize a large day of messages as concurrent chunk summaries plus a reduce step.
+
+    Map: the day is split into chunks by time window or by reply thread.
+    Every chunk is analysed deterministically and its digest (never the raw
+    messages) is sent to ``summarize``. At most ``max_workers`` calls run at
+    once, so latency grows with chunks / workers rather than with the size
+    of the day.
+
+    Reduce: the chunks' analysis accumulators are merged, which gives exactly
+    the activity, action items, interactions and resources of a single pass
+    over the day in time order (with thread chunking, the same items listed
+    thread by thread).
+    Chunk discussions are grouped by topic, and topics reported by several
+    chunks are condensed with one more ``summarize`` call each. The result
+    has the ``SummaryStorage`` schema.
+
+    ``summarize`` may be a plain or a coroutine function, so any local fake
+    can stand in for the LLM.
+    """
+
+    def __init__(
+        self,
+        analyzer: MessageAnalyzer,
+        summarize: SummarizeFn,
+        max_workers: int = 4,
+        chunking: str = "window",
+        window_minutes: int = 60,
+        max_chunk_messages: int = 500,
+        chunk_token_budget: int = 600
+    ):
+        if chunking not in ("window", "thread"):
+            raise ValueError(f"Unknown chunking {chunking!r}; use 'window' or 'thread'")
+        self.analyzer = analyzer
+        self.summarize = summarize
+        self.max_workers = max_workers
+        self.chunking = chunking
+        self.window_minutes = window_minutes
+        self.max_chunk_messages = max_chunk_messages
+        self.chunk_token_budget = chunk_token_budget
+
+    def chunk(self, messages: Iterable[Union[Dict, MessageRecord]]) -> List[List[MessageRecord]]:
+        records = sorted(as_records(messages), key=lambda record: record.timestamp)
+        if self.chunking == "thread":
+            return chunk_by_thread(records, self.max_chunk_messages)
+        return chunk_by_window(records, self.window_minutes, self.max_chunk_messages)
+
+    async def _call(self, prompt: str, slots: asyncio.Semaphore, stats: Dict) -> str:
+        async with slots:
+            stats["llm_calls"] += 1
+            with METRICS.timer("llm_call_seconds", stage="map_reduce"):
+                if inspect.iscoroutinefunction(self.summarize):
+                    return await self.summarize(prompt)
+                return await asyncio.to_thread(self.summarize, prompt)
+
+    async def _map(self, group_id: str, date: str, chunks: List[List[MessageRecord]],
+                   slots: asyncio.Semaphore, stats: Dict):
+        pipelines = []
+        prompts = []
+        for part, chunk in enumerate(chunks, 1):
+            pipeline = AnalysisPipeline(self.analyzer, self.analyzer.sections)
+            pipeline.feed(self.analyzer.iter_filtered(chunk))
+            pipelines.append(pipeline)
+            prompts.append(CHUNK_PROMPT.format(
+                part=part, parts=len(chunks), group_id=group_id, date=date,
+                start=datetime.fromtimestamp(chunk[0].timestamp, timezone.utc).strftime("%H:%M"),
+                end=datetime.fromtimestamp(chunk[-1].timestamp, timezone.utc).strftime("%H:%M"),
+                digest=build_digest(group_id, date, pipeline.results(), self.chunk_token_budget)
+            ))
+        outputs = await asyncio.gather(*(self._call(prompt, slots, stats) for prompt in prompts))
+        return pipelines, outputs
+
+    async def _reduce_discussions(self, group_id: str, date: str, outputs: List[str],
+                                  slots: asyncio.Semaphore, stats: Dict) -> List[Dict]:
+        by_topic: Dict[str, Dict] = {}
+        for output in outputs:
+            for discussion in parse_discussions(output):
+                entry = by_topic.setdefault(discussion['topic'].lower(), {
+                    'topic': discussion['topic'], 'partials': []
+                })
+                entry['partials'].append(discussion['content'])
+
+        async def condense(entry: Dict) -> Dict:
+            if len(entry['partials']) == 1:
+                return {'topic': entry['topic'], 'content': entry['partials'][0]}
+            content = await self._call(REDUCE_PROMPT.format(
+                group_id=group_id, date=date, topic=entry['topic'],
+                partials="\n".join(f"- {partial}" for partial in entry['partials'])
+            ), slots, stats)
+            return {'topic': entry['topic'], 'content': content.strip()}
+
+        return list(await asyncio.gather(*(condense(entry) for entry in by_topic.values())))
+
+    async def summarize_async(
+        self,
+        group_id: str,
+        date: str,
+        messages: Iterable[Union[Dict, MessageRecord]]
+    ) -> Dict:
+        """Summarize a group's day; returns ``{'group_id', 'date', 'summary'}`` for ``SummaryStorage``.
+
+        The result also carries this run's ``stats``: the number of chunks
+        and of LLM calls made.
+        """
+        # Checked before any LLM call is made
+        merged = AnalysisPipeline(self.analyzer, self.analyzer.sections)
+        merged.require(("merge",), "map-reduce summarization")
+
+        chunks = self.chunk(messages)
+        stats = {"chunks": len(chunks), "llm_calls": 0}
+        slots = asyncio.Semaphore(self.max_workers)
+
+        pipelines, outputs = await self._map(group_id, date, chunks, slots, stats)
+        for pipeline in pipelines:
+            for name, accumulator in merged.accumulators.items():
+                accumulator.merge(pipeline.accumulators[name])
+
+        summary = merged.results()
+        if outputs:
+            summary['key_discussions'] = await self._reduce_discussions(group_id, date, outputs, slots, stats)
+        return {'group_id': group_id, 'date': date, 'summary': summary, 'stats': stats}
+
+    def summarize_day(
+        self,
+        group_id: str,
+        date: str,
+        messages: Iterable[Union[Dict, MessageRecord]]
+    ) -> Dict:
+        """Blocking wrapper around ``summarize_async``; also safe to call from a running event loop."""
+        return run_sync(self.summarize_async(group_id, date, messages))
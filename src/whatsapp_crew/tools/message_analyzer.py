@@ -1,16 +1,28 @@
-import re
 import yaml
-from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Type, Union
+
+from ..metrics import METRICS
+from .analysis_pipeline import DEFAULT_SECTIONS, AnalysisPipeline, SectionAccumulator
+from .extractors import extract_action, extract_due_date, find_urls
+from .keyword_index import KeywordIndex
+from .message_filter import MessageFilter
+from .message_record import MessageRecord, as_records
 
 class MessageAnalyzer:
-    """Tool for analyzing and processing WhatsApp messages."""
+    """Tool for analyzing and processing WhatsApp messages.
+    
+    ``max_interactions`` caps how many threads ``notable_interactions`` lists.
+    """
     
-    def __init__(self, knowledge_dir: str = "knowledge"):
+    def __init__(self, knowledge_dir: str = "knowledge", max_interactions: int = 10):
         self.knowledge_dir = Path(knowledge_dir)
+        self.max_interactions = max_interactions
         self.filters = self._load_filters()
         self.topics = self._load_topics()
+        self.message_filter = MessageFilter(self.filters)
+        self.keyword_index = self._build_keyword_index()
+        self.sections = dict(DEFAULT_SECTIONS)
     
     def _load_filters(self) -> Dict:
         """Load message filtering rules."""
@@ -22,205 +34,161 @@ class MessageAnalyzer:
         with open(self.knowledge_dir / "patterns/topics.yaml") as f:
             return yaml.safe_load(f)
     
-    def analyze_messages(self, messages: List[Dict]) -> Dict:
-        """Analyze a batch of messages and extract insights."""
-        # Filter messages
-        filtered_messages = self._filter_messages(messages)
+    def _build_keyword_index(self) -> KeywordIndex:
+        """Index topic keywords and priority markers for single-scan matching."""
+        index = KeywordIndex()
+        for position, topic in enumerate(self.topics['topics']):
+            for keyword in topic['keywords']:
+                index.add(keyword, ('topic', position))
         
-        # Analyze content
-        topics = self._classify_topics(filtered_messages)
-        activity = self._analyze_activity(filtered_messages)
-        actions = self._extract_action_items(filtered_messages)
-        interactions = self._analyze_interactions(filtered_messages)
-        resources = self._extract_resources(filtered_messages)
+        for keyword in self.topics.get('priority_indicators') or []:
+            index.add(keyword, ('priority', None))
+        
+        for tier, keywords in (self.filters.get('priority_rules') or {}).items():
+            for keyword in keywords:
+                index.add(keyword, ('priority_rule', tier))
+        
+        return index.build()
+    
+    def classify_message(self, message: Union[Dict, MessageRecord]) -> Dict:
+        """Match topics and priority markers of a single message in one scan."""
+        text = message.text if isinstance(message, MessageRecord) else message['content']['text']
+        return self._match_keywords(text)
+    
+    def _match_keywords(self, text: str) -> Dict:
+        """Scan text once and report matched topics, priority and priority tier."""
+        labels = self.keyword_index.scan(text)
+        topic_positions = sorted(value for kind, value in labels if kind == 'topic')
+        tiers = {value for kind, value in labels if kind == 'priority_rule'}
+        
+        # Tiers are listed from most to least urgent in filters.yaml
+        priority_tier = next(
+            (tier for tier in (self.filters.get('priority_rules') or {}) if tier in tiers),
+            None
+        )
         
         return {
-            "key_discussions": topics,
-            "activity": activity,
-            "action_items": actions,
-            "notable_interactions": interactions,
-            "resources": resources
+            'topics': [self.topics['topics'][position]['name'] for position in topic_positions],
+            'priority': ('priority', None) in labels,
+            'priority_tier': priority_tier
         }
     
-    def _filter_messages(self, messages: List[Dict]) -> List[Dict]:
-        """Apply filtering rules to messages."""
-        filtered = []
+    def register_section(self, name: str, accumulator: Type[SectionAccumulator]) -> None:
+        """Add or replace a summary section computed by the analysis pipeline."""
+        self.sections[name] = accumulator
+    
+    @METRICS.timed("analyzer_stage_seconds", stage="analyze_messages")
+    def analyze_messages(
+        self,
+        messages: Iterable[Union[Dict, MessageRecord]],
+        sections: Optional[Sequence[str]] = None,
+        fused: bool = True
+    ) -> Dict:
+        """Analyze a batch of messages and extract insights.
+        
+        Messages may be stored dicts or ``MessageRecord`` objects; dicts are
+        converted to records once, before filtering. By default filtering and
+        every requested section run in a single pass over the messages, so
+        ``messages`` may be a lazy stream such as ``MessageStorage.iter_messages``
+        and is never held in memory as a whole. With ``fused=False`` the
+        filtered messages are materialized and each section makes its own pass.
+        """
+        if fused:
+            pipeline = AnalysisPipeline(self, self.sections, sections)
+            return pipeline.run(self.iter_filtered(messages))
         
-        for msg in messages:
-            text = msg['content']['text']
-            
-            # Check exclude patterns
-            if any(re.match(pattern, text) for pattern in self.filters['exclude_patterns']):
-                continue
-            
-            # Check include patterns
-            if any(re.match(pattern, text) for pattern in self.filters['include_patterns']):
-                filtered.append(msg)
-                continue
-            
-            # Include messages with substantial content
-            if len(text.split()) > 3:  # Messages with more than 3 words
-                filtered.append(msg)
+        # Filter messages
+        filtered_messages = self._filter_messages(messages)
         
-        return filtered
+        # Analyze content
+        names = AnalysisPipeline(self, self.sections, sections).accumulators
+        return {name: self._run_section(name, filtered_messages) for name in names}
+    
+    def _run_section(self, name: str, messages: Iterable[Dict]):
+        """Compute a single summary section in its own pass."""
+        return AnalysisPipeline(self, self.sections, [name]).run(messages)[name]
     
+    def iter_filtered(self, messages: Iterable[Union[Dict, MessageRecord]]) -> Iterator[MessageRecord]:
+        """Lazily yield the messages that pass the filters, as records."""
+        accepts = self.message_filter.accepts
+        for record in as_records(messages):
+            if accepts(record.text):
+                yield record
+    
+    @METRICS.timed("analyzer_stage_seconds", stage="filter_messages")
+    def _filter_messages(self, messages: Iterable[Union[Dict, MessageRecord]]) -> List[MessageRecord]:
+        """Apply filtering rules to messages."""
+        return list(self.iter_filtered(messages))
+    
+    @METRICS.timed("analyzer_stage_seconds", stage="classify_topics")
     def _classify_topics(self, messages: List[Dict]) -> List[Dict]:
         """Classify messages into topics."""
-        topics = {}
-        
-        for msg in messages:
-            text = msg['content']['text'].lower()
-            
-            # Check each topic's keywords
-            for topic in self.topics['topics']:
-                if any(keyword.lower() in text for keyword in topic['keywords']):
-                    if topic['name'] not in topics:
-                        topics[topic['name']] = {
-                            'content': [],
-                            'participants': set()
-                        }
-                    topics[topic['name']]['content'].append(msg['content']['text'])
-                    topics[topic['name']]['participants'].add(msg['sender']['name'])
-        
-        # Format topics for output
-        return [
-            {
-                'topic': topic_name,
-                'content': ' | '.join(data['content']),
-                'participants': list(data['participants'])
-            }
-            for topic_name, data in topics.items()
-        ]
+        return self._run_section('key_discussions', messages)
     
+    @METRICS.timed("analyzer_stage_seconds", stage="analyze_activity")
     def _analyze_activity(self, messages: List[Dict]) -> Dict:
         """Analyze message activity patterns."""
-        if not messages:
-            return {
-                'total_messages': 0,
-                'active_participants': 0,
-                'peak_time': '00:00'
-            }
-        
-        # Count messages by hour
-        hour_counts = {}
-        participants = set()
-        
-        for msg in messages:
-            timestamp = datetime.fromtimestamp(int(msg['timestamp']))
-            hour = timestamp.strftime('%H:00')
-            hour_counts[hour] = hour_counts.get(hour, 0) + 1
-            participants.add(msg['sender']['name'])
-        
-        # Find peak hour
-        peak_time = max(hour_counts.items(), key=lambda x: x[1])[0]
-        
-        return {
-            'total_messages': len(messages),
-            'active_participants': len(participants),
-            'peak_time': peak_time
-        }
+        return self._run_section('activity', messages)
     
+    @METRICS.timed("analyzer_stage_seconds", stage="extract_action_items")
     def _extract_action_items(self, messages: List[Dict]) -> List[Dict]:
         """Extract action items from messages."""
-        action_items = []
-        action_patterns = [
-            r'(?i)(?:todo|to-do|to do):?\s*(.+)',
-            r'(?i)(?:action item|task):?\s*(.+)',
-            r'(?i)(?:please|pls|kindly)\s+(?:do|handle|take care of)\s+(.+)',
-            r'(?i)need\s+to\s+(?:do|handle|complete)\s+(.+)'
-        ]
-        
-        for msg in messages:
-            text = msg['content']['text']
-            
-            for pattern in action_patterns:
-                match = re.search(pattern, text)
-                if match:
-                    action = {
-                        'description': match.group(1).strip(),
-                        'assigned_to': self._extract_mentions(msg),
-                    }
-                    
-                    # Try to extract due date if present
-                    due_date = self._extract_due_date(text)
-                    if due_date:
-                        action['due_date'] = due_date
-                    
-                    action_items.append(action)
-        
-        return action_items
+        return self._run_section('action_items', messages)
     
+    @METRICS.timed("analyzer_stage_seconds", stage="analyze_interactions")
     def _analyze_interactions(self, messages: List[Dict]) -> List[Dict]:
         """Analyze notable interactions between participants."""
-        interactions = []
-        
-        # Group messages by thread (quoted messages)
-        threads = {}
-        for msg in messages:
-            quoted_id = msg['metadata']['quoted_message_id']
-            if quoted_id:
-                if quoted_id not in threads:
-                    threads[quoted_id] = []
-                threads[quoted_id].append(msg)
-        
-        # Analyze significant threads
-        for thread_msgs in threads.values():
-            if len(thread_msgs) >= 3:  # Threads with 3+ replies
-                participants = {msg['sender']['name'] for msg in thread_msgs}
-                if len(participants) >= 2:  # Interactions between 2+ people
-                    interactions.append({
-                        'description': thread_msgs[0]['content']['text'][:100] + '...',
-                        'participants': list(participants)
-                    })
-        
-        return interactions
+        return self._run_section('notable_interactions', messages)
     
+    @METRICS.timed("analyzer_stage_seconds", stage="extract_resources")
     def _extract_resources(self, messages: List[Dict]) -> List[Dict]:
         """Extract shared resources and links."""
+        return self._run_section('resources', messages)
+    
+    def _message_action_items(self, msg: MessageRecord, text: str) -> List[Dict]:
+        """Extract the action item, if any, from a single message."""
+        description = extract_action(text)
+        if description is None:
+            return []
+        
+        action = {
+            'description': description,
+            'assigned_to': self._extract_mentions(msg),
+        }
+        
+        # Try to extract due date if present
+        due_date = self._extract_due_date(text)
+        if due_date:
+            action['due_date'] = due_date
+        
+        return [action]
+    
+    def _message_resources(self, msg: MessageRecord, text: str) -> List[Dict]:
+        """Extract shared links and media from a single message."""
         resources = []
-        url_pattern = r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+'
         
-        for msg in messages:
-            # Extract URLs
-            urls = re.findall(url_pattern, msg['content']['text'])
-            for url in urls:
-                resources.append({
-                    'type': 'link',
-                    'url': url,
-                    'description': msg['content']['text'][:50] + '...'
-                })
-            
-            # Add media resources
-            if msg['content'].get('media_url'):
-                resources.append({
-                    'type': msg['content']['type'],
-                    'url': msg['content']['media_url'],
-                    'description': msg['content'].get('caption', 'Shared media')
-                })
+        # Extract URLs
+        for url in find_urls(text):
+            resources.append({
+                'type': 'link',
+                'url': url,
+                'description': text[:50] + '...'
+            })
+        
+        # Add media resources
+        if msg.media_url:
+            resources.append({
+                'type': msg.content_type,
+                'url': msg.media_url,
+                'description': msg.caption or 'Shared media'
+            })
         
         return resources
     
-    def _extract_mentions(self, message: Dict) -> List[str]:
+    def _extract_mentions(self, message: MessageRecord) -> List[str]:
         """Extract mentioned users from a message."""
-        return [mention['name'] for mention in message['metadata']['mentions']]
+        return list(message.mentions)
     
     def _extract_due_date(self, text: str) -> Optional[str]:
         """Extract due date from message text."""
-        date_patterns = [
-            r'(?i)due\s+(?:by|on|before)?\s*(\d{1,2}[-/]\d{1,2}[-/]\d{2,4})',
-            r'(?i)deadline:?\s*(\d{1,2}[-/]\d{1,2}[-/]\d{2,4})',
-            r'(?i)by\s+(\d{1,2}[-/]\d{1,2}[-/]\d{2,4})'
-        ]
-        
-        for pattern in date_patterns:
-            match = re.search(pattern, text)
-            if match:
-                try:
-                    # Try to parse and standardize the date
-                    date_str = match.group(1)
-                    date = datetime.strptime(date_str, '%d/%m/%Y')
-                    return date.strftime('%Y-%m-%d')
-                except ValueError:
-                    continue
-        
-        return None 
\ No newline at end of file
+        return extract_due_date(text)
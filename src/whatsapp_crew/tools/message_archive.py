@@ -0,0 +1,231 @@
+import gzip
+import json
+import os
+from contextlib import contextmanager
+from datetime import datetime
+from functools import partial
+from itertools import groupby
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .message_log import merge_sources, message_timestamp
+
+INDEX_FILENAME = "index.json"
+
+
+class MessageArchive:
+    """Compressed, chunked monthly archive of messages.
+
+    Each month directory holds one ``{group_id}.jsonl.gz`` per group, made of
+    independently compressed gzip members ("chunks") of at most
+    ``chunk_size`` messages from a single day, sorted by timestamp. The
+    month's ``index.json`` records every chunk's byte offset, length, day and
+    timestamp range, so reads decompress only the chunks they need.
+
+    Inside ``batch()``, index updates are held in memory and each changed
+    month's index is written once when the block ends.
+    """
+
+    def __init__(self, archive_dir: Path, chunk_size: int = 2000, compresslevel: int = 6):
+        self.archive_dir = Path(archive_dir)
+        self.chunk_size = chunk_size
+        self.compresslevel = compresslevel
+        self._pending: Optional[Dict[Path, Dict[str, List[Dict]]]] = None
+
+    def _month_dir(self, date: str) -> Path:
+        return self.archive_dir / date[:7]
+
+    def read_index(self, month_dir: Path) -> Dict[str, List[Dict]]:
+        """Return ``{group_id: [chunk, ...]}`` for a month directory."""
+        if self._pending is not None and month_dir in self._pending:
+            return self._pending[month_dir]
+        path = month_dir / INDEX_FILENAME
+        if not path.exists():
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def _write_index(self, month_dir: Path, index: Dict[str, List[Dict]]) -> None:
+        path = month_dir / INDEX_FILENAME
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Write each changed month index once, when the block ends, instead of once per day.
+
+        Chunks appended inside the block become visible to other readers
+        only when it ends, so callers must not remove their sources before.
+        """
+        if self._pending is not None:
+            yield  # Nested: the outer batch writes
+            return
+        self._pending = {}
+        try:
+            yield
+        finally:
+            # Appended chunks are complete and synced, so their index is written even on error
+            pending, self._pending = self._pending, None
+            for month_dir, index in pending.items():
+                self._write_index(month_dir, index)
+
+    def has_day(self, group_id: str, date: str) -> bool:
+        """Whether a group's day has already been archived."""
+        chunks = self.read_index(self._month_dir(date)).get(group_id, [])
+        return any(chunk["date"] == date for chunk in chunks)
+
+    @staticmethod
+    def _identity(msg: Dict) -> str:
+        message_id = msg.get("message_id")
+        if message_id is not None:
+            return str(message_id)
+        return json.dumps(msg, sort_keys=True, separators=(",", ":"))
+
+    def append_day(self, group_id: str, date: str, messages: List[Dict]) -> Optional[str]:
+        """Compress one group's day into chunks and append them to the month file.
+
+        If the day is already archived (a repeated, interrupted run, or legacy
+        files whose messages fall on a day archived from another source), only
+        the messages not yet in its chunks are appended, as further chunks of
+        that day. Returns the archive file path once every message is in the
+        archive, or None if there was nothing to archive.
+        """
+        if not messages:
+            return None
+
+        month_dir = self._month_dir(date)
+        month_dir.mkdir(parents=True, exist_ok=True)
+        path = month_dir / f"{group_id}.jsonl.gz"
+
+        index = self.read_index(month_dir)
+        chunks = index.setdefault(group_id, [])
+        archived = [chunk for chunk in chunks if chunk["date"] == date]
+        if archived:
+            known = {
+                self._identity(msg)
+                for chunk in archived
+                for msg in self._read_chunk(path, chunk, None, None)
+            }
+            messages = [msg for msg in messages if self._identity(msg) not in known]
+            if not messages:
+                return str(path)
+
+        ordered = sorted(messages, key=message_timestamp)
+        with open(path, "ab") as f:
+            for start in range(0, len(ordered), self.chunk_size):
+                chunk = ordered[start:start + self.chunk_size]
+                payload = gzip.compress(
+                    "".join(
+                        json.dumps(msg, ensure_ascii=False, separators=(",", ":")) + "\n"
+                        for msg in chunk
+                    ).encode("utf-8"),
+                    compresslevel=self.compresslevel
+                )
+                offset = f.tell()
+                f.write(payload)
+                chunks.append({
+                    "date": date,
+                    "offset": offset,
+                    "length": len(payload),
+                    "count": len(chunk),
+                    "min_ts": message_timestamp(chunk[0]),
+                    "max_ts": message_timestamp(chunk[-1])
+                })
+            f.flush()
+            os.fsync(f.fileno())
+
+        # Chunks only become visible once the index naming them is written
+        if self._pending is not None:
+            self._pending[month_dir] = index
+        else:
+            self._write_index(month_dir, index)
+        return str(path)
+
+    def _chunks(
+        self,
+        group_id: str,
+        start_date: str,
+        end_date: str,
+        start: Optional[float],
+        end: Optional[float]
+    ) -> List[Tuple[Path, Dict]]:
+        """Return ``(archive file, chunk)`` for every chunk that may hold matching messages."""
+        if not self.archive_dir.exists():
+            return []
+
+        selected = []
+        months = sorted(
+            month_dir for month_dir in self.archive_dir.iterdir()
+            if month_dir.is_dir() and start_date[:7] <= month_dir.name <= end_date[:7]
+        )
+        for month_dir in months:
+            chunks = [
+                chunk for chunk in self.read_index(month_dir).get(group_id, [])
+                if start_date <= chunk["date"] <= end_date
+                and (start is None or chunk["max_ts"] >= start)
+                and (end is None or chunk["min_ts"] < end)
+            ]
+            path = month_dir / f"{group_id}.jsonl.gz"
+            selected.extend((path, chunk) for chunk in sorted(chunks, key=lambda c: (c["date"], c["min_ts"])))
+        return selected
+
+    @staticmethod
+    def _read_chunk(path: Path, chunk: Dict, start: Optional[float], end: Optional[float]) -> List[Dict]:
+        with open(path, "rb") as f:
+            f.seek(chunk["offset"])
+            data = gzip.decompress(f.read(chunk["length"]))
+
+        messages = []
+        for line in data.splitlines():
+            msg = json.loads(line)
+            if start is not None or end is not None:
+                timestamp = message_timestamp(msg)
+                if (start is not None and timestamp < start) or (end is not None and timestamp >= end):
+                    continue
+            messages.append(msg)
+        return messages
+
+    def iter_messages(
+        self,
+        group_id: str,
+        start_date: str,
+        end_date: str,
+        start: Optional[float] = None,
+        end: Optional[float] = None
+    ) -> Iterator[Dict]:
+        """Stream archived messages of a group for ``start_date <= day <= end_date``.
+
+        ``start`` and ``end`` (epoch seconds) further restrict messages to
+        ``[start, end)``. Messages come out day by day, in timestamp order
+        within each day; chunks are decompressed only as the stream reaches them.
+        """
+        chunks = self._chunks(group_id, start_date, end_date, start, end)
+        for _, day_chunks in groupby(chunks, key=lambda item: item[1]["date"]):
+            # A day merged into later may have chunks with overlapping ranges
+            yield from merge_sources([
+                (chunk["min_ts"], partial(self._read_chunk, path, chunk, start, end))
+                for path, chunk in day_chunks
+            ])
+
+    def sources(
+        self,
+        group_id: str,
+        start_date: str,
+        end_date: str,
+        start: Optional[float] = None,
+        end: Optional[float] = None
+    ) -> List[Tuple[float, Callable[[], List[Dict]]]]:
+        """Return ``(lowest timestamp, loader)`` pairs for reading chunks lazily."""
+        return [
+            (chunk["min_ts"], partial(self._read_chunk, path, chunk, start, end))
+            for path, chunk in self._chunks(group_id, start_date, end_date, start, end)
+        ]
+
+    @staticmethod
+    def day_of(msg: Dict) -> str:
+        """Local calendar day of a message's timestamp."""
+        return datetime.fromtimestamp(message_timestamp(msg)).strftime("%Y-%m-%d")
@@ -0,0 +1,92 @@
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Set, Tuple
+
+
+def unique_messages(messages: Iterable[Dict]) -> List[Dict]:
+    """Drop repeated message ids, keeping the first occurrence and message order."""
+    seen = set()
+    unique = []
+    for msg in messages:
+        message_id = msg.get('message_id')
+        if message_id is not None:
+            if message_id in seen:
+                continue
+            seen.add(message_id)
+        unique.append(msg)
+    return unique
+
+
+class MessageIdIndex:
+    """Persisted per-group, per-day sets of ingested message ids.
+
+    Ids are appended to ``{day_dir}/{group_id}.ids`` as they are stored, so the
+    structure for a day lives and is archived with that day's messages and
+    never grows with total history. Only the ``max_cached`` most recently used
+    (group, day) sets are held in memory.
+    """
+
+    def __init__(self, current_dir: Path, lookback_days: int = 1, max_cached: int = 64):
+        self.current_dir = Path(current_dir)
+        self.lookback_days = lookback_days
+        self.max_cached = max_cached
+        self._cache: 'OrderedDict[Tuple[str, str], Set[str]]' = OrderedDict()
+
+    def _path(self, group_id: str, date: str) -> Path:
+        return self.current_dir / date / f"{group_id}.ids"
+
+    def _ids(self, group_id: str, date: str) -> Set[str]:
+        key = (group_id, date)
+        ids = self._cache.get(key)
+        if ids is not None:
+            self._cache.move_to_end(key)
+            return ids
+
+        ids = set()
+        path = self._path(group_id, date)
+        if path.exists():
+            with open(path) as f:
+                ids.update(line.rstrip("\n") for line in f if line.strip())
+
+        self._cache[key] = ids
+        if len(self._cache) > self.max_cached:
+            self._cache.popitem(last=False)
+        return ids
+
+    def _dates(self, date: str) -> List[str]:
+        """The ingest day plus the preceding days a retried page may overlap."""
+        day = datetime.strptime(date, "%Y-%m-%d")
+        return [(day - timedelta(days=offset)).strftime("%Y-%m-%d") for offset in range(self.lookback_days + 1)]
+
+    def filter_new(self, group_id: str, date: str, messages: List[Dict]) -> List[Dict]:
+        """Return only messages whose ids were not ingested before (or earlier in the batch)."""
+        known = [self._ids(group_id, day) for day in self._dates(date)]
+        batch = set()
+        new = []
+        for msg in messages:
+            message_id = msg.get('message_id')
+            if message_id is not None:
+                message_id = str(message_id)
+                if message_id in batch or any(message_id in ids for ids in known):
+                    continue
+                batch.add(message_id)
+            new.append(msg)
+        return new
+
+    def record(self, group_id: str, date: str, messages: List[Dict]) -> None:
+        """Remember the ids of messages that were stored."""
+        new_ids = [str(msg['message_id']) for msg in messages if msg.get('message_id') is not None]
+        if not new_ids:
+            return
+
+        path = self._path(group_id, date)
+        path.parent.mkdir(exist_ok=True)
+        with open(path, 'a') as f:
+            f.write("".join(f"{message_id}\n" for message_id in new_ids))
+        self._ids(group_id, date).update(new_ids)
+
+    def forget(self, date: str) -> None:
+        """Drop cached sets for a day, e.g. once it has been archived."""
+        for key in [key for key in self._cache if key[1] == date]:
+            del self._cache[key]
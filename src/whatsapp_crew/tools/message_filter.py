@@ -0,0 +1,71 @@
+import re
+from typing import Dict, Iterable, Iterator, List, Pattern, Sequence
+
+# Backreferences and named-group references depend on group numbering and
+# cannot be merged into a single alternation without rewriting them.
+_GROUP_REFERENCE = re.compile(r'\\[1-9]|\(\?P=')
+_GLOBAL_FLAGS = re.compile(r'\(\?[aiLmsux]+\)')
+
+
+def compile_alternation(patterns: Sequence[str]) -> List[Pattern]:
+    """Compile a list of patterns into as few regex objects as possible.
+
+    Patterns are combined into one ``(?:p1)|(?:p2)|...`` alternation, which
+    matches at the start of a string exactly when one of the individual
+    patterns would. Patterns that cannot be combined safely (group references,
+    inline global flags) are compiled on their own.
+    """
+    combinable = []
+    standalone = []
+    for pattern in patterns:
+        if _GROUP_REFERENCE.search(pattern) or _GLOBAL_FLAGS.match(pattern):
+            standalone.append(pattern)
+        else:
+            combinable.append(pattern)
+
+    compiled = []
+    if combinable:
+        try:
+            compiled.append(re.compile('|'.join(f'(?:{p})' for p in combinable)))
+        except re.error:
+            standalone = combinable + standalone
+    compiled.extend(re.compile(p) for p in standalone)
+    return compiled
+
+
+class MessageFilter:
+    """Precompiled message filtering rules from ``filters.yaml``.
+
+    Built once when the rules are loaded and reused for every batch. Produces
+    the same decisions as matching each rule with ``re.match`` in turn.
+    """
+
+    def __init__(self, filters: Dict, min_words: int = 4):
+        self.exclude = compile_alternation(filters.get('exclude_patterns') or [])
+        self.include = compile_alternation(filters.get('include_patterns') or [])
+        self.min_words = min_words
+
+    def accepts(self, text: str) -> bool:
+        """Return True if a message with this text should be kept."""
+        for pattern in self.exclude:
+            if pattern.match(text):
+                return False
+
+        for pattern in self.include:
+            if pattern.match(text):
+                return True
+
+        # Include messages with substantial content; splitting stops as soon
+        # as enough words have been seen.
+        return len(text.split(None, self.min_words - 1)) >= self.min_words
+
+    def iter_filter(self, messages: Iterable[Dict]) -> Iterator[Dict]:
+        """Lazily yield the messages that pass the filter."""
+        accepts = self.accepts
+        for msg in messages:
+            if accepts(msg['content']['text']):
+                yield msg
+
+    def filter(self, messages: Iterable[Dict]) -> List[Dict]:
+        """Classify a whole batch in one pass and return the kept messages."""
+        return list(self.iter_filter(messages))
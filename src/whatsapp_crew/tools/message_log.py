@@ -0,0 +1,226 @@
+import heapq
+import json
+import os
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+
+def message_timestamp(message: Dict) -> float:
+    """Return a message's timestamp as epoch seconds.
+
+    Stored timestamps are epoch seconds (as str or number) from the API, but
+    ISO-8601 strings are accepted too.
+    """
+    value = message['timestamp']
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def to_epoch(value: Union[datetime, float, int, None]) -> Optional[float]:
+    """Normalise a range bound to epoch seconds."""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    return value.timestamp()
+
+
+def _open_for_append(path: Path):
+    """Open a line-oriented file for appending, terminating any torn last line."""
+    f = open(path, "a+b")
+    if f.seek(0, os.SEEK_END) > 0:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b"\n":
+            f.write(b"\n")
+    return f
+
+
+class MessageLog:
+    """Append-only JSON Lines log of one group's messages for one day.
+
+    Every append writes its messages as compact JSON lines and records one
+    block in a sidecar index (``.idx``) with the byte offset, length, message
+    count and timestamp range. Range reads use the index to seek straight to
+    the blocks that can contain matching messages.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.index_path = self.path.with_suffix(".idx")
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def append(self, messages: List[Dict], fsync: bool = False) -> Dict:
+        """Append a batch of messages as one indexed block."""
+        payload = "".join(
+            json.dumps(msg, ensure_ascii=False, separators=(",", ":")) + "\n"
+            for msg in messages
+        ).encode("utf-8")
+        timestamps = [message_timestamp(msg) for msg in messages]
+
+        with _open_for_append(self.path) as f:
+            offset = f.tell()
+            f.write(payload)
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+
+        block = {
+            "offset": offset,
+            "length": len(payload),
+            "count": len(messages),
+            "min_ts": min(timestamps) if timestamps else None,
+            "max_ts": max(timestamps) if timestamps else None
+        }
+
+        # The data is written before its index entry; a block missing from the
+        # index after a crash is still read as an unindexed gap.
+        with _open_for_append(self.index_path) as f:
+            f.write(json.dumps(block, separators=(",", ":")).encode("utf-8") + b"\n")
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+
+        return block
+
+    def sync(self) -> None:
+        """Flush the log and its index to stable storage."""
+        for path in (self.path, self.index_path):
+            if path.exists():
+                fd = os.open(path, os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+
+    def read_index(self) -> List[Dict]:
+        """Return the indexed blocks in file order."""
+        if not self.index_path.exists():
+            return []
+
+        blocks = []
+        with open(self.index_path) as f:
+            for line in f:
+                try:
+                    blocks.append(json.loads(line))
+                except ValueError:
+                    continue  # Torn line from an interrupted append
+        return blocks
+
+    def _spans(self, start: Optional[float], end: Optional[float]) -> List[Tuple[float, int, int]]:
+        """Return ``(lowest timestamp, offset, length)`` of every region that may overlap ``[start, end)``."""
+        if not self.path.exists():
+            return []
+
+        size = self.path.stat().st_size
+        position = 0
+        spans = []
+        for block in self.read_index():
+            block_end = block["offset"] + block["length"]
+            if block_end > size:
+                break
+            if block["offset"] > position:
+                # Data appended without an index entry; read it in full
+                spans.append((float("-inf"), position, block["offset"] - position))
+            position = block_end
+            if not block["count"]:
+                continue
+            if start is not None and block["max_ts"] < start:
+                continue
+            if end is not None and block["min_ts"] >= end:
+                continue
+            spans.append((block["min_ts"], block["offset"], block["length"]))
+
+        if position < size:
+            spans.append((float("-inf"), position, size - position))
+        return spans
+
+    def _read_span(self, offset: int, length: int, start: Optional[float], end: Optional[float]) -> List[Dict]:
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return self._parse(f.read(length), start, end)
+
+    def iter_blocks(
+        self,
+        start: Optional[float] = None,
+        end: Optional[float] = None
+    ) -> Iterator[List[Dict]]:
+        """Yield the messages of each block that may overlap ``[start, end)``."""
+        spans = self._spans(start, end)
+        if not spans:
+            return
+
+        with open(self.path, "rb") as f:
+            for _, offset, length in spans:
+                f.seek(offset)
+                yield self._parse(f.read(length), start, end)
+
+    def sources(
+        self,
+        start: Optional[float] = None,
+        end: Optional[float] = None
+    ) -> List[Tuple[float, Callable[[], List[Dict]]]]:
+        """Return ``(lowest timestamp, loader)`` pairs for reading blocks lazily."""
+        return [
+            (lowest, partial(self._read_span, offset, length, start, end))
+            for lowest, offset, length in self._spans(start, end)
+        ]
+
+    def read(self, start: Optional[float] = None, end: Optional[float] = None) -> List[Dict]:
+        """Return all messages in ``[start, end)`` in append order."""
+        messages = []
+        for block in self.iter_blocks(start, end):
+            messages.extend(block)
+        return messages
+
+    @staticmethod
+    def _parse(data: bytes, start: Optional[float], end: Optional[float]) -> List[Dict]:
+        messages = []
+        for line in data.splitlines():
+            if not line:
+                continue
+            try:
+                msg = json.loads(line)
+            except ValueError:
+                continue  # Torn line from an interrupted append
+            if start is not None or end is not None:
+                timestamp = message_timestamp(msg)
+                if (start is not None and timestamp < start) or (end is not None and timestamp >= end):
+                    continue
+            messages.append(msg)
+        return messages
+
+
+def merge_sources(sources: List[Tuple[float, Callable[[], List[Dict]]]]) -> Iterator[Dict]:
+    """Merge lazily loaded message sources into one stream in timestamp order.
+
+    Each source is a ``(lowest timestamp, loader)`` pair. A source is only
+    loaded once the stream reaches its lowest timestamp, so at any time only
+    the sources whose time ranges overlap are held in memory. Messages with
+    equal timestamps keep source order, then their order within the source.
+    """
+    pending = sorted(enumerate(sources), key=lambda item: (item[1][0], item[0]))
+    pending.reverse()  # Pop the lowest source from the end
+    heap = []
+
+    def open_source(position: int, load: Callable[[], List[Dict]]) -> None:
+        messages = iter(sorted(load(), key=message_timestamp))
+        for msg in messages:
+            heapq.heappush(heap, (message_timestamp(msg), position, 0, msg, messages))
+            break
+
+    while heap or pending:
+        while pending and (not heap or pending[-1][1][0] <= heap[0][0]):
+            position, (_, load) = pending.pop()
+            open_source(position, load)
+        if not heap:
+            continue
+
+        _, position, sequence, msg, messages = heapq.heappop(heap)
+        yield msg
+        for next_msg in messages:
+            heapq.heappush(heap, (message_timestamp(next_msg), position, sequence + 1, next_msg, messages))
+            break
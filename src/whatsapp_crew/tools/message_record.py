@@ -0,0 +1,125 @@
+import sys
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from .message_log import message_timestamp
+
+_intern = sys.intern
+
+
+def _interned(value, default: str) -> str:
+    # Only strings can be interned; a missing or null field takes the default
+    return _intern(value) if isinstance(value, str) else default
+
+
+def _mention_name(mention) -> str:
+    # Stored mentions are ``{"name": ...}`` objects; WhatsAppMessage keeps bare names
+    return mention['name'] if isinstance(mention, dict) else mention
+
+
+class MessageRecord:
+    """Compact, flat form of a message used by the analysis path.
+
+    Holds only the fields the analyzer reads, in ``__slots__`` instead of
+    three nested dicts per message. Sender ids and names and content types
+    are interned, so the few distinct values in a group are stored once no
+    matter how many messages refer to them. Timestamps are epoch seconds,
+    always held as floats.
+    """
+
+    __slots__ = (
+        'message_id', 'timestamp', 'sender_id', 'sender_name', 'text', 'content_type',
+        'media_url', 'caption', 'quoted_message_id', 'mentions', 'tags'
+    )
+
+    def __init__(
+        self,
+        message_id: Optional[str],
+        timestamp: float,
+        sender_id: str,
+        sender_name: str,
+        text: str,
+        content_type: str = 'text',
+        media_url: Optional[str] = None,
+        caption: Optional[str] = None,
+        quoted_message_id: Optional[str] = None,
+        mentions: Tuple[str, ...] = (),
+        tags: Tuple[str, ...] = ()
+    ):
+        self.message_id = message_id
+        self.timestamp = float(timestamp)
+        self.sender_id = _interned(sender_id, '')
+        self.sender_name = _interned(sender_name, 'Unknown')
+        self.text = text
+        self.content_type = _interned(content_type, 'text')
+        self.media_url = media_url
+        self.caption = caption
+        self.quoted_message_id = quoted_message_id
+        self.mentions = mentions
+        self.tags = tags
+
+    @classmethod
+    def from_dict(cls, msg: Dict) -> 'MessageRecord':
+        """Convert a message in the stored JSON format."""
+        sender = msg.get('sender') or {}
+        content = msg['content']
+        metadata = msg.get('metadata') or {}
+        return cls(
+            msg.get('message_id'),
+            message_timestamp(msg),
+            str(sender.get('id') or ''),
+            sender.get('name', 'Unknown'),
+            content['text'],
+            content.get('type', 'text'),
+            content.get('media_url'),
+            content.get('caption'),
+            metadata.get('quoted_message_id'),
+            tuple(_mention_name(mention) for mention in metadata.get('mentions') or ()),
+            tuple(metadata.get('tags') or ())
+        )
+
+    @classmethod
+    def from_model(cls, message) -> 'MessageRecord':
+        """Convert a ``WhatsAppMessage`` as returned by ``WhatsAppTool``."""
+        return cls(
+            message.message_id,
+            message.timestamp.timestamp(),
+            str(message.sender.get('id') or ''),
+            message.sender.get('name', 'Unknown'),
+            message.text,
+            message.content_type,
+            message.media_url,
+            message.caption,
+            message.quoted_message_id,
+            tuple(message.mentions),
+            tuple(message.tags)
+        )
+
+    def to_dict(self) -> Dict:
+        """Return the message in the stored JSON format."""
+        timestamp = self.timestamp
+        return {
+            'message_id': self.message_id,
+            'timestamp': str(int(timestamp)) if timestamp.is_integer() else str(timestamp),
+            'sender': {'id': self.sender_id, 'name': self.sender_name},
+            'content': {
+                'type': self.content_type,
+                'text': self.text,
+                'media_url': self.media_url,
+                'caption': self.caption
+            },
+            'metadata': {
+                'quoted_message_id': self.quoted_message_id,
+                'mentions': [{'name': name} for name in self.mentions],
+                'tags': list(self.tags)
+            }
+        }
+
+    def __repr__(self) -> str:
+        return f"MessageRecord(message_id={self.message_id!r}, sender_name={self.sender_name!r}, text={self.text[:30]!r})"
+
+
+def as_records(messages: Iterable) -> Iterator[MessageRecord]:
+    """Lazily convert stored dicts to records, passing records through unchanged."""
+    from_dict = MessageRecord.from_dict
+    for msg in messages:
+        yield msg if type(msg) is MessageRecord else from_dict(msg)
@@ -1,88 +1,536 @@
 import json
+import logging
 import os
-from datetime import datetime
+import re
+from datetime import datetime, timedelta
+from functools import partial
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from ..metrics import METRICS
+from .message_archive import INDEX_FILENAME, MessageArchive
+from .message_dedup import MessageIdIndex, unique_messages
+from .message_log import MessageLog, _open_for_append, merge_sources, message_timestamp, to_epoch
+from .storage_backend import StorageBackend
+from .thread_index import ThreadIndex, ThreadStore
+
+LAYOUTS = ("json", "jsonl")
+
+# JSON save names: {group_id}_HHMMSS.json, or {group_id}_HHMMSS_N.json for repeats in a second
+SAVE_NAME = re.compile(r"(.+)_\d{6}(?:_\d+)?")
+
+logger = logging.getLogger(__name__)
 
 class MessageStorage:
-    """Tool for storing and retrieving WhatsApp messages."""
+    """Tool for storing and retrieving WhatsApp messages.
+    
+    Two on-disk layouts are supported for new saves:
+    
+    - ``json`` (default): one pretty-printed file per save,
+      ``current/YYYY-MM-DD/{group_id}_HHMMSS.json``, with each file's
+      timestamp range appended to a ``{group_id}.ranges`` sidecar
+    - ``jsonl``: one append-only log per group and day,
+      ``current/YYYY-MM-DD/{group_id}.jsonl``, with a ``.idx`` sidecar index
+      of block offsets and timestamp ranges for fast range reads
+    
+    Reads understand both layouts, so a directory can be switched or migrated
+    with ``migrate_to_jsonl`` at any time.
+    
+    With ``deduplicate`` (the default), messages whose ``message_id`` was
+    already stored for the group today or yesterday are dropped at ingest, and
+    reads never return the same message id twice.
+    
+    Passing a ``backend`` (e.g. ``SQLiteBackend``) stores messages there
+    instead of in the file layout.
+    
+    In the file layouts, every save also updates the day's reply-thread
+    index (``{group_id}.threads``), so ``get_threads`` answers without
+    reading the day's messages.
+    
+    ``ingest_lag_days`` is how many days after it was sent a message may
+    still be received and filed; range reads look that far past their end.
+    Raise it before reading ranges that include a backfill of older messages.
+    """
     
-    def __init__(self, base_dir: str = "data"):
+    def __init__(
+        self,
+        base_dir: str = "data",
+        layout: str = "json",
+        fsync_every: int = 1,
+        deduplicate: bool = True,
+        backend: Optional[StorageBackend] = None,
+        ingest_lag_days: int = 1
+    ):
+        if layout not in LAYOUTS:
+            raise ValueError(f"Unknown storage layout: {layout}")
+        
         self.base_dir = Path(base_dir)
         self.messages_dir = self.base_dir / "messages"
         self.current_dir = self.messages_dir / "current"
         self.archive_dir = self.messages_dir / "archive"
+        self.layout = layout
+        self.backend = backend
+        self.ingest_lag_days = ingest_lag_days
+        
+        # In the jsonl layout, fsync every N appends (0 disables fsync; call sync())
+        self.fsync_every = fsync_every
+        self._unsynced: Dict[Path, int] = {}
         
         # Ensure directories exist
         self.current_dir.mkdir(parents=True, exist_ok=True)
         self.archive_dir.mkdir(parents=True, exist_ok=True)
+        
+        self.deduplicate = deduplicate
+        self.message_ids = MessageIdIndex(self.current_dir)
+        self.archive = MessageArchive(self.archive_dir)
+        self.threads = ThreadStore(self.current_dir)
+        
+        # Callbacks notified with (group_id, messages, date) after each save
+        self.listeners: List[Callable[[str, List[Dict], str], None]] = []
+    
+    def add_listener(self, callback: Callable[[str, List[Dict], str], None]) -> None:
+        """Register a callback invoked after every successful save.
+        
+        The save has already succeeded when listeners run, so an exception
+        raised by one is logged and does not reach the caller or stop the
+        other listeners.
+        """
+        self.listeners.append(callback)
     
+    def _notify(self, group_id: str, messages: List[Dict], date: str) -> None:
+        for listener in self.listeners:
+            try:
+                listener(group_id, messages, date)
+            except Exception:
+                METRICS.inc("storage_listener_errors_total")
+                logger.exception("Storage listener %r failed for %s on %s", listener, group_id, date)
+    
+    @METRICS.timed("storage_seconds", store="messages", operation="store")
     def store_messages(self, group_id: str, messages: List[Dict]) -> str:
-        """Store messages in the current directory."""
+        """Store messages in the current directory.
+        
+        Returns the path written to, or an empty string if deduplication
+        left nothing to store.
+        """
         today = datetime.now().strftime("%Y-%m-%d")
+        
+        if self.backend is not None:
+            # The backend enforces unique message ids itself
+            messages = self.backend.store_messages(group_id, messages, today)
+            METRICS.inc("storage_messages_total", len(messages), store="messages", operation="store")
+            self._notify(group_id, messages, today)
+            return str(getattr(self.backend, "path", "")) if messages else ""
+        
         day_dir = self.current_dir / today
         day_dir.mkdir(exist_ok=True)
         
-        # Create filename with timestamp for multiple saves in a day
-        timestamp = datetime.now().strftime("%H%M%S")
-        filename = f"{group_id}_{timestamp}.json"
-        filepath = day_dir / filename
+        if self.deduplicate:
+            messages = self.message_ids.filter_new(group_id, today, messages)
+            if not messages:
+                return ""
         
-        data = {
-            "group_id": group_id,
-            "messages": messages
-        }
+        if self.layout == "jsonl":
+            filepath = self._append_to_log(day_dir / f"{group_id}.jsonl", messages)
+        else:
+            # Create filename with timestamp for multiple saves in a day
+            timestamp = datetime.now().strftime("%H%M%S")
+            filename = f"{group_id}_{timestamp}.json"
+            filepath = day_dir / filename
+            
+            # Never overwrite an earlier save from the same second
+            suffix = 1
+            while filepath.exists():
+                filepath = day_dir / f"{group_id}_{timestamp}_{suffix}.json"
+                suffix += 1
+            
+            data = {
+                "group_id": group_id,
+                "messages": messages
+            }
+            
+            with open(filepath, 'w') as f:
+                json.dump(data, f, indent=2)
+            self._record_range(day_dir, group_id, filepath.name, messages)
         
-        with open(filepath, 'w') as f:
-            json.dump(data, f, indent=2)
+        # Ids are recorded after the messages are safely written
+        if self.deduplicate:
+            self.message_ids.record(group_id, today, messages)
+        self.threads.record(group_id, today, messages)
+        METRICS.inc("storage_messages_total", len(messages), store="messages", operation="store")
+        
+        self._notify(group_id, messages, today)
         
         return str(filepath)
     
-    def get_messages(self, group_id: str, date: Optional[str] = None) -> List[Dict]:
-        """Retrieve messages for a specific date."""
+    def _append_to_log(self, path: Path, messages: List[Dict]) -> Path:
+        """Append to a group's daily log, fsyncing every ``fsync_every`` appends."""
+        pending = self._unsynced.get(path, 0) + 1
+        fsync = self.fsync_every > 0 and pending >= self.fsync_every
+        MessageLog(path).append(messages, fsync=fsync)
+        
+        if fsync:
+            self._unsynced.pop(path, None)
+        else:
+            self._unsynced[path] = pending
+        return path
+    
+    @staticmethod
+    def _record_range(day_dir: Path, group_id: str, filename: str, messages: List[Dict]) -> Tuple[float, float]:
+        """Append a JSON save's timestamp range to the group's ``.ranges`` sidecar."""
+        timestamps = [message_timestamp(msg) for msg in messages]
+        # An empty save gets a range that overlaps nothing
+        lowest, highest = (min(timestamps), max(timestamps)) if timestamps else (float("inf"), float("-inf"))
+        with _open_for_append(day_dir / f"{group_id}.ranges") as f:
+            f.write(json.dumps({"file": filename, "min_ts": lowest, "max_ts": highest}).encode("utf-8") + b"\n")
+        return lowest, highest
+    
+    @staticmethod
+    def _json_files(day_dir: Path, group_id: str) -> List[Path]:
+        """A group's JSON saves in a day directory, in save order.
+        
+        Matched on the parsed name, since a prefix glob would also match
+        groups whose id starts with this one's followed by ``_``.
+        """
+        return [
+            file for file in sorted(day_dir.glob(f"{group_id}_*.json"))
+            if (match := SAVE_NAME.fullmatch(file.stem)) and match.group(1) == group_id
+        ]
+    
+    def _json_ranges(self, day_dir: Path, group_id: str) -> Dict[Path, Tuple[float, float]]:
+        """Timestamp range of each of a group's JSON saves in a day directory.
+        
+        Saves made before the sidecar existed are read once, one at a time,
+        and their ranges recorded.
+        """
+        ranges = {}
+        sidecar = day_dir / f"{group_id}.ranges"
+        if sidecar.exists():
+            with open(sidecar) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # Torn last line of an interrupted append
+                    ranges[day_dir / entry["file"]] = (entry["min_ts"], entry["max_ts"])
+        
+        # Only the group's own saves, also if an older sidecar listed another group's
+        files = self._json_files(day_dir, group_id)
+        for file in files:
+            if file not in ranges:
+                with open(file) as f:
+                    messages = json.load(f)["messages"]
+                ranges[file] = self._record_range(day_dir, group_id, file.name, messages)
+        return {file: ranges[file] for file in files}
+    
+    def sync(self) -> None:
+        """Flush every log appended to since its last fsync."""
+        for path in list(self._unsynced):
+            MessageLog(path).sync()
+            del self._unsynced[path]
+    
+    @METRICS.timed("storage_seconds", store="messages", operation="get")
+    def get_messages(
+        self,
+        group_id: str,
+        date: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> List[Dict]:
+        """Retrieve messages for a specific date.
+        
+        ``start`` and ``end`` optionally restrict the result to messages with
+        ``start <= timestamp < end``. In the jsonl layout only the indexed
+        blocks overlapping that range are read and parsed.
+        """
         if date is None:
             date = datetime.now().strftime("%Y-%m-%d")
+        
+        start_ts, end_ts = to_epoch(start), to_epoch(end)
+        if self.backend is not None:
+            return self.backend.get_messages(group_id, date, start_ts, end_ts)
             
         day_dir = self.current_dir / date
         if not day_dir.exists():
             return []
         
         messages = []
-        for file in day_dir.glob(f"{group_id}_*.json"):
+        for file in self._json_files(day_dir, group_id):
             with open(file) as f:
                 data = json.load(f)
                 messages.extend(data["messages"])
         
+        if start_ts is not None or end_ts is not None:
+            messages = [
+                msg for msg in messages
+                if (start_ts is None or message_timestamp(msg) >= start_ts)
+                and (end_ts is None or message_timestamp(msg) < end_ts)
+            ]
+        
+        log = MessageLog(day_dir / f"{group_id}.jsonl")
+        if log.exists():
+            messages.extend(log.read(start_ts, end_ts))
+        
+        if self.deduplicate:
+            messages = unique_messages(messages)
+        
         return messages
     
-    def archive_old_messages(self, days_threshold: int = 7) -> List[str]:
-        """Move messages older than threshold to archive."""
-        cutoff_date = datetime.now().date()
-        archived_files = []
+    def get_threads(self, group_id: str, date: Optional[str] = None) -> ThreadIndex:
+        """Reply-thread index of a group's day.
+        
+        Days stored in the file layouts since the index was introduced load
+        it from their ``.threads`` file; other days (the backend, archived
+        days, older saves) are indexed from their messages.
+        """
+        if date is None:
+            date = datetime.now().strftime("%Y-%m-%d")
+        
+        if self.backend is None:
+            index = self.threads.get(group_id, date)
+            if index is not None:
+                return index
+            if not (self.current_dir / date).exists():
+                return ThreadIndex.from_messages(self.archive.iter_messages(group_id, date, date))
+        return ThreadIndex.from_messages(self.get_messages(group_id, date))
+    
+    def iter_messages(
+        self,
+        group_id: str,
+        start: datetime,
+        end: datetime
+    ) -> Iterator[Dict]:
+        """Lazily yield a group's messages with ``start <= timestamp < end`` in timestamp order.
+        
+        Reads current and archived days alike. Messages are filed under the
+        day they were received, which is never before they were sent and at
+        most ``ingest_lag_days`` after, so only the days from ``start`` to
+        ``end`` plus that lag are considered. The block and chunk indexes and
+        the ``.ranges`` sidecars of JSON saves skip files that cannot overlap
+        the range without reading them. Every file, block and chunk is loaded
+        only when the stream reaches its lowest timestamp, so memory stays
+        bounded by the overlapping blocks rather than the size of the range.
+        """
+        start_ts, end_ts = to_epoch(start), to_epoch(end)
+        if self.backend is not None:
+            yield from self.backend.iter_messages(group_id, start_ts, end_ts)
+            return
+        
+        first_day = start.strftime("%Y-%m-%d")
+        last_day = (end + timedelta(days=self.ingest_lag_days)).strftime("%Y-%m-%d")
+        sources = list(self.archive.sources(group_id, first_day, last_day, start_ts, end_ts))
+        if self.current_dir.exists():
+            day_dirs = sorted(
+                day_dir for day_dir in self.current_dir.iterdir()
+                if day_dir.is_dir() and first_day <= day_dir.name <= last_day
+            )
+            for day_dir in day_dirs:
+                for file, (lowest, highest) in sorted(self._json_ranges(day_dir, group_id).items()):
+                    if highest >= start_ts and lowest < end_ts:
+                        sources.append((lowest, partial(self._read_json_file, file, start_ts, end_ts)))
+                sources.extend(MessageLog(day_dir / f"{group_id}.jsonl").sources(start_ts, end_ts))
+        
+        stream = merge_sources(sources)
+        if self.deduplicate:
+            stream = self._skip_repeats(stream)
+        yield from stream
+    
+    @staticmethod
+    def _read_json_file(path: Path, start: Optional[float], end: Optional[float]) -> List[Dict]:
+        with open(path) as f:
+            messages = json.load(f)["messages"]
+        return [
+            msg for msg in messages
+            if (start is None or message_timestamp(msg) >= start)
+            and (end is None or message_timestamp(msg) < end)
+        ]
+    
+    @staticmethod
+    def _skip_repeats(stream: Iterator[Dict]) -> Iterator[Dict]:
+        """Drop repeated message ids from a timestamp-ordered stream.
+        
+        Copies of a message share its timestamp, so only the ids seen at the
+        current timestamp need to be remembered.
+        """
+        current_ts = None
+        seen = set()
+        for msg in stream:
+            timestamp = message_timestamp(msg)
+            if timestamp != current_ts:
+                current_ts = timestamp
+                seen.clear()
+            message_id = msg.get('message_id')
+            if message_id is not None:
+                if message_id in seen:
+                    continue
+                seen.add(message_id)
+            yield msg
+    
+    def migrate_to_jsonl(self, remove_source: bool = True) -> List[str]:
+        """Convert per-save JSON files in ``current/`` to per-day JSONL logs.
         
-        # Check each date directory in current
-        for day_dir in self.current_dir.iterdir():
+        Each file becomes one indexed block, in save order. Returns the paths
+        of the logs that were written to.
+        """
+        migrated: Dict[Path, MessageLog] = {}
+        
+        for day_dir in sorted(self.current_dir.iterdir()):
             if not day_dir.is_dir():
                 continue
+            
+            # File names end in HHMMSS, so sorting by name preserves save order
+            for file in sorted(day_dir.glob("*_*.json")):
+                with open(file) as f:
+                    data = json.load(f)
                 
-            try:
-                dir_date = datetime.strptime(day_dir.name, "%Y-%m-%d").date()
-                days_old = (cutoff_date - dir_date).days
+                path = day_dir / f"{data['group_id']}.jsonl"
+                log = migrated.setdefault(path, MessageLog(path))
+                log.append(data["messages"])
                 
-                if days_old > days_threshold:
-                    # Move to archive
-                    month_dir = self.archive_dir / dir_date.strftime("%Y-%m")
-                    month_dir.mkdir(exist_ok=True)
-                    
-                    for file in day_dir.glob("*.json"):
-                        archive_path = month_dir / file.name
-                        file.rename(archive_path)
-                        archived_files.append(str(archive_path))
+                if remove_source:
+                    file.unlink()
+            
+            if remove_source:
+                for sidecar in day_dir.glob("*.ranges"):
+                    sidecar.unlink()
+        
+        for log in migrated.values():
+            log.sync()
+        
+        return sorted(str(path) for path in migrated)
+    
+    @METRICS.timed("storage_seconds", store="messages", operation="archive")
+    def archive_old_messages(self, days_threshold: int = 7) -> List[str]:
+        """Compact messages older than threshold into the compressed archive.
+        
+        Each group's day is appended to ``archive/YYYY-MM/{group_id}.jsonl.gz``
+        as gzip chunks listed in the month's ``index.json``, then the day's
+        files are removed from ``current/``. Returns the archive files written.
+        """
+        if self.backend is not None:
+            return self.backend.archive_messages(days_threshold)
+        
+        cutoff_date = datetime.now().date()
+        archived_files = set()
+        removals = []
+        
+        # One index write per month for the whole run
+        with self.archive.batch():
+            # Check each date directory in current
+            for day_dir in sorted(self.current_dir.iterdir()):
+                if not day_dir.is_dir():
+                    continue
                     
-                    # Remove empty directory
-                    if not any(day_dir.iterdir()):
-                        day_dir.rmdir()
-            except ValueError:
-                continue  # Skip if directory name is not a date
+                try:
+                    dir_date = datetime.strptime(day_dir.name, "%Y-%m-%d").date()
+                except ValueError:
+                    continue  # Skip if directory name is not a date
+                
+                days_old = (cutoff_date - dir_date).days
+                if days_old <= days_threshold:
+                    continue
+                
+                # Source file -> the group whose messages it holds
+                sources: Dict[Path, str] = {}
+                by_group: Dict[str, List[Dict]] = {}
+                for file in sorted(day_dir.glob("*_*.json")):
+                    with open(file) as f:
+                        data = json.load(f)
+                    by_group.setdefault(data["group_id"], []).extend(data["messages"])
+                    sources[file] = data["group_id"]
+                
+                for file in sorted(day_dir.glob("*.jsonl")):
+                    by_group.setdefault(file.stem, []).extend(MessageLog(file).read())
+                    sources[file] = sources[file.with_suffix(".idx")] = file.stem
+                
+                archived_groups = set()
+                for group_id, messages in by_group.items():
+                    if self.deduplicate:
+                        messages = unique_messages(messages)
+                    path = self.archive.append_day(group_id, day_dir.name, messages)
+                    if path:
+                        archived_files.add(path)
+                    archived_groups.add(group_id)
+                
+                removals.append((day_dir, [file for file, group_id in sources.items() if group_id in archived_groups]))
+        
+        # Sources are only removed once the indexes naming their chunks are written;
+        # ingest dedup sets and thread indexes are only kept while a day is current
+        for day_dir, removable in removals:
+            for file in [*removable, *day_dir.glob("*.ids"), *day_dir.glob("*.threads"), *day_dir.glob("*.ranges")]:
+                if file.exists():
+                    file.unlink()
+            self.message_ids.forget(day_dir.name)
+            self.threads.forget(day_dir.name)
+            
+            # Remove empty directory
+            if not any(day_dir.iterdir()):
+                day_dir.rmdir()
+        
+        return sorted(archived_files)
+    
+    @METRICS.timed("storage_seconds", store="messages", operation="get_archived")
+    def get_archived_messages(
+        self,
+        group_id: str,
+        start_date: str,
+        end_date: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> Iterator[Dict]:
+        """Stream archived messages of a group between two dates (inclusive).
+        
+        Only the archive chunks for the requested group and days are
+        decompressed, one at a time.
+        """
+        return self.archive.iter_messages(group_id, start_date, end_date, to_epoch(start), to_epoch(end))
+    
+    def compact_archive(self) -> List[str]:
+        """Convert loose files left in ``archive/`` by older versions to the chunked format."""
+        archived_files = set()
+        removable = []
+        
+        # One index write per month for the whole run
+        with self.archive.batch():
+            for month_dir in sorted(self.archive_dir.iterdir()):
+                if not month_dir.is_dir():
+                    continue
+                
+                by_day: Dict[tuple, List[Dict]] = {}
+                # Source file -> the (group, day) keys its messages were filed under
+                sources: Dict[Path, set] = {}
+                for file in sorted(month_dir.glob("*.json")):
+                    if file.name == INDEX_FILENAME:
+                        continue
+                    with open(file) as f:
+                        data = json.load(f)
+                    keys = sources.setdefault(file, set())
+                    for msg in data["messages"]:
+                        # Keyed by timestamp day, which may be a day already archived by ingest day
+                        key = (data["group_id"], MessageArchive.day_of(msg))
+                        by_day.setdefault(key, []).append(msg)
+                        keys.add(key)
+                
+                # Daily logs moved here as {YYYY-MM-DD}_{group_id}.jsonl
+                for file in sorted(month_dir.glob("*.jsonl")):
+                    date, group_id = file.stem.split("_", 1)
+                    by_day.setdefault((group_id, date), []).extend(MessageLog(file).read())
+                    sources[file] = sources[file.with_suffix(".idx")] = {(group_id, date)}
+                
+                archived_days = set()
+                for (group_id, date), messages in sorted(by_day.items(), key=lambda item: item[0][1]):
+                    if self.deduplicate:
+                        messages = unique_messages(messages)
+                    path = self.archive.append_day(group_id, date, messages)
+                    if path:
+                        archived_files.add(path)
+                    archived_days.add((group_id, date))
+                
+                # A source is only removed once every day it contributed to is archived
+                removable.extend(file for file, keys in sources.items() if keys <= archived_days)
+        
+        # ...and once the indexes naming those chunks are written
+        for file in removable:
+            if file.exists():
+                file.unlink()
         
-        return archived_files 
\ No newline at end of file
+        return sorted(archived_files)
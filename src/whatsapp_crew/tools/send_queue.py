@@ -0,0 +1,405 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+import uuid
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, Optional, Union
+
+from .whatsapp_client import WhatsAppAPIError, WhatsAppClient
+
+# Responses that mean the API rejected the message without posting it
+RETRYABLE_STATUSES = (429, 503)
+
+
+def idempotency_key(phone_number_id: str, group_id: str, occurrence: str) -> str:
+    """Key for one occurrence of a send, e.g. ``"daily_summary:2024-05-01"``, to a group from a number.
+
+    Keys name the occasion rather than the text, so a retried job is posted
+    once even if it regenerates its text, and the same text can still be
+    sent again on another occasion.
+    """
+    return hashlib.sha256(f"{phone_number_id}\0{group_id}\0{occurrence}".encode("utf-8")).hexdigest()[:32]
+
+
+class TokenBucket:
+    """Async token bucket allowing ``rate`` sends per second with bursts up to ``capacity``.
+
+    Waiters are served in arrival order. ``pause`` empties the bucket until a
+    given delay has passed, e.g. when the API answers with ``Retry-After``.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated: Optional[float] = None
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        if self.updated is not None:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            while True:
+                now = loop.time()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, delay: float) -> None:
+        now = asyncio.get_running_loop().time()
+        self._refill(now)
+        self.tokens = 0.0
+        self.paused_until = max(self.paused_until, now + delay)
+
+
+class SendMetrics:
+    """Counters and recent latencies of a send queue."""
+
+    def __init__(self, window: int = 1000):
+        self.enqueued = 0
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.duplicates = 0
+        self.max_depth = 0
+        self.latencies: Deque[float] = deque(maxlen=window)
+
+    def snapshot(self, depth: int) -> Dict:
+        """Return the counters with the current depth and p50/p95/max latency in seconds."""
+        latencies = sorted(self.latencies)
+
+        def percentile(fraction: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))]
+
+        return {
+            "depth": depth,
+            "max_depth": self.max_depth,
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "failed": self.failed,
+            "retries": self.retries,
+            "duplicates": self.duplicates,
+            "latency_p50": percentile(0.5),
+            "latency_p95": percentile(0.95),
+            "latency_max": latencies[-1] if latencies else None
+        }
+
+
+class _SendJob:
+    __slots__ = ("client", "group_id", "text", "key", "future", "enqueued_at")
+
+    def __init__(self, client: WhatsAppClient, group_id: str, text: str, key: str, future: asyncio.Future):
+        self.client = client
+        self.group_id = group_id
+        self.text = text
+        self.key = key
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+
+class SendQueue:
+    """Outbound message queue with rate limiting, retries and idempotency.
+
+    - Sends are rate limited by one token bucket per phone number and run on
+      at most ``concurrency`` workers.
+    - 429/503 responses and connection failures are retried up to
+      ``max_attempts`` times with full-jitter exponential backoff; a
+      ``Retry-After`` delay is honoured and pauses that phone number's bucket.
+    - Every send has an idempotency key: the caller's send id, else one
+      derived from the phone number, group and ``occurrence`` (see
+      ``idempotency_key``), else a fresh one, so unrelated sends of the same
+      text are never merged. A key that is queued or was delivered within
+      ``ledger_ttl`` seconds is not posted again; delivered keys are kept in
+      ``ledger_path`` when given, so a retried job does not re-post across
+      restarts, and expired entries are dropped from it. Errors that may
+      have reached the API (timeouts, other 5xx) are not retried.
+
+    A queue is meant to be long-lived and shared by every send of a process,
+    so that its rate limits hold across callers. It can be reused from one
+    event loop to the next (e.g. successive ``asyncio.run`` calls); work still
+    queued on a loop that has gone is dropped. Use as an async context
+    manager; leaving it waits for the queue to drain.
+    """
+
+    def __init__(
+        self,
+        client: Optional[WhatsAppClient] = None,
+        rate_per_second: float = 80.0,
+        burst: Optional[float] = None,
+        concurrency: int = 10,
+        max_attempts: int = 5,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        ledger_path: Union[str, Path, None] = None,
+        max_queued: int = 0,
+        ledger_ttl: float = 7 * 24 * 3600
+    ):
+        self.client = client
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.ledger_path = Path(ledger_path) if ledger_path else None
+        self.ledger_ttl = ledger_ttl
+        self.max_queued = max_queued
+        self.metrics = SendMetrics()
+        self._ledger_lines = 0
+        self.delivered: Dict[str, Dict] = self._load_ledger()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._queue: asyncio.Queue = asyncio.Queue(max_queued)
+        self._in_flight = 0
+        self._workers = []
+
+    @classmethod
+    def from_config(cls, client: Optional[WhatsAppClient], config: Dict) -> 'SendQueue':
+        """Build a queue from the optional ``send`` section of the ``whatsapp`` config."""
+        options = {
+            key: value for key, value in (config.get("send") or {}).items()
+            if key in (
+                "rate_per_second", "burst", "concurrency", "max_attempts",
+                "base_delay", "max_delay", "ledger_path", "max_queued", "ledger_ttl"
+            )
+        }
+        return cls(client, **options)
+
+    def _expired(self, receipt: Dict, now: float) -> bool:
+        return bool(self.ledger_ttl) and now - receipt["sent_at"] > self.ledger_ttl
+
+    def _load_ledger(self) -> Dict[str, Dict]:
+        if not (self.ledger_path and self.ledger_path.exists()):
+            return {}
+        # Receipts written before they were timestamped count from the last write
+        written_at = self.ledger_path.stat().st_mtime
+        receipts = {}
+        lines = 0
+        with open(self.ledger_path) as f:
+            for line in f:
+                lines += 1
+                try:
+                    receipt = json.loads(line)
+                except ValueError:
+                    continue  # Torn line from an interrupted append
+                receipt.setdefault("sent_at", written_at)
+                receipts[receipt["key"]] = receipt
+
+        now = time.time()
+        # Oldest first, so expired receipts are pruned from the front
+        delivered = {
+            receipt["key"]: receipt
+            for receipt in sorted(receipts.values(), key=lambda receipt: receipt["sent_at"])
+            if not self._expired(receipt, now)
+        }
+        self._ledger_lines = lines
+        if lines > len(delivered):
+            self._rewrite_ledger(delivered)
+        return delivered
+
+    def _rewrite_ledger(self, delivered: Dict[str, Dict]) -> None:
+        """Replace the ledger file with the live receipts only."""
+        temp_path = self.ledger_path.with_name(self.ledger_path.name + ".tmp")
+        with open(temp_path, "w") as f:
+            f.writelines(json.dumps(receipt, separators=(",", ":")) + "\n" for receipt in delivered.values())
+        os.replace(temp_path, self.ledger_path)
+        self._ledger_lines = len(delivered)
+
+    def _prune(self, now: float) -> None:
+        while self.delivered:
+            oldest = next(iter(self.delivered.values()))
+            if not self._expired(oldest, now):
+                break
+            del self.delivered[oldest["key"]]
+
+    def _delivered(self, key: str) -> Optional[Dict]:
+        """The receipt of a key delivered within ``ledger_ttl``, or None."""
+        receipt = self.delivered.get(key)
+        if receipt is not None and self._expired(receipt, time.time()):
+            del self.delivered[key]
+            return None
+        return receipt
+
+    def _record(self, receipt: Dict) -> None:
+        self._prune(receipt["sent_at"])
+        self.delivered[receipt["key"]] = receipt
+        if self.ledger_path:
+            self.ledger_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.ledger_path, "a") as f:
+                f.write(json.dumps(receipt, separators=(",", ":")) + "\n")
+            self._ledger_lines += 1
+            # Compact once most lines are expired or superseded
+            if self._ledger_lines > max(1000, 2 * len(self.delivered)):
+                self._rewrite_ledger(self.delivered)
+
+    @property
+    def depth(self) -> int:
+        """Messages waiting or being sent."""
+        return self._queue.qsize() + self._in_flight
+
+    def stats(self) -> Dict:
+        return self.metrics.snapshot(self.depth)
+
+    def _bucket(self, phone_number_id: str) -> TokenBucket:
+        bucket = self._buckets.get(phone_number_id)
+        if bucket is None:
+            bucket = self._buckets[phone_number_id] = TokenBucket(self.rate_per_second, self.burst)
+        return bucket
+
+    def _bind_loop(self) -> None:
+        """Recreate the loop-bound state when first used from a new event loop."""
+        loop = asyncio.get_running_loop()
+        if loop is self._loop:
+            return
+        self._loop = loop
+        self._buckets = {}
+        self._pending = {}
+        self._queue = asyncio.Queue(self.max_queued)
+        self._in_flight = 0
+        self._workers = []
+
+    def start(self) -> None:
+        self._bind_loop()
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def __aenter__(self) -> 'SendQueue':
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def join(self) -> None:
+        """Wait until every queued message has been sent or has failed."""
+        await self._queue.join()
+
+    async def close(self) -> None:
+        """Drain the queue and stop the workers."""
+        self._bind_loop()
+        if self._workers:
+            await self.join()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def submit(
+        self,
+        group_id: str,
+        text: str,
+        key: Optional[str] = None,
+        client: Optional[WhatsAppClient] = None,
+        occurrence: Optional[str] = None
+    ) -> asyncio.Future:
+        """Queue a message and return a future resolving to its delivery receipt.
+
+        ``key`` is the caller's send id; without one, ``occurrence`` (e.g.
+        ``"daily_summary:2024-05-01"``) derives it. A send with neither is
+        never treated as a duplicate. ``client`` sends from another phone
+        number than the queue's default. Waits for room when the queue was
+        created with ``max_queued``.
+        """
+        self._bind_loop()
+        client = client or self.client
+        if key is None:
+            if occurrence is not None:
+                key = idempotency_key(client.phone_number_id, group_id, occurrence)
+            else:
+                key = uuid.uuid4().hex
+        future = self._pending.get(key)
+        if future is not None:
+            self.metrics.duplicates += 1
+            return future
+
+        future = asyncio.get_running_loop().create_future()
+        receipt = self._delivered(key)
+        if receipt is not None:
+            self.metrics.duplicates += 1
+            future.set_result(receipt)
+            return future
+
+        self.start()
+        self._pending[key] = future
+        await self._queue.put(_SendJob(client, group_id, text, key, future))
+        self.metrics.enqueued += 1
+        self.metrics.max_depth = max(self.metrics.max_depth, self.depth)
+        return future
+
+    async def send(self, group_id: str, text: str, key: Optional[str] = None,
+                   client: Optional[WhatsAppClient] = None, occurrence: Optional[str] = None) -> Dict:
+        """Queue a message and wait for its receipt."""
+        return await (await self.submit(group_id, text, key, client, occurrence))
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            self._in_flight += 1
+            try:
+                await self._deliver(job)
+            finally:
+                self._in_flight -= 1
+                del self._pending[job.key]
+                self._queue.task_done()
+
+    def _retryable(self, error: WhatsAppAPIError) -> bool:
+        return not error.request_sent or error.status in RETRYABLE_STATUSES
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    async def _deliver(self, job: _SendJob) -> None:
+        bucket = self._bucket(job.client.phone_number_id)
+        for attempt in range(1, self.max_attempts + 1):
+            await bucket.acquire()
+            try:
+                response = await job.client.send_message(
+                    job.group_id, job.text, headers={"Idempotency-Key": job.key}
+                )
+            except WhatsAppAPIError as e:
+                if attempt == self.max_attempts or not self._retryable(e):
+                    self.metrics.failed += 1
+                    job.future.set_exception(e)
+                    return
+                delay = self._backoff(attempt, e.retry_after)
+                if e.retry_after is not None:
+                    bucket.pause(delay)
+                self.metrics.retries += 1
+                await asyncio.sleep(delay)
+            except Exception as e:
+                self.metrics.failed += 1
+                job.future.set_exception(e)
+                return
+            else:
+                receipt = {
+                    "key": job.key,
+                    "group_id": job.group_id,
+                    "message_id": (response.get("messages") or [{}])[0].get("id"),
+                    "attempts": attempt,
+                    "sent_at": time.time()
+                }
+                self._record(receipt)
+                self.metrics.sent += 1
+                self.metrics.latencies.append(time.monotonic() - job.enqueued_at)
+                job.future.set_result(receipt)
+                return
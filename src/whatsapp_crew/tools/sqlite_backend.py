@@ -0,0 +1,268 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+from .message_log import message_timestamp, to_epoch
+from .storage_backend import StorageBackend
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    group_id TEXT NOT NULL,
+    message_id TEXT,
+    day TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    sender_id TEXT,
+    sender_name TEXT,
+    quoted_message_id TEXT,
+    archived INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL,
+    UNIQUE (group_id, message_id)
+);
+CREATE INDEX IF NOT EXISTS idx_messages_group_timestamp ON messages (group_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_messages_group_day ON messages (group_id, day, archived);
+CREATE INDEX IF NOT EXISTS idx_messages_sender ON messages (sender_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_messages_quoted ON messages (quoted_message_id);
+CREATE INDEX IF NOT EXISTS idx_messages_archive ON messages (archived, day);
+
+CREATE TABLE IF NOT EXISTS summaries (
+    group_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    data TEXT NOT NULL,
+    markdown TEXT NOT NULL,
+    generated_at TEXT,
+    archived INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (group_id, date)
+);
+CREATE INDEX IF NOT EXISTS idx_summaries_archive ON summaries (archived, date);
+"""
+
+# SQLite limits the number of bound parameters per statement
+_MAX_PARAMS = 500
+
+
+class SQLiteBackend(StorageBackend):
+    """Local SQLite storage for messages and summaries.
+
+    Uses WAL journaling so readers never block the writer, inserts each batch
+    in a single transaction, and indexes messages by (group_id, timestamp),
+    sender and quoted message so common queries never scan the whole history.
+    Messages are unique per (group_id, message_id).
+    """
+
+    def __init__(self, path: Union[str, Path] = "data/whatsapp.db"):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def store_messages(self, group_id: str, messages: List[Dict], date: str) -> List[Dict]:
+        """Insert a batch in one transaction, skipping message ids already stored."""
+        with self._lock, self._conn:
+            known = self._existing_ids(group_id, [
+                str(msg['message_id']) for msg in messages if msg.get('message_id') is not None
+            ])
+
+            new = []
+            for msg in messages:
+                message_id = msg.get('message_id')
+                if message_id is not None:
+                    message_id = str(message_id)
+                    if message_id in known:
+                        continue
+                    known.add(message_id)
+                new.append(msg)
+
+            self._conn.executemany(
+                "INSERT INTO messages (group_id, message_id, day, timestamp, sender_id, sender_name, "
+                "quoted_message_id, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self._message_row(group_id, date, msg) for msg in new)
+            )
+        return new
+
+    def _existing_ids(self, group_id: str, message_ids: List[str]) -> set:
+        existing = set()
+        for start in range(0, len(message_ids), _MAX_PARAMS):
+            chunk = message_ids[start:start + _MAX_PARAMS]
+            rows = self._conn.execute(
+                f"SELECT message_id FROM messages WHERE group_id = ? "
+                f"AND message_id IN ({','.join('?' * len(chunk))})",
+                [group_id, *chunk]
+            )
+            existing.update(row[0] for row in rows)
+        return existing
+
+    @staticmethod
+    def _message_row(group_id: str, date: str, msg: Dict) -> tuple:
+        sender = msg.get('sender') or {}
+        metadata = msg.get('metadata') or {}
+        message_id = msg.get('message_id')
+        return (
+            group_id,
+            str(message_id) if message_id is not None else None,
+            date,
+            message_timestamp(msg),
+            sender.get('id'),
+            sender.get('name'),
+            metadata.get('quoted_message_id'),
+            json.dumps(msg, ensure_ascii=False, separators=(",", ":"))
+        )
+
+    def get_messages(
+        self,
+        group_id: str,
+        date: str,
+        start: Optional[float] = None,
+        end: Optional[float] = None
+    ) -> List[Dict]:
+        """Return current messages stored for a group on a date, in insertion order."""
+        sql = "SELECT data FROM messages WHERE group_id = ? AND day = ? AND archived = 0"
+        params: list = [group_id, date]
+        if start is not None:
+            sql += " AND timestamp >= ?"
+            params.append(start)
+        if end is not None:
+            sql += " AND timestamp < ?"
+            params.append(end)
+        return self._load_rows(sql + " ORDER BY id", params)
+
+    def iter_messages(
+        self,
+        group_id: str,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        batch_size: int = 1000
+    ) -> Iterator[Dict]:
+        """Stream a group's messages, current and archived, in timestamp order.
+
+        Uses its own read connection so the stream never holds the writer lock.
+        """
+        sql = "SELECT data FROM messages WHERE group_id = ?"
+        params: list = [group_id]
+        if start is not None:
+            sql += " AND timestamp >= ?"
+            params.append(start)
+        if end is not None:
+            sql += " AND timestamp < ?"
+            params.append(end)
+
+        conn = sqlite3.connect(str(self.path))
+        try:
+            cursor = conn.execute(sql + " ORDER BY timestamp, id", params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield json.loads(row[0])
+        finally:
+            conn.close()
+
+    def query_messages(
+        self,
+        group_id: Optional[str] = None,
+        sender_id: Optional[str] = None,
+        quoted_message_id: Optional[str] = None,
+        start: Union[datetime, float, None] = None,
+        end: Union[datetime, float, None] = None,
+        include_archived: bool = True
+    ) -> List[Dict]:
+        """Indexed ad-hoc queries, e.g. all messages from a sender last week."""
+        clauses = []
+        params: list = []
+        for column, value in (
+            ("group_id", group_id),
+            ("sender_id", sender_id),
+            ("quoted_message_id", quoted_message_id),
+        ):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+
+        start, end = to_epoch(start), to_epoch(end)
+        if start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("timestamp < ?")
+            params.append(end)
+        if not include_archived:
+            clauses.append("archived = 0")
+
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self._load_rows(f"SELECT data FROM messages{where} ORDER BY timestamp, id", params)
+
+    def _load_rows(self, sql: str, params: Iterable) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(sql, list(params)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def archive_messages(self, days_threshold: int) -> List[str]:
+        """Flag messages older than the threshold as archived."""
+        cutoff = self.cutoff_date(days_threshold)
+        with self._lock, self._conn:
+            archived = self._conn.execute(
+                "SELECT DISTINCT group_id, day FROM messages WHERE archived = 0 AND day < ?",
+                (cutoff,)
+            ).fetchall()
+            self._conn.execute("UPDATE messages SET archived = 1 WHERE archived = 0 AND day < ?", (cutoff,))
+        return [f"{group_id}/{day}" for group_id, day in archived]
+
+    def store_summary(self, group_id: str, date: str, summary_data: Dict, markdown: str) -> Dict[str, str]:
+        """Insert or replace the summary of a group for a date."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries (group_id, date, data, markdown, generated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    group_id,
+                    date,
+                    json.dumps(summary_data, ensure_ascii=False),
+                    markdown,
+                    summary_data.get("metadata", {}).get("generated_at")
+                )
+            )
+        location = f"{self.path}#summaries/{group_id}/{date}"
+        return {"json": location, "markdown": location}
+
+    def get_summary(self, group_id: str, date: str, format: str = "json") -> Optional[Dict]:
+        """Return a current summary as a dict, or its Markdown for other formats."""
+        column = "data" if format == "json" else "markdown"
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {column} FROM summaries WHERE group_id = ? AND date = ? AND archived = 0",
+                (group_id, date)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]) if format == "json" else row[0]
+
+    def query_summaries(self, group_id: str, start_date: str, end_date: str) -> List[Dict]:
+        """Return summaries of a group with ``start_date <= date <= end_date``, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM summaries WHERE group_id = ? AND date BETWEEN ? AND ? ORDER BY date",
+                (group_id, start_date, end_date)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def archive_summaries(self, days_threshold: int) -> Dict[str, list]:
+        """Flag summaries older than the threshold as archived."""
+        cutoff = self.cutoff_date(days_threshold)
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT group_id, date FROM summaries WHERE archived = 0 AND date < ?", (cutoff,)
+            ).fetchall()
+            self._conn.execute("UPDATE summaries SET archived = 1 WHERE archived = 0 AND date < ?", (cutoff,))
+        archived = [f"{group_id}/{date}" for group_id, date in rows]
+        return {"json": archived, "markdown": list(archived)}
@@ -0,0 +1,59 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+
+class StorageBackend(ABC):
+    """Interface for pluggable message and summary storage.
+
+    ``MessageStorage`` and ``SummaryStorage`` use the directory-per-day file
+    layout by default and delegate to a backend when one is given.
+    """
+
+    @abstractmethod
+    def store_messages(self, group_id: str, messages: List[Dict], date: str) -> List[Dict]:
+        """Store messages for a group under an ingest date; return those actually stored."""
+
+    @abstractmethod
+    def get_messages(
+        self,
+        group_id: str,
+        date: str,
+        start: Optional[float] = None,
+        end: Optional[float] = None
+    ) -> List[Dict]:
+        """Return current messages of a group for a date, optionally within ``[start, end)``."""
+
+    @abstractmethod
+    def iter_messages(
+        self,
+        group_id: str,
+        start: Optional[float] = None,
+        end: Optional[float] = None
+    ) -> Iterator[Dict]:
+        """Lazily yield a group's messages in ``[start, end)`` in timestamp order."""
+
+    @abstractmethod
+    def archive_messages(self, days_threshold: int) -> List[str]:
+        """Archive messages older than the threshold; return what was archived."""
+
+    @abstractmethod
+    def store_summary(self, group_id: str, date: str, summary_data: Dict, markdown: str) -> Dict[str, str]:
+        """Store a summary in JSON and Markdown form; return where each was stored."""
+
+    @abstractmethod
+    def get_summary(self, group_id: str, date: str, format: str = "json") -> Optional[Dict]:
+        """Return a stored summary, or None."""
+
+    @abstractmethod
+    def archive_summaries(self, days_threshold: int) -> Dict[str, list]:
+        """Archive summaries older than the threshold; return what was archived."""
+
+    def close(self) -> None:
+        """Release any resources held by the backend."""
+
+    @staticmethod
+    def cutoff_date(days_threshold: int) -> str:
+        """The oldest date that is not archived for a threshold, as YYYY-MM-DD."""
+        today = datetime.now().date()
+        return datetime.fromordinal(today.toordinal() - days_threshold).strftime("%Y-%m-%d")
@@ -0,0 +1,243 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+from .message_analyzer import MessageAnalyzer
+from .message_record import MessageRecord
+
+CACHE_VERSION = 4
+
+# Files whose contents change what an analysis or a crew run produces
+KNOWLEDGE_FILES = ("rules/filters.yaml", "patterns/topics.yaml")
+CREW_CONFIG_FILES = ("agents.yaml", "tasks.yaml")
+CREW_CONFIG_DIR = Path(__file__).resolve().parent.parent / "config"
+
+
+def message_set_digest(messages: Iterable[Union[Dict, MessageRecord]]) -> str:
+    """Hash a set of messages independently of their order."""
+    digests = sorted(
+        hashlib.sha256(json.dumps(
+            msg.to_dict() if isinstance(msg, MessageRecord) else msg,
+            sort_keys=True, ensure_ascii=False, default=str
+        ).encode("utf-8")).digest()
+        for msg in messages
+    )
+    return hashlib.sha256(b"".join(digests)).hexdigest()
+
+
+def files_digest(base_dir: Union[str, Path], names: Sequence[str]) -> str:
+    """Hash the contents of the given files; a missing file hashes as empty."""
+    digest = hashlib.sha256()
+    for name in names:
+        path = Path(base_dir) / name
+        digest.update(name.encode("utf-8") + b"\0")
+        if path.exists():
+            digest.update(path.read_bytes())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class SummaryCache:
+    """Content-addressed cache for analyses and crew summaries.
+
+    Entries are keyed on a hash of the (group_id, date) message set, the
+    rules and topics files, the agent and task config and anything else the
+    result depends on (requested sections, crew inputs). Unchanged inputs
+    therefore return the stored result instead of re-analysing or calling
+    the LLM again, while any edit to the messages or the config produces a
+    new key. Recent entries are kept in memory with LRU eviction; every
+    entry is also written to ``summaries/cache`` next to ``SummaryStorage``
+    so it survives restarts. On disk, entries unused for ``max_age_days``
+    are removed, and the least recently used ones beyond ``max_disk_bytes``;
+    ``prune`` runs on start and every ``prune_every`` writes.
+
+    Entries are held in memory as JSON text, so every ``get`` returns a
+    fresh copy that callers may modify without affecting the cache.
+    """
+
+    def __init__(
+        self,
+        base_dir: str = "data",
+        max_entries: int = 256,
+        knowledge_dir: str = "knowledge",
+        config_dir: Union[str, Path] = CREW_CONFIG_DIR,
+        max_age_days: Optional[float] = 30,
+        max_disk_bytes: Optional[int] = 256 << 20,
+        prune_every: int = 100
+    ):
+        self.cache_dir = Path(base_dir) / "summaries" / "cache"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.knowledge_dir = Path(knowledge_dir)
+        self.config_dir = Path(config_dir)
+        self.max_age_days = max_age_days
+        self.max_disk_bytes = max_disk_bytes
+        self.prune_every = prune_every
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "pruned": 0}
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.prune()
+
+    def key(self, kind: str, group_id: str, date: str, messages: Iterable[Union[Dict, MessageRecord]],
+            knowledge_dir: Optional[Union[str, Path]] = None, **params) -> str:
+        """Cache key for one computation over a group's messages for a day."""
+        parts = {
+            "version": CACHE_VERSION,
+            "kind": kind,
+            "group_id": group_id,
+            "date": date,
+            "messages": message_set_digest(messages),
+            "knowledge": files_digest(knowledge_dir or self.knowledge_dir, KNOWLEDGE_FILES),
+            "config": files_digest(self.config_dir, CREW_CONFIG_FILES),
+            "params": params
+        }
+        return hashlib.sha256(
+            json.dumps(parts, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a copy of a cached value from memory or disk, or None."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                text = self._entries[key]
+            else:
+                text = None
+        if text is not None:
+            return json.loads(text)
+
+        path = self._path(key)
+        if not path.exists():
+            return None
+        try:
+            with open(path) as f:
+                value = json.load(f)["value"]
+            os.utime(path)  # Recently used, for disk eviction
+        except (OSError, ValueError, KeyError):
+            return None  # A damaged or just pruned entry is recomputed and rewritten
+        self.stats["disk_hits"] += 1
+        self._remember(key, json.dumps(value))
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        """Store a JSON-compatible value in memory and on disk."""
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump({"key": key, "value": value}, f)
+        os.replace(tmp_path, path)
+        self._remember(key, json.dumps(value))
+
+        with self._lock:
+            self._writes += 1
+            due = self.prune_every and self._writes % self.prune_every == 0
+        if due:
+            self.prune()
+
+    def _remember(self, key: str, text: str) -> None:
+        with self._lock:
+            self._entries[key] = text
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        value = self.get(key)
+        if value is None:
+            self.stats["misses"] += 1
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def prune(self) -> List[str]:
+        """Remove disk entries older than ``max_age_days``, then the least recently
+        used ones until the cache fits in ``max_disk_bytes``; returns the removed keys.
+
+        Entries still held in memory keep being served from there.
+        """
+        files = []
+        for path in self.cache_dir.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue  # Removed by a concurrent prune
+            files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+
+        expired = []
+        if self.max_age_days is not None:
+            cutoff = time.time() - self.max_age_days * 86400
+            while files and files[0][0] < cutoff:
+                expired.append(files.pop(0)[2])
+        if self.max_disk_bytes is not None:
+            total = sum(size for _, size, _ in files)
+            for _, size, path in files:
+                if total <= self.max_disk_bytes:
+                    break
+                expired.append(path)
+                total -= size
+
+        removed = []
+        for path in expired:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                continue
+            removed.append(path.stem)
+        self.stats["pruned"] += len(removed)
+        return removed
+
+    def analyze(
+        self,
+        analyzer: MessageAnalyzer,
+        group_id: str,
+        date: str,
+        messages: Iterable[Union[Dict, MessageRecord]],
+        sections: Optional[Sequence[str]] = None
+    ) -> Dict:
+        """Cached ``analyzer.analyze_messages`` for one group's day."""
+        messages = messages if isinstance(messages, list) else list(messages)
+        key = self.key("analysis", group_id, date, messages, analyzer.knowledge_dir,
+                       sections=list(sections) if sections is not None else None,
+                       section_names=sorted(analyzer.sections),
+                       max_interactions=analyzer.max_interactions)
+        return self.get_or_compute(key, lambda: analyzer.analyze_messages(messages, sections))
+
+    def kickoff(
+        self,
+        crew_factory: Callable,
+        group_id: str,
+        date: str,
+        messages: Iterable[Union[Dict, MessageRecord]],
+        inputs: Optional[Dict] = None
+    ) -> str:
+        """Cached crew run for one group's day; returns the final output text.
+
+        ``crew_factory`` builds the crew (e.g. ``WhatsappCrew().crew``) and is
+        only called on a cache miss, so a hit costs no LLM tokens at all.
+        """
+        messages = messages if isinstance(messages, list) else list(messages)
+        inputs = inputs if inputs is not None else {'group_id': group_id, 'scheduled_time': date}
+        key = self.key("crew", group_id, date, messages, inputs=inputs)
+        return self.get_or_compute(key, lambda: crew_factory().kickoff(inputs=inputs).raw)
+
+    def clear(self) -> List[str]:
+        """Drop every entry from memory and disk; returns the removed keys."""
+        with self._lock:
+            self._entries.clear()
+        removed = []
+        for path in self.cache_dir.glob("*/*.json"):
+            path.unlink()
+            removed.append(path.stem)
+        return removed
@@ -4,11 +4,19 @@ from datetime import datetime
 from pathlib import Path
 from typing import Dict, Optional
 
+from ..metrics import METRICS
+from .storage_backend import StorageBackend
+
 class SummaryStorage:
-    """Tool for storing and retrieving WhatsApp group summaries."""
+    """Tool for storing and retrieving WhatsApp group summaries.
+    
+    Summaries are written to the directory-per-day file layout unless a
+    ``backend`` (e.g. ``SQLiteBackend``) is given.
+    """
     
-    def __init__(self, base_dir: str = "data"):
+    def __init__(self, base_dir: str = "data", backend: Optional[StorageBackend] = None):
         self.base_dir = Path(base_dir)
+        self.backend = backend
         self.summaries_dir = self.base_dir / "summaries"
         self.current_dir = self.summaries_dir / "current"
         self.archive_dir = self.summaries_dir / "archive"
@@ -17,13 +25,11 @@ class SummaryStorage:
         self.current_dir.mkdir(parents=True, exist_ok=True)
         self.archive_dir.mkdir(parents=True, exist_ok=True)
     
+    @METRICS.timed("storage_seconds", store="summaries", operation="store")
     def store_summary(self, group_id: str, summary_data: Dict, date: Optional[str] = None) -> Dict[str, str]:
         """Store summary in both JSON and Markdown formats."""
         if date is None:
             date = datetime.now().strftime("%Y-%m-%d")
-            
-        day_dir = self.current_dir / date
-        day_dir.mkdir(exist_ok=True)
         
         # Add metadata to summary
         summary_data["metadata"] = {
@@ -31,6 +37,14 @@ class SummaryStorage:
             "version": "1.0"
         }
         
+        if self.backend is not None:
+            return self.backend.store_summary(
+                group_id, date, summary_data, self._generate_markdown(summary_data)
+            )
+            
+        day_dir = self.current_dir / date
+        day_dir.mkdir(exist_ok=True)
+        
         # Store JSON format
         json_filename = f"{group_id}_summary.json"
         json_path = day_dir / json_filename
@@ -49,10 +63,14 @@ class SummaryStorage:
             "markdown": str(md_path)
         }
     
+    @METRICS.timed("storage_seconds", store="summaries", operation="get")
     def get_summary(self, group_id: str, date: Optional[str] = None, format: str = "json") -> Optional[Dict]:
         """Retrieve summary for a specific date."""
         if date is None:
             date = datetime.now().strftime("%Y-%m-%d")
+        
+        if self.backend is not None:
+            return self.backend.get_summary(group_id, date, format)
             
         day_dir = self.current_dir / date
         if not day_dir.exists():
@@ -71,8 +89,12 @@ class SummaryStorage:
         
         return None
     
+    @METRICS.timed("storage_seconds", store="summaries", operation="archive")
     def archive_old_summaries(self, days_threshold: int = 30) -> Dict[str, list]:
         """Move summaries older than threshold to archive."""
+        if self.backend is not None:
+            return self.backend.archive_summaries(days_threshold)
+        
         cutoff_date = datetime.now().date()
         archived_files = {"json": [], "markdown": []}
         
@@ -110,6 +132,7 @@ class SummaryStorage:
         
         return archived_files
     
+    @METRICS.timed("storage_seconds", store="summaries", operation="render_markdown")
     def _generate_markdown(self, summary_data: Dict) -> str:
         """Generate markdown format from summary data."""
         date = summary_data.get("date", datetime.now().strftime("%Y-%m-%d"))
@@ -0,0 +1,262 @@
+import heapq
+import json
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .message_log import _open_for_append, message_timestamp
+from .message_record import MessageRecord
+
+# Stored per message: (timestamp, sender name, text prefix, quoted message id)
+Node = Tuple[float, str, str, Optional[str]]
+
+TEXT_PREFIX = 100
+
+
+def _entry_of(msg: Dict) -> Tuple[Optional[str], Optional[str], float, str, str]:
+    metadata = msg.get('metadata') or {}
+    return (
+        msg.get('message_id'),
+        metadata.get('quoted_message_id'),
+        message_timestamp(msg),
+        (msg.get('sender') or {}).get('name', 'Unknown'),
+        (msg.get('content') or {}).get('text') or ''
+    )
+
+
+class ThreadIndex:
+    """Reply trees of one group's day, built incrementally from ``quoted_message_id``.
+
+    Every reply joins the tree of the message it quotes (union-find, union
+    by size), so chains A -> B -> C form one thread however they arrive.
+    Each root keeps the list of its members, so describing a thread (size,
+    depth, time span, participants) costs O(thread size), and the biggest
+    threads are found from the per-root sizes without rescanning the day.
+
+    Quoted messages that were not added (sent on an earlier day, or dropped
+    by the filters) stand in as placeholder roots.
+    """
+
+    def __init__(self):
+        self.nodes: Dict[str, Node] = {}
+        self._parent: Dict[str, str] = {}
+        self._members: Dict[str, List[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def _make(self, message_id: str) -> None:
+        if message_id not in self._parent:
+            self._parent[message_id] = message_id
+            self._members[message_id] = [message_id]
+
+    def find(self, message_id: str) -> Optional[str]:
+        """Id of the tree ``message_id`` belongs to, or None if it is unknown."""
+        if message_id not in self._parent:
+            return None
+        root = message_id
+        while self._parent[root] != root:
+            root = self._parent[root]
+        while message_id != root:  # Path compression
+            self._parent[message_id], message_id = root, self._parent[message_id]
+        return root
+
+    def _union(self, a: str, b: str) -> None:
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return
+        if len(self._members[a]) < len(self._members[b]):
+            a, b = b, a
+        self._parent[b] = a
+        self._members[a].extend(self._members.pop(b))
+
+    def add(
+        self,
+        message_id: Optional[str],
+        quoted_message_id: Optional[str],
+        timestamp: float,
+        sender: str,
+        text: str
+    ) -> None:
+        """Add one message; repeated message ids are ignored."""
+        if message_id is None:
+            if not quoted_message_id:
+                return  # Neither quotes nor can be quoted
+            # Still a reply; keyed so that merging shards stays idempotent
+            message_id = f"~{quoted_message_id}:{timestamp}:{sender}"
+        if message_id in self.nodes:
+            return
+        self.nodes[message_id] = (timestamp, sender, text[:TEXT_PREFIX], quoted_message_id or None)
+        self._make(message_id)
+        if quoted_message_id:
+            self._make(quoted_message_id)
+            self._union(message_id, quoted_message_id)
+
+    def add_record(self, record: MessageRecord, text: Optional[str] = None) -> None:
+        self.add(
+            record.message_id, record.quoted_message_id, record.timestamp,
+            record.sender_name, record.text if text is None else text
+        )
+
+    def add_messages(self, messages: Iterable[Dict]) -> None:
+        """Add messages in the stored JSON format."""
+        for msg in messages:
+            self.add(*_entry_of(msg))
+
+    @classmethod
+    def from_messages(cls, messages: Iterable[Dict]) -> 'ThreadIndex':
+        index = cls()
+        index.add_messages(messages)
+        return index
+
+    def _depths(self, members: List[str]) -> Dict[str, int]:
+        """Reply depth of each member: 0 for the root, parent's depth + 1 otherwise."""
+        depths: Dict[str, int] = {}
+        for message_id in members:
+            chain = []
+            on_chain = set()
+            current = message_id
+            while current not in depths:
+                node = self.nodes.get(current)
+                # A quote cycle (malformed data) is cut where it closes
+                if node is None or node[3] is None or current in on_chain:
+                    depths[current] = 0
+                    break
+                chain.append(current)
+                on_chain.add(current)
+                current = node[3]
+            depth = depths[current]
+            for message_id in reversed(chain):
+                depth += 1
+                depths[message_id] = depth
+        return depths
+
+    def _describe(self, root: str) -> Dict:
+        members = self._members[root]
+        depths = self._depths(members)
+        thread_root = min(members, key=lambda message_id: depths[message_id])
+        known = sorted(
+            (self.nodes[message_id] for message_id in members if message_id in self.nodes),
+            key=lambda node: node[0]
+        )
+        root_node = self.nodes.get(thread_root)
+        start, end = known[0][0], known[-1][0]
+        return {
+            'root_id': thread_root,
+            # The root's text when it was seen that day, else the first reply's
+            'description': (root_node or known[0])[2],
+            'messages': len(known),
+            'replies': sum(1 for node in known if node[3] is not None),
+            'depth': max(depths.values()),
+            'start': start,
+            'end': end,
+            'span_seconds': end - start,
+            'participants': list(dict.fromkeys(node[1] for node in known))
+        }
+
+    def thread(self, message_id: str) -> Optional[Dict]:
+        """The thread containing ``message_id`` in O(thread size), or None if unknown."""
+        root = self.find(message_id)
+        if root is None:
+            return None
+        return self._describe(root)
+
+    def roots(self) -> Dict[str, str]:
+        """Map every known message id (placeholders included) to its tree id."""
+        return {message_id: self.find(message_id) for message_id in self._parent}
+
+    def threads(self, min_replies: int = 1) -> List[Dict]:
+        """Every thread with at least ``min_replies`` replies, in order of their first message."""
+        threads = [
+            self._describe(root) for root, members in self._members.items()
+            if len(members) > min_replies
+        ]
+        threads = [thread for thread in threads if thread['replies'] >= min_replies]
+        threads.sort(key=lambda thread: (thread['start'], thread['root_id']))
+        return threads
+
+    def largest(self, n: int = 10) -> List[Dict]:
+        """The ``n`` threads with the most messages, biggest first."""
+        roots = heapq.nlargest(n, self._members, key=lambda root: len(self._members[root]))
+        threads = [self._describe(root) for root in roots]
+        return sorted(
+            (thread for thread in threads if thread['replies']),
+            key=lambda thread: (-thread['messages'], thread['start'])
+        )
+
+    def to_state(self) -> Dict:
+        return {'nodes': [[message_id, *node] for message_id, node in self.nodes.items()]}
+
+    def load_state(self, state: Dict) -> None:
+        self.__init__()
+        for message_id, timestamp, sender, text, quoted_id in state['nodes']:
+            self.add(message_id, quoted_id, timestamp, sender, text)
+
+    def merge(self, other: 'ThreadIndex') -> None:
+        for message_id, (timestamp, sender, text, quoted_id) in other.nodes.items():
+            self.add(message_id, quoted_id, timestamp, sender, text)
+
+
+class ThreadStore:
+    """Persisted per-group, per-day ``ThreadIndex``es, updated as messages are stored.
+
+    Each stored message appends one line to ``{day_dir}/{group_id}.threads``,
+    next to the day's ``.ids`` file and archived (removed) with it. Only the
+    ``max_cached`` most recently used indexes are held in memory.
+    """
+
+    def __init__(self, current_dir: Path, max_cached: int = 16):
+        self.current_dir = Path(current_dir)
+        self.max_cached = max_cached
+        self._cache: 'OrderedDict[Tuple[str, str], ThreadIndex]' = OrderedDict()
+
+    def _path(self, group_id: str, date: str) -> Path:
+        return self.current_dir / date / f"{group_id}.threads"
+
+    def get(self, group_id: str, date: str) -> Optional[ThreadIndex]:
+        """The day's index, or None if nothing was recorded for it."""
+        key = (group_id, date)
+        index = self._cache.get(key)
+        if index is not None:
+            self._cache.move_to_end(key)
+            return index
+
+        path = self._path(group_id, date)
+        if not path.exists():
+            return None
+        index = ThreadIndex()
+        with open(path) as f:
+            for line in f:
+                try:
+                    message_id, quoted_id, timestamp, sender, text = json.loads(line)
+                except ValueError:
+                    continue  # Torn last line of an interrupted append
+                index.add(message_id, quoted_id, timestamp, sender, text)
+
+        self._cache[key] = index
+        if len(self._cache) > self.max_cached:
+            self._cache.popitem(last=False)
+        return index
+
+    def record(self, group_id: str, date: str, messages: List[Dict]) -> None:
+        """Add stored messages to the day's index."""
+        if not messages:
+            return
+        entries = [_entry_of(msg) for msg in messages]
+        path = self._path(group_id, date)
+        path.parent.mkdir(exist_ok=True)
+        with _open_for_append(path) as f:
+            f.write("".join(
+                json.dumps([message_id, quoted_id, timestamp, sender, text[:TEXT_PREFIX]], ensure_ascii=False) + "\n"
+                for message_id, quoted_id, timestamp, sender, text in entries
+            ).encode("utf-8"))
+        # An index that is not cached is read with these lines when next needed
+        index = self._cache.get((group_id, date))
+        if index is not None:
+            for entry in entries:
+                index.add(*entry)
+
+    def forget(self, date: str) -> None:
+        """Drop cached indexes for a day, e.g. once it has been archived."""
+        for key in [key for key in self._cache if key[1] == date]:
+            del self._cache[key]
@@ -0,0 +1,348 @@
+import asyncio
+import hashlib
+import hmac
+import json
+from collections import defaultdict
+from http import HTTPStatus
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from .message_storage import MessageStorage
+from .whatsapp_message import normalize_message, to_stored
+
+MAX_HEADER_LINES = 100
+
+
+class StoreError(RuntimeError):
+    """Messages of a payload could not be stored within the allowed attempts."""
+
+
+class _Ticket:
+    """Tracks the messages of one POST until all of them are stored."""
+
+    __slots__ = ("remaining", "future")
+
+    def __init__(self, remaining: int, future: asyncio.Future):
+        self.remaining = remaining
+        self.future = future
+
+    def stored(self) -> None:
+        self.remaining -= 1
+        if self.remaining == 0 and not self.future.done():
+            self.future.set_result(None)
+
+    def failed(self, error: Exception) -> None:
+        if not self.future.done():
+            self.future.set_exception(error)
+            # Mark it retrieved: a request that already timed out no longer awaits it
+            self.future.exception()
+
+
+def parse_webhook(payload: Dict, default_group_id: Optional[str] = None) -> List[Tuple[str, Dict]]:
+    """Extract ``(group_id, raw message)`` pairs from a Cloud API webhook payload.
+
+    Contact names from ``value.contacts`` are attached to each message as
+    ``contact`` so the result can go through ``normalize_message`` exactly
+    like a polled message. Status updates and other change fields are ignored.
+    """
+    messages = []
+    for entry in payload.get('entry') or []:
+        for change in entry.get('changes') or []:
+            if change.get('field', 'messages') != 'messages':
+                continue
+            value = change.get('value') or {}
+            names = {
+                contact.get('wa_id'): (contact.get('profile') or {}).get('name')
+                for contact in value.get('contacts') or []
+            }
+            for msg in value.get('messages') or []:
+                group_id = msg.get('group_id') or default_group_id
+                if group_id is None:
+                    continue
+                if 'contact' not in msg and names.get(msg.get('from')):
+                    msg = {**msg, 'contact': {'name': names[msg['from']]}}
+                messages.append((group_id, msg))
+    return messages
+
+
+class WebhookReceiver:
+    """Asyncio HTTP receiver for WhatsApp Cloud API webhooks.
+
+    ``GET`` answers the subscription handshake when ``hub.verify_token``
+    matches. ``POST`` payloads are normalised like polled messages and queued
+    in a bounded in-memory buffer, and a request is answered 200 only once
+    all of its messages are stored. A writer task stores them in batches of
+    up to ``batch_size`` messages: whatever was buffered while the previous
+    write ran, after waiting up to ``flush_interval`` seconds for more (0 by
+    default, since every request waits for the write). When a payload does not fit in the buffer,
+    is not stored within ``ack_timeout`` seconds, or fails to store after
+    ``max_store_attempts`` attempts, the request is refused with 503 so the
+    API redelivers it later; nothing is acknowledged that is only held in
+    memory. Redeliveries are safe because storage deduplicates by message
+    id. With ``app_secret`` set, the ``X-Hub-Signature-256`` header is
+    checked on every POST.
+    """
+
+    def __init__(
+        self,
+        storage: MessageStorage,
+        verify_token: str,
+        app_secret: Optional[str] = None,
+        default_group_id: Optional[str] = None,
+        max_buffer: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 0.0,
+        max_body: int = 1 << 20,
+        ack_timeout: float = 10.0,
+        max_store_attempts: int = 5,
+        retry_delay: float = 0.5
+    ):
+        self.storage = storage
+        self.verify_token = verify_token
+        self.app_secret = app_secret
+        self.default_group_id = default_group_id
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_body = max_body
+        self.ack_timeout = ack_timeout
+        self.max_store_attempts = max_store_attempts
+        self.retry_delay = retry_delay
+        self.buffer: asyncio.Queue = asyncio.Queue(max_buffer)
+        self.stats = {
+            "received": 0, "stored": 0, "rejected": 0, "batches": 0,
+            "errors": 0, "failed": 0, "timeouts": 0
+        }
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._abandoned = 0
+
+    @classmethod
+    def from_config(cls, storage: MessageStorage, config: Dict) -> 'WebhookReceiver':
+        """Build a receiver from the ``whatsapp`` config and its optional ``webhook`` section."""
+        webhook = config.get("webhook") or {}
+        return cls(
+            storage,
+            webhook["verify_token"],
+            app_secret=webhook.get("app_secret"),
+            default_group_id=config.get("group_id"),
+            **{
+                key: webhook[key]
+                for key in (
+                    "max_buffer", "batch_size", "flush_interval", "max_body",
+                    "ack_timeout", "max_store_attempts", "retry_delay"
+                )
+                if key in webhook
+            }
+        )
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8080) -> None:
+        self._writer = asyncio.create_task(self._write_batches())
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+
+    @property
+    def port(self) -> int:
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self, timeout: Optional[float] = 30.0) -> int:
+        """Stop accepting requests and store what is still buffered, for at most ``timeout`` seconds.
+
+        Returns how many buffered messages were left unstored. Their requests
+        were not acknowledged, so the API redelivers them.
+        """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        try:
+            await asyncio.wait_for(self.buffer.join(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        if self._writer is not None:
+            self._writer.cancel()
+            await asyncio.gather(self._writer, return_exceptions=True)
+
+        left = self._abandoned
+        self._abandoned = 0
+        error = StoreError("Receiver closed before the messages were stored")
+        while not self.buffer.empty():
+            _, _, ticket = self.buffer.get_nowait()
+            ticket.failed(error)
+            self.buffer.task_done()
+            left += 1
+        self.stats["failed"] += left
+        return left
+
+    # HTTP handling
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, target, headers, body = request
+                if body is None:
+                    status, response = 413, b"Payload too large"
+                else:
+                    status, response = await self._dispatch(method, target, headers, body)
+                keep_alive = body is not None and headers.get("connection", "").lower() != "close"
+                self._write_response(writer, status, response, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        request_line = await reader.readline()
+        if not request_line.strip():
+            return None
+        method, target, _ = request_line.decode("latin-1").split(" ", 2)
+
+        headers = {}
+        for _ in range(MAX_HEADER_LINES):
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length", 0))
+        if length > self.max_body:
+            return method.upper(), target, headers, None
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target, headers, body
+
+    @staticmethod
+    def _write_response(writer: asyncio.StreamWriter, status: int, body: bytes, keep_alive: bool) -> None:
+        phrase = HTTPStatus(status).phrase
+        writer.write(
+            f"HTTP/1.1 {status} {phrase}\r\n"
+            f"Content-Type: text/plain; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + body
+        )
+
+    async def _dispatch(self, method: str, target: str, headers: Dict, body: bytes) -> Tuple[int, bytes]:
+        if method == "GET":
+            return self._verify_subscription(target)
+        if method == "POST":
+            return await self._receive(headers, body)
+        return 405, b"Method not allowed"
+
+    def _verify_subscription(self, target: str) -> Tuple[int, bytes]:
+        query = {key: values[0] for key, values in parse_qs(urlsplit(target).query).items()}
+        if query.get("hub.mode") == "subscribe" and hmac.compare_digest(
+            query.get("hub.verify_token", ""), self.verify_token
+        ):
+            return 200, query.get("hub.challenge", "").encode("utf-8")
+        return 403, b"Verification failed"
+
+    def _signature_valid(self, headers: Dict, body: bytes) -> bool:
+        if not self.app_secret:
+            return True
+        expected = "sha256=" + hmac.new(self.app_secret.encode(), body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(headers.get("x-hub-signature-256", ""), expected)
+
+    async def _receive(self, headers: Dict, body: bytes) -> Tuple[int, bytes]:
+        if not self._signature_valid(headers, body):
+            return 401, b"Invalid signature"
+        try:
+            messages = [
+                (group_id, to_stored(normalize_message(msg, group_id)))
+                for group_id, msg in parse_webhook(json.loads(body), self.default_group_id)
+            ]
+        except (ValueError, KeyError, TypeError):
+            return 400, b"Invalid payload"
+
+        # All or nothing, so a redelivered payload is never half stored
+        if self.buffer.maxsize and self.buffer.qsize() + len(messages) > self.buffer.maxsize:
+            self.stats["rejected"] += len(messages)
+            return 503, b"Buffer full"
+        if not messages:
+            return 200, b"OK"
+        ticket = _Ticket(len(messages), asyncio.get_running_loop().create_future())
+        for group_id, msg in messages:
+            self.buffer.put_nowait((group_id, msg, ticket))
+        self.stats["received"] += len(messages)
+
+        try:
+            # Shielded: on timeout the messages stay buffered and are still stored
+            await asyncio.wait_for(asyncio.shield(ticket.future), self.ack_timeout)
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            return 503, b"Not stored yet"
+        except StoreError:
+            return 503, b"Storage unavailable"
+        return 200, b"OK"
+
+    # Storage
+
+    async def _next_batch(self, batch: List[Tuple[str, Dict, _Ticket]]) -> None:
+        """Wait for a message, then collect more into ``batch`` until it is full or the interval ends."""
+        batch.append(await self.buffer.get())
+        # Group commit: take what arrived during the previous write without waiting
+        while len(batch) < self.batch_size and not self.buffer.empty():
+            batch.append(self.buffer.get_nowait())
+        deadline = asyncio.get_running_loop().time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.buffer.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+    async def _write_batches(self) -> None:
+        while True:
+            batch = []
+            done = 0
+            try:
+                await self._next_batch(batch)
+                by_group = defaultdict(list)
+                for group_id, msg, ticket in batch:
+                    by_group[group_id].append((msg, ticket))
+                for group_id, items in by_group.items():
+                    try:
+                        await self._store(group_id, [msg for msg, _ in items])
+                    except StoreError as e:
+                        self.stats["failed"] += len(items)
+                        for _, ticket in items:
+                            ticket.failed(e)
+                    else:
+                        for _, ticket in items:
+                            ticket.stored()
+                    done += len(items)
+                self.stats["batches"] += 1
+            except asyncio.CancelledError:
+                # Closed mid-batch: the rest of it is reported like the buffer
+                error = StoreError("Receiver closed before the messages were stored")
+                for _, _, ticket in batch:
+                    ticket.failed(error)
+                self._abandoned += len(batch) - done
+                raise
+            finally:
+                for _ in batch:
+                    self.buffer.task_done()
+
+    async def _store(self, group_id: str, messages: List[Dict]) -> None:
+        delay = self.retry_delay
+        for attempt in range(1, self.max_store_attempts + 1):
+            try:
+                # File writes run off the event loop so requests keep being served
+                await asyncio.to_thread(self.storage.store_messages, group_id, messages)
+            except Exception as e:
+                self.stats["errors"] += 1
+                if attempt == self.max_store_attempts:
+                    raise StoreError(f"Storing {len(messages)} messages for {group_id} failed: {e}") from e
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+            else:
+                self.stats["stored"] += len(messages)
+                return
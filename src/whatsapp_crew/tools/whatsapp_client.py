@@ -0,0 +1,209 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Union
+
+import httpx
+
+from ..metrics import METRICS
+
+DEFAULT_BASE_URL = "https://graph.facebook.com"
+
+
+class WhatsAppAPIError(RuntimeError):
+    """A failed Graph API call, with the HTTP status and any ``Retry-After`` delay.
+
+    ``request_sent`` is False when the request never reached the API (the
+    connection could not be opened), so it is safe to repeat even for sends.
+    """
+
+    def __init__(
+        self,
+        message: str,
+        status: Optional[int] = None,
+        retry_after: Optional[float] = None,
+        payload: Optional[Dict] = None,
+        request_sent: bool = True
+    ):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+        self.payload = payload
+        self.request_sent = request_sent
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+class WhatsAppClient:
+    """Async WhatsApp Business API client on one pooled HTTP session.
+
+    Every request goes through a single ``httpx.AsyncClient``, so TCP/TLS
+    connections are kept alive and reused across pages, groups and sends.
+    Receives page through the API's ``paging.cursors.after`` cursor and
+    several groups are fetched concurrently, bounded by ``concurrency``.
+
+    Use as an async context manager so the pool is closed when done.
+    """
+
+    def __init__(
+        self,
+        access_token: str,
+        phone_number_id: str,
+        api_version: str = "v17.0",
+        base_url: str = DEFAULT_BASE_URL,
+        timeout: float = 10.0,
+        connect_timeout: float = 5.0,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        concurrency: int = 20,
+        page_size: int = 100,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.phone_number_id = phone_number_id
+        self.page_size = page_size
+        self.concurrency = concurrency
+        self._http = httpx.AsyncClient(
+            base_url=f"{base_url.rstrip('/')}/{api_version}",
+            headers={
+                "Authorization": f"Bearer {access_token}",
+                "Content-Type": "application/json"
+            },
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections
+            ),
+            transport=transport
+        )
+
+    @classmethod
+    def from_config(cls, config: Dict, **overrides) -> 'WhatsAppClient':
+        """Build a client from the ``whatsapp`` section of ``whatsapp_config.yaml``."""
+        http = config.get("http") or {}
+        options = {
+            "api_version": config.get("api_version", "v17.0"),
+            "base_url": config.get("base_url", DEFAULT_BASE_URL),
+            **{
+                key: http[key]
+                for key in (
+                    "timeout", "connect_timeout", "max_connections",
+                    "max_keepalive_connections", "concurrency", "page_size"
+                )
+                if key in http
+            },
+            **overrides
+        }
+        return cls(config["access_token"], config["phone_number_id"], **options)
+
+    async def __aenter__(self) -> 'WhatsAppClient':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+    @property
+    def messages_path(self) -> str:
+        return f"/{self.phone_number_id}/messages"
+
+    async def request(self, method: str, path: str, **kwargs) -> Dict:
+        """Send one request and return its JSON body, raising ``WhatsAppAPIError`` on failure."""
+        started = time.perf_counter()
+        status = "connect_error"
+        try:
+            response = await self._http.request(method, path, **kwargs)
+            status = str(response.status_code)
+        except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+            raise WhatsAppAPIError(f"{method} {path} could not connect: {e!r}", request_sent=False) from e
+        except httpx.TimeoutException as e:
+            status = "timeout"
+            raise WhatsAppAPIError(f"{method} {path} timed out: {e!r}") from e
+        except httpx.HTTPError as e:
+            status = "http_error"
+            raise WhatsAppAPIError(f"{method} {path} failed: {e!r}") from e
+        finally:
+            METRICS.observe("http_request_seconds", time.perf_counter() - started, method=method, status=status)
+            METRICS.inc("http_requests_total", method=method, status=status)
+
+        if response.is_error:
+            try:
+                payload = response.json()
+            except ValueError:
+                payload = None
+            message = f"{method} {path} returned HTTP {response.status_code}"
+            if payload is not None:
+                message += f"\nAPI Error: {payload}"
+            raise WhatsAppAPIError(
+                message,
+                status=response.status_code,
+                retry_after=_retry_after(response),
+                payload=payload
+            )
+        return response.json()
+
+    async def send_message(self, group_id: str, text: str, headers: Optional[Dict] = None) -> Dict:
+        """Post a text message to a group and return the API response."""
+        data = {
+            "messaging_product": "whatsapp",
+            "recipient_type": "group",
+            "to": group_id,
+            "type": "text",
+            "text": {"body": text}
+        }
+        return await self.request("POST", self.messages_path, json=data, headers=headers)
+
+    async def iter_pages(self, group_id: str, since: Optional[datetime] = None) -> AsyncIterator[List[Dict]]:
+        """Yield a group's messages page by page, following the ``after`` cursor."""
+        params = {"group_id": group_id, "limit": self.page_size}
+        if since:
+            params["since"] = since.isoformat()
+
+        while True:
+            page = await self.request("GET", self.messages_path, params=params)
+            yield page.get("data", [])
+
+            paging = page.get("paging") or {}
+            after = (paging.get("cursors") or {}).get("after")
+            if not after or not paging.get("next"):
+                return
+            params["after"] = after
+
+    async def receive(self, group_id: str, since: Optional[datetime] = None) -> List[Dict]:
+        """Return every raw message of a group since a time, across all pages."""
+        messages = []
+        async for page in self.iter_pages(group_id, since):
+            messages.extend(page)
+        return messages
+
+    async def receive_many(
+        self,
+        group_ids: Iterable[str],
+        since: Optional[datetime] = None
+    ) -> Dict[str, Union[List[Dict], WhatsAppAPIError]]:
+        """Receive several groups concurrently over the shared pool.
+
+        Returns ``{group_id: messages}``; a group that failed maps to its
+        ``WhatsAppAPIError`` instead, so one failing group never stops the others.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch(group_id: str):
+            async with semaphore:
+                try:
+                    return await self.receive(group_id, since)
+                except WhatsAppAPIError as e:
+                    return e
+
+        group_ids = list(dict.fromkeys(group_ids))
+        results = await asyncio.gather(*(fetch(group_id) for group_id in group_ids))
+        return dict(zip(group_ids, results))
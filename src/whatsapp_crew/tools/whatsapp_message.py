@@ -0,0 +1,153 @@
+import re
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from pydantic import BaseModel, Field, TypeAdapter
+from typing_extensions import TypedDict
+
+# A hashtag is a whitespace-delimited word starting with '#'
+TAG_PATTERN = re.compile(r'(?<!\S)#(\S+)')
+
+_EMPTY: Dict = {}
+
+
+class WhatsAppMessage(BaseModel):
+    """Schema for WhatsApp messages."""
+    message_id: str = Field(..., description="Unique message identifier")
+    text: str = Field(..., description="The message text")
+    timestamp: datetime = Field(..., description="Message timestamp")
+    sender: Dict = Field(..., description="Sender information with id and name")
+    content_type: str = Field(..., description="Type of content (text, image, video, etc.)")
+    media_url: Optional[str] = Field(None, description="URL for media content if any")
+    caption: Optional[str] = Field(None, description="Caption for media content")
+    quoted_message_id: Optional[str] = Field(None, description="ID of quoted message if any")
+    mentions: List[str] = Field(default_factory=list, description="List of mentioned users")
+    tags: List[str] = Field(default_factory=list, description="List of hashtags in message")
+    group_id: Optional[str] = Field(None, description="Group the message was received from")
+
+
+class StoredSender(TypedDict):
+    id: str
+    name: str
+
+
+class StoredContent(TypedDict):
+    type: str
+    text: str
+    media_url: Optional[str]
+    caption: Optional[str]
+
+
+class StoredMention(TypedDict):
+    name: str
+
+
+class StoredMetadata(TypedDict):
+    quoted_message_id: Optional[str]
+    mentions: List[StoredMention]
+    tags: List[str]
+
+
+class StoredMessage(TypedDict):
+    """A message in the JSON format kept by ``MessageStorage``."""
+    message_id: str
+    timestamp: str
+    sender: StoredSender
+    content: StoredContent
+    metadata: StoredMetadata
+
+
+# Validates a whole page in one call into pydantic-core
+STORED_PAGE = TypeAdapter(List[StoredMessage])
+
+
+def extract_tags(text: str) -> List[str]:
+    """Extract hashtags from message text."""
+    if not text or '#' not in text:
+        return []
+
+    return TAG_PATTERN.findall(text)
+
+
+def normalize_message(msg: Dict, group_id: Optional[str] = None) -> WhatsAppMessage:
+    """Build a ``WhatsAppMessage`` from one raw Graph API message.
+
+    Shared by polling (``WhatsAppTool._process_messages``) and the webhook
+    receiver so both produce identical messages.
+    """
+    return WhatsAppMessage(
+        message_id=msg['id'],
+        text=msg.get('text', {}).get('body', ''),
+        timestamp=datetime.fromtimestamp(int(msg['timestamp'])),
+        sender={
+            'id': msg['from'],
+            'name': msg.get('contact', {}).get('name', 'Unknown')
+        },
+        content_type=msg['type'],
+        media_url=msg.get('image', {}).get('url') or msg.get('video', {}).get('url'),
+        caption=msg.get('image', {}).get('caption') or msg.get('video', {}).get('caption'),
+        quoted_message_id=msg.get('context', {}).get('id'),
+        mentions=[m['name'] for m in msg.get('mentions', [])],
+        tags=extract_tags(msg.get('text', {}).get('body', '')),
+        group_id=group_id
+    )
+
+
+def to_stored(message: WhatsAppMessage) -> Dict:
+    """Convert a message to the JSON format kept by ``MessageStorage``."""
+    return {
+        'message_id': message.message_id,
+        'timestamp': str(int(message.timestamp.timestamp())),
+        'sender': dict(message.sender),
+        'content': {
+            'type': message.content_type,
+            'text': message.text,
+            'media_url': message.media_url,
+            'caption': message.caption
+        },
+        'metadata': {
+            'quoted_message_id': message.quoted_message_id,
+            'mentions': [{'name': name} for name in message.mentions],
+            'tags': list(message.tags)
+        }
+    }
+
+
+def normalize_page(raw_messages: Iterable[Dict], trusted: bool = False) -> List[Dict]:
+    """Decode a page of raw Graph API messages straight into the stored format.
+
+    Gives the same result as ``to_stored(normalize_message(msg))`` for each
+    message, without building a model per message: each nested object is
+    looked up once, the timestamp stays an epoch string, and tags come from
+    the same pass over the text. The page is then validated as a whole
+    against ``StoredMessage``; with ``trusted`` (e.g. for backfills from
+    pages already validated once) that step is skipped.
+    """
+    page = []
+    append = page.append
+    for msg in raw_messages:
+        text = (msg.get('text') or _EMPTY).get('body', '')
+        image = msg.get('image') or _EMPTY
+        video = msg.get('video') or _EMPTY
+        append({
+            'message_id': msg['id'],
+            'timestamp': str(int(msg['timestamp'])),
+            'sender': {
+                'id': msg['from'],
+                'name': (msg.get('contact') or _EMPTY).get('name', 'Unknown')
+            },
+            'content': {
+                'type': msg['type'],
+                'text': text,
+                'media_url': image.get('url') or video.get('url'),
+                'caption': image.get('caption') or video.get('caption')
+            },
+            'metadata': {
+                'quoted_message_id': (msg.get('context') or _EMPTY).get('id'),
+                'mentions': [{'name': mention['name']} for mention in msg.get('mentions', ())],
+                'tags': TAG_PATTERN.findall(text) if '#' in text else []
+            }
+        })
+    if trusted:
+        return page
+    return STORED_PAGE.validate_python(page)
@@ -1,25 +1,18 @@
 from crewai.tools import BaseTool
-from typing import Type, Optional, List, Dict
+from typing import Type, Optional, List, Dict, Iterable, Union
 from pydantic import BaseModel, Field
-import requests
+import asyncio
 import yaml
 import os
 from datetime import datetime
 import pytz
 from pathlib import Path
 
-class WhatsAppMessage(BaseModel):
-    """Schema for WhatsApp messages."""
-    message_id: str = Field(..., description="Unique message identifier")
-    text: str = Field(..., description="The message text")
-    timestamp: datetime = Field(..., description="Message timestamp")
-    sender: Dict = Field(..., description="Sender information with id and name")
-    content_type: str = Field(..., description="Type of content (text, image, video, etc.)")
-    media_url: Optional[str] = Field(None, description="URL for media content if any")
-    caption: Optional[str] = Field(None, description="Caption for media content")
-    quoted_message_id: Optional[str] = Field(None, description="ID of quoted message if any")
-    mentions: List[str] = Field(default_factory=list, description="List of mentioned users")
-    tags: List[str] = Field(default_factory=list, description="List of hashtags in message")
+from ..metrics import METRICS
+from .async_utils import run_sync
+from .send_queue import SendQueue
+from .whatsapp_client import WhatsAppAPIError, WhatsAppClient
+from .whatsapp_message import WhatsAppMessage, extract_tags, normalize_message, normalize_page
 
 class WhatsAppToolInput(BaseModel):
     """Input schema for WhatsApp operations."""
@@ -31,18 +24,29 @@ class WhatsAppTool(BaseTool):
     name: str = "WhatsApp Communication Tool"
     description: str = (
         "A tool for sending and receiving WhatsApp messages using the WhatsApp Business API. "
-        "Can be used to retrieve messages from a group or send messages to a group."
+        "Use 'send' to post the day's summary to the group; it is posted once per day, and sending "
+        "again returns the first send's message ID. Use 'receive' to retrieve new messages from "
+        "every configured group; it reports how many were received and names any group that failed."
     )
     args_schema: Type[BaseModel] = WhatsAppToolInput
+    config: Dict = Field(default_factory=dict, exclude=True)
+    send_queue: Optional[SendQueue] = Field(default=None, exclude=True)
 
     def __init__(self):
         super().__init__()
         self.config = self._load_config()
-        self.base_url = f"https://graph.facebook.com/{self.config['whatsapp']['api_version']}"
-        self.headers = {
-            "Authorization": f"Bearer {self.config['whatsapp']['access_token']}",
-            "Content-Type": "application/json"
-        }
+        # One queue for every send, so its rate limits and ledger hold across calls
+        self.send_queue = SendQueue.from_config(None, self.config['whatsapp'])
+
+    @property
+    def group_ids(self) -> List[str]:
+        """Groups to receive from: ``group_ids`` if configured, else the single ``group_id``."""
+        whatsapp = self.config['whatsapp']
+        return list(whatsapp.get('group_ids') or [whatsapp['group_id']])
+
+    def client(self, **overrides) -> WhatsAppClient:
+        """Create a pooled async API client; use it as ``async with tool.client() as client``."""
+        return WhatsAppClient.from_config(self.config['whatsapp'], **overrides)
 
     def _load_config(self) -> dict:
         """Load WhatsApp configuration from YAML file."""
@@ -56,90 +60,166 @@ class WhatsAppTool(BaseTool):
         with open(config_path, 'r') as f:
             return yaml.safe_load(f)
 
-    def _send_message(self, message: str) -> str:
-        """Send a message to the WhatsApp group."""
-        endpoint = f"{self.base_url}/{self.config['whatsapp']['phone_number_id']}/messages"
-        
-        data = {
-            "messaging_product": "whatsapp",
-            "recipient_type": "group",
-            "to": self.config['whatsapp']['group_id'],
-            "type": "text",
-            "text": {"body": message}
+    def _send_message(self, message: str, occurrence: Optional[str] = None) -> str:
+        """Send a message to the WhatsApp group.
+
+        ``occurrence`` defaults to ``"send:YYYY-MM-DD"`` for today in the
+        configured timezone, so a retried crew or job posts the day's summary
+        only once even if its text was regenerated.
+        """
+        whatsapp = self.config['whatsapp']
+        group_id = whatsapp['group_id']
+        if occurrence is None:
+            today = datetime.now(pytz.timezone(whatsapp.get('timezone') or 'UTC')).strftime("%Y-%m-%d")
+            occurrence = f"send:{today}"
+        result = self.send_messages({group_id: message}, occurrence=occurrence)[group_id]
+        if isinstance(result, Exception):
+            raise RuntimeError(f"Error sending message: {str(result)}") from result
+        return f"Message sent successfully. Message ID: {result['message_id']}"
+
+    def send_messages(
+        self,
+        messages: Dict[str, str],
+        keys: Optional[Dict[str, str]] = None,
+        occurrence: Optional[str] = None
+    ) -> Dict[str, Union[Dict, Exception]]:
+        """Send one message per group through the tool's rate-limited queue.
+
+        Returns ``{group_id: receipt}``; a group whose send failed maps to the
+        exception instead. ``keys`` optionally sets each group's send id;
+        otherwise ``occurrence`` (e.g. ``"daily_summary:2024-05-01"``) makes
+        a repeated run post each group's message only once.
+        """
+        return run_sync(self.send_messages_async(messages, keys, occurrence))
+
+    async def send_messages_async(
+        self,
+        messages: Dict[str, str],
+        keys: Optional[Dict[str, str]] = None,
+        occurrence: Optional[str] = None,
+        client: Optional[WhatsAppClient] = None
+    ) -> Dict[str, Union[Dict, Exception]]:
+        """Async ``send_messages``; pass an open ``client`` to reuse its pool."""
+        if client is None:
+            async with self.client() as client:
+                return await self.send_messages_async(messages, keys, occurrence, client)
+
+        keys = keys or {}
+        futures = {
+            group_id: await self.send_queue.submit(group_id, text, keys.get(group_id), client, occurrence)
+            for group_id, text in messages.items()
         }
+        results = await asyncio.gather(*futures.values(), return_exceptions=True)
+        return dict(zip(futures, results))
 
-        try:
-            response = requests.post(endpoint, headers=self.headers, json=data)
-            response.raise_for_status()
-            return f"Message sent successfully. Message ID: {response.json().get('messages', [{}])[0].get('id')}"
-        except requests.exceptions.RequestException as e:
-            error_msg = f"Error sending message: {str(e)}"
-            if hasattr(e.response, 'json'):
-                error_msg += f"\nAPI Error: {e.response.json()}"
-            raise RuntimeError(error_msg)
-
-    def _receive_messages(self, since: Optional[datetime] = None) -> List[WhatsAppMessage]:
-        """Retrieve messages from the WhatsApp group."""
-        endpoint = f"{self.base_url}/{self.config['whatsapp']['phone_number_id']}/messages"
-        
-        params = {
-            "group_id": self.config['whatsapp']['group_id']
+    def _receive_messages(
+        self,
+        since: Optional[datetime] = None,
+        group_id: Optional[str] = None
+    ) -> List[WhatsAppMessage]:
+        """Retrieve messages from one WhatsApp group, the configured ``group_id`` by default."""
+        group_id = group_id or self.config['whatsapp']['group_id']
+        result = self.receive_groups(since, [group_id])[group_id]
+        if isinstance(result, Exception):
+            raise RuntimeError(f"Error receiving messages: {str(result)}") from result
+        return result
+
+    def receive_groups(
+        self,
+        since: Optional[datetime] = None,
+        group_ids: Optional[Iterable[str]] = None
+    ) -> Dict[str, Union[List[WhatsAppMessage], WhatsAppAPIError]]:
+        """Retrieve messages from several groups, the configured ones by default.
+
+        Returns ``{group_id: messages}``; a group that failed maps to its
+        ``WhatsAppAPIError`` instead.
+        """
+        return run_sync(self.receive_messages_async(since, group_ids))
+
+    async def receive_messages_async(
+        self,
+        since: Optional[datetime] = None,
+        group_ids: Optional[Iterable[str]] = None,
+        client: Optional[WhatsAppClient] = None
+    ) -> Dict[str, Union[List[WhatsAppMessage], WhatsAppAPIError]]:
+        """Receive several groups concurrently over one connection pool.
+
+        Returns ``{group_id: messages}``; a group that failed maps to its
+        ``WhatsAppAPIError`` instead, so the other groups' messages are kept.
+        Pass an open ``client`` to reuse its pool across calls; otherwise one
+        is opened for this call only.
+        """
+        if client is None:
+            async with self.client() as client:
+                return await self.receive_messages_async(since, group_ids, client)
+
+        results = await client.receive_many(group_ids or self.group_ids, since)
+        return {
+            group_id: raw_messages if isinstance(raw_messages, Exception)
+            else self._process_messages({'data': raw_messages}, group_id)
+            for group_id, raw_messages in results.items()
         }
-        if since:
-            params['since'] = since.isoformat()
 
-        try:
-            response = requests.get(endpoint, headers=self.headers, params=params)
-            response.raise_for_status()
-            return self._process_messages(response.json())
-        except requests.exceptions.RequestException as e:
-            error_msg = f"Error receiving messages: {str(e)}"
-            if hasattr(e.response, 'json'):
-                error_msg += f"\nAPI Error: {e.response.json()}"
-            raise RuntimeError(error_msg)
-
-    def _process_messages(self, response_data: Dict) -> List[WhatsAppMessage]:
+    async def receive_stored_async(
+        self,
+        since: Optional[datetime] = None,
+        group_ids: Optional[Iterable[str]] = None,
+        client: Optional[WhatsAppClient] = None,
+        trusted: bool = False
+    ) -> Dict[str, Union[List[Dict], WhatsAppAPIError]]:
+        """Receive several groups as ``{group_id: messages}`` in the ``MessageStorage`` format.
+
+        The bulk path for backfills: pages are decoded with ``normalize_page``
+        instead of a ``WhatsAppMessage`` per message. ``trusted`` skips
+        validation. As in ``receive_messages_async``, a failed group maps to
+        its error.
+        """
+        if client is None:
+            async with self.client() as client:
+                return await self.receive_stored_async(since, group_ids, client, trusted)
+
+        results = await client.receive_many(group_ids or self.group_ids, since)
+        return {
+            group_id: raw_messages if isinstance(raw_messages, Exception)
+            else self._process_page({'data': raw_messages}, trusted)
+            for group_id, raw_messages in results.items()
+        }
+
+    def _process_messages(self, response_data: Dict, group_id: Optional[str] = None) -> List[WhatsAppMessage]:
         """Process and format received messages."""
-        messages = []
-        
-        for msg in response_data.get('data', []):
-            processed_msg = WhatsAppMessage(
-                message_id=msg['id'],
-                text=msg.get('text', {}).get('body', ''),
-                timestamp=datetime.fromtimestamp(int(msg['timestamp'])),
-                sender={
-                    'id': msg['from'],
-                    'name': msg.get('contact', {}).get('name', 'Unknown')
-                },
-                content_type=msg['type'],
-                media_url=msg.get('image', {}).get('url') or msg.get('video', {}).get('url'),
-                caption=msg.get('image', {}).get('caption') or msg.get('video', {}).get('caption'),
-                quoted_message_id=msg.get('context', {}).get('id'),
-                mentions=[m['name'] for m in msg.get('mentions', [])],
-                tags=self._extract_tags(msg.get('text', {}).get('body', ''))
-            )
-            messages.append(processed_msg)
-        
-        return messages
+        return [normalize_message(msg, group_id) for msg in response_data.get('data', [])]
+
+    def _process_page(self, response_data: Dict, trusted: bool = False) -> List[Dict]:
+        """Decode a whole API page into stored messages, validated in one batch unless ``trusted``."""
+        return normalize_page(response_data.get('data', []), trusted)
 
     def _extract_tags(self, text: str) -> List[str]:
         """Extract hashtags from message text."""
-        if not text:
-            return []
-        
-        return [
-            word[1:] for word in text.split()
-            if word.startswith('#') and len(word) > 1
-        ]
+        return extract_tags(text)
 
     def _run(self, operation: str, message: Optional[str] = None, since: Optional[datetime] = None) -> str:
         """Execute the WhatsApp operation."""
+        with METRICS.timer("tool_run_seconds", tool="whatsapp", operation=operation):
+            result = self._execute(operation, message, since)
+        status = "error" if result.startswith("Operation failed") else "ok"
+        METRICS.inc("tool_runs_total", tool="whatsapp", operation=operation, status=status)
+        return result
+
+    def _execute(self, operation: str, message: Optional[str], since: Optional[datetime]) -> str:
         try:
             if operation == "send" and message:
                 return self._send_message(message)
             elif operation == "receive":
-                messages = self._receive_messages(since)
-                return f"Retrieved {len(messages)} messages successfully"
+                results = self.receive_groups(since)
+                failed = {group_id: result for group_id, result in results.items() if isinstance(result, Exception)}
+                received = sum(len(result) for group_id, result in results.items() if group_id not in failed)
+                if not failed:
+                    return f"Retrieved {received} messages successfully"
+                details = "\n".join(f"{group_id}: {error}" for group_id, error in failed.items())
+                return (
+                    f"Retrieved {received} messages from {len(results) - len(failed)} of {len(results)} groups. "
+                    f"Error receiving messages:\n{details}"
+                )
             else:
                 raise ValueError("Invalid operation or missing parameters")
         except Exception as e:
@@ -0,0 +1,26 @@
+from whatsapp_crew.tools.message_analyzer import MessageAnalyzer
+from whatsapp_crew.tools.message_record import MessageRecord
+
+
+def thread(root: str, replies: int, start: float):
+    records = [MessageRecord(root, start, "1", "Alice", f"thread {root} starts here")]
+    for i in range(replies):
+        sender = "Bob" if i % 2 else "Carol"
+        records.append(MessageRecord(f"{root}.{i}", start + i + 1, "2", sender, f"reply {i} in {root}",
+                                     quoted_message_id=root))
+    return records
+
+
+def test_notable_interactions_lists_largest_threads_first():
+    analyzer = MessageAnalyzer("knowledge", max_interactions=2)
+    messages = thread("a", 3, 0) + thread("b", 6, 100) + thread("c", 4, 200) + thread("d", 1, 300)
+
+    interactions = analyzer.analyze_messages(messages)["notable_interactions"]
+
+    assert [interaction["replies"] for interaction in interactions] == [6, 4]
+    assert interactions[0] == {
+        "description": "thread b starts here...",
+        "participants": ["Alice", "Carol", "Bob"],
+        "replies": 6,
+        "depth": 1,
+    }
@@ -0,0 +1,51 @@
+from datetime import date
+
+from whatsapp_crew.crew import WhatsappCrew
+from whatsapp_crew.synthetic import generate_messages
+from whatsapp_crew.tools.whatsapp_tool import WhatsAppTool
+
+CONFIG = {"whatsapp": {"phone_number_id": "phone", "access_token": "token", "group_id": "group_a"}}
+
+
+def test_crew_wires_configured_tools_into_agents_and_tasks(tmp_path, monkeypatch):
+    monkeypatch.setattr(WhatsAppTool, "_load_config", lambda self: CONFIG)
+    summary_crew = WhatsappCrew(data_dir=str(tmp_path), knowledge_dir="knowledge")
+
+    expert = summary_crew.summarization_expert()
+    assert expert.tools == [summary_crew.analysis_digest(), summary_crew.summary_storage()]
+    assert summary_crew.analysis_digest().data_dir == str(tmp_path)
+    assert summary_crew.analysis_digest().knowledge_dir == "knowledge"
+
+    crew = summary_crew.crew()
+    assert [task.name for task in crew.tasks] == [
+        "receive_messages_task", "summarize_messages_task", "send_summary_task"
+    ]
+    assert [tool.name for tool in crew.tasks[1].tools] == ["Message Analysis Digest", "Summary Storage"]
+    assert crew.tasks[1].agent.role == expert.role
+
+
+def test_summarize_map_reduce_reduces_shared_topics_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(WhatsAppTool, "_load_config", lambda self: CONFIG)
+    summary_crew = WhatsappCrew(data_dir=str(tmp_path), knowledge_dir="knowledge")
+    messages = generate_messages(600, "group_a", day=date(2024, 3, 12))
+    prompts = []
+
+    def stub_llm(prompt: str) -> str:
+        prompts.append(prompt)
+        if prompt.startswith("Several parts"):
+            return "Deploys were discussed all day."
+        part = prompt.split()[4]
+        return f"- Deploys: part {part} talked about the deploy job.\n- Part {part}: only here."
+
+    result = summary_crew.summarize_map_reduce("group_a", "2024-03-12", messages, summarize=stub_llm,
+                                               max_chunk_messages=200)
+
+    chunks = result["stats"]["chunks"]
+    assert chunks >= 3
+    reduce_prompts = [prompt for prompt in prompts if prompt.startswith("Several parts")]
+    assert len(reduce_prompts) == 1 and '"Deploys"' in reduce_prompts[0]
+    assert result["stats"] == {"chunks": chunks, "llm_calls": chunks + 1}
+    discussions = {discussion["topic"]: discussion["content"] for discussion in result["summary"]["key_discussions"]}
+    assert discussions["Deploys"] == "Deploys were discussed all day."
+    assert len(discussions) == chunks + 1
+    assert result["summary"]["activity"]["total_messages"] > 0
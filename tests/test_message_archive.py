@@ -0,0 +1,71 @@
+import json
+from datetime import datetime
+
+from whatsapp_crew.tools.message_storage import MessageStorage
+
+
+def message(message_id: str, when: datetime) -> dict:
+    return {
+        "message_id": message_id,
+        "timestamp": str(int(when.timestamp())),
+        "sender": {"id": "1", "name": "Alice"},
+        "content": {"type": "text", "text": f"message {message_id}", "media_url": None, "caption": None},
+        "metadata": {"quoted_message_id": None, "mentions": [], "tags": []},
+    }
+
+
+def write_json(path, group_id, messages):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"group_id": group_id, "messages": messages}))
+
+
+def test_compact_archive_merges_into_day_already_archived(tmp_path):
+    storage = MessageStorage(str(tmp_path))
+
+    # Received on 2024-05-02 but sent just before midnight, so its timestamp day is 2024-05-01
+    late = message("late", datetime(2024, 5, 1, 23, 59))
+    write_json(storage.current_dir / "2024-05-02" / "g_000100.json", "g", [late])
+    # A day archived from its ingest directory
+    early = message("early", datetime(2024, 5, 1, 9, 0))
+    write_json(storage.current_dir / "2024-05-01" / "g_090000.json", "g", [early])
+    storage.archive_old_messages(days_threshold=0)
+
+    # A loose file from an older version holding a message of the same timestamp day
+    legacy = message("legacy", datetime(2024, 5, 1, 18, 0))
+    legacy_file = storage.archive_dir / "2024-05" / "g_legacy.json"
+    write_json(legacy_file, "g", [legacy])
+
+    storage.compact_archive()
+    storage.compact_archive()  # Repeating a run never duplicates messages
+
+    assert not legacy_file.exists()
+    day = [msg["message_id"] for msg in storage.get_archived_messages("g", "2024-05-01", "2024-05-01")]
+    assert day == ["early", "legacy"]
+    next_day = [msg["message_id"] for msg in storage.get_archived_messages("g", "2024-05-02", "2024-05-02")]
+    assert next_day == ["late"]
+
+
+def test_archive_old_messages_round_trips_in_chunks(tmp_path):
+    storage = MessageStorage(str(tmp_path))
+    storage.archive.chunk_size = 2
+    day = [message(f"m{i}", datetime(2024, 5, 1, 9, 50 - i)) for i in range(5)]
+    write_json(storage.current_dir / "2024-05-01" / "g_090000.json", "g", day)
+    write_json(storage.current_dir / "2024-05-01" / "other_090000.json", "other",
+               [message("o", datetime(2024, 5, 1))])
+
+    storage.archive_old_messages(days_threshold=0)
+
+    assert not (storage.current_dir / "2024-05-01").exists()
+    index = json.loads((storage.archive_dir / "2024-05" / "index.json").read_text())
+    assert [chunk["count"] for chunk in index["g"]] == [2, 2, 1]
+    archived = [msg["message_id"] for msg in storage.get_archived_messages("g", "2024-05-01", "2024-05-01")]
+    assert archived == ["m4", "m3", "m2", "m1", "m0"]
+    assert [msg["message_id"] for msg in storage.get_archived_messages("other", "2024-05-01", "2024-05-01")] == ["o"]
+
+    # Messages filed under the same day later are added to it, not archived twice
+    later = [day[0], message("m5", datetime(2024, 5, 1, 10))]
+    write_json(storage.current_dir / "2024-05-01" / "g_100000.json", "g", later)
+    storage.archive_old_messages(days_threshold=0)
+
+    archived = [msg["message_id"] for msg in storage.get_archived_messages("g", "2024-05-01", "2024-05-01")]
+    assert sorted(archived) == ["m0", "m1", "m2", "m3", "m4", "m5"]
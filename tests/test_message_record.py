@@ -0,0 +1,14 @@
+from whatsapp_crew.tools.message_record import MessageRecord
+
+
+def test_to_dict_accepts_int_timestamp():
+    record = MessageRecord("a", 1700000000, "1", "Alice", "hello")
+
+    assert record.to_dict()["timestamp"] == "1700000000"
+    assert MessageRecord.from_dict(record.to_dict()).timestamp == 1700000000.0
+
+
+def test_to_dict_keeps_fractional_timestamp():
+    record = MessageRecord("a", 1700000000.5, "1", "Alice", "hello")
+
+    assert record.to_dict()["timestamp"] == "1700000000.5"
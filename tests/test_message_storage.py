@@ -0,0 +1,96 @@
+import json
+from datetime import datetime
+
+from whatsapp_crew.tools.message_dedup import MessageIdIndex
+from whatsapp_crew.tools.message_log import MessageLog
+from whatsapp_crew.tools.message_storage import MessageStorage
+
+
+def message(message_id: str, when: datetime, text: str = None) -> dict:
+    return {
+        "message_id": message_id,
+        "timestamp": str(int(when.timestamp())),
+        "sender": {"id": "1", "name": "Alice"},
+        "content": {"type": "text", "text": text or f"message {message_id}", "media_url": None, "caption": None},
+        "metadata": {"quoted_message_id": None, "mentions": [], "tags": []},
+    }
+
+
+def write_json(path, group_id, messages):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"group_id": group_id, "messages": messages}))
+
+
+def test_groups_sharing_an_id_prefix_stay_apart(tmp_path):
+    storage = MessageStorage(str(tmp_path))
+    day_dir = storage.current_dir / "2024-05-01"
+    write_json(day_dir / "team_090000.json", "team", [message("t1", datetime(2024, 5, 1, 9))])
+    write_json(day_dir / "team_090000_1.json", "team", [message("t2", datetime(2024, 5, 1, 9, 1))])
+    write_json(day_dir / "team_b_090000.json", "team_b", [message("b1", datetime(2024, 5, 1, 9, 2))])
+
+    assert [msg["message_id"] for msg in storage.get_messages("team", "2024-05-01")] == ["t1", "t2"]
+    assert [msg["message_id"] for msg in storage.get_messages("team_b", "2024-05-01")] == ["b1"]
+    streamed = storage.iter_messages("team", datetime(2024, 5, 1), datetime(2024, 5, 2))
+    assert [msg["message_id"] for msg in streamed] == ["t1", "t2"]
+
+
+def test_log_recovers_from_torn_lines(tmp_path):
+    log = MessageLog(tmp_path / "g.jsonl")
+    log.append([message("a", datetime(2024, 5, 1, 9)), message("b", datetime(2024, 5, 1, 10))])
+    # A crash mid-append leaves half a line in the log and in its index
+    with open(log.path, "ab") as f:
+        f.write(b'{"message_id":"torn","timest')
+    with open(log.index_path, "ab") as f:
+        f.write(b'{"offset":')
+    log.append([message("c", datetime(2024, 5, 1, 11))])
+
+    assert [msg["message_id"] for msg in log.read()] == ["a", "b", "c"]
+    start = datetime(2024, 5, 1, 10, 30).timestamp()
+    assert [msg["message_id"] for msg in log.read(start=start)] == ["c"]
+
+
+def test_store_drops_repeated_message_ids(tmp_path):
+    storage = MessageStorage(str(tmp_path))
+    first = message("m1", datetime(2024, 5, 1, 9))
+    second = message("m2", datetime(2024, 5, 1, 9, 5))
+
+    assert storage.store_messages("g", [first, second, dict(first)])
+    # A retried page repeats messages already stored
+    assert storage.store_messages("g", [second, first]) == ""
+    storage.store_messages("g", [second, message("m3", datetime(2024, 5, 1, 9, 10))])
+
+    assert [msg["message_id"] for msg in storage.get_messages("g")] == ["m1", "m2", "m3"]
+    # A fresh instance reloads the ids from disk
+    assert MessageStorage(str(tmp_path)).store_messages("g", [first]) == ""
+
+
+def test_ids_stored_yesterday_are_not_ingested_again(tmp_path):
+    ids = MessageIdIndex(tmp_path, lookback_days=1)
+    ids.record("g", "2024-05-01", [message("late", datetime(2024, 5, 1, 23, 59))])
+
+    batch = [message("late", datetime(2024, 5, 1, 23, 59)), message("new", datetime(2024, 5, 2, 0, 1))]
+    assert [msg["message_id"] for msg in ids.filter_new("g", "2024-05-02", batch)] == ["new"]
+    assert len(ids.filter_new("g", "2024-05-03", batch)) == 2
+
+
+def test_iter_messages_merges_every_source_in_timestamp_order(tmp_path):
+    storage = MessageStorage(str(tmp_path))
+    # An archived day
+    write_json(storage.current_dir / "2024-05-01" / "g_090000.json", "g", [
+        message("a2", datetime(2024, 5, 1, 12)), message("a1", datetime(2024, 5, 1, 8)),
+    ])
+    storage.archive_old_messages(days_threshold=0)
+    # A current day saved as JSON files and as a log, out of order across saves
+    day_dir = storage.current_dir / "2024-05-02"
+    write_json(day_dir / "g_090000.json", "g", [message("c3", datetime(2024, 5, 2, 15))])
+    write_json(day_dir / "g_100000.json", "g", [message("c1", datetime(2024, 5, 2, 7))])
+    MessageLog(day_dir / "g.jsonl").append([
+        message("c2", datetime(2024, 5, 2, 9)), message("c1", datetime(2024, 5, 2, 7)),
+    ])
+    # Sent before midnight, received and filed the next day
+    late = message("late", datetime(2024, 5, 2, 23, 59))
+    write_json(storage.current_dir / "2024-05-03" / "g_000100.json", "g", [late])
+
+    streamed = storage.iter_messages("g", datetime(2024, 5, 1, 10), datetime(2024, 5, 3))
+
+    assert [msg["message_id"] for msg in streamed] == ["a2", "c1", "c2", "c3", "late"]
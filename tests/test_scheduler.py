@@ -0,0 +1,87 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+import pytz
+
+from whatsapp_crew.job_state import JobStateStore
+from whatsapp_crew.metrics import METRICS
+from whatsapp_crew.scheduler import ScheduledJob, Scheduler
+
+UTC = pytz.utc
+
+
+def counter(name: str, **labels) -> float:
+    series = METRICS.snapshot()["counters"].get(name, [])
+    return sum(entry["value"] for entry in series if entry["labels"] == labels)
+
+
+def test_failed_job_is_logged_and_counted(caplog):
+    scheduler = Scheduler({"summary_time": "08:00", "timezone": "UTC"})
+
+    def task(current_time):
+        raise RuntimeError("API down")
+
+    job = ScheduledJob("flaky", task, "08:00", UTC, max_retries=2, retry_delay=0)
+    failures = counter("scheduler_job_failures_total", job="flaky")
+
+    with caplog.at_level(logging.INFO, logger="whatsapp_crew.scheduler"):
+        asyncio.run(scheduler._run_job(job, datetime(2024, 5, 1, 8, tzinfo=UTC)))
+
+    assert counter("scheduler_job_failures_total", job="flaky") == failures + 1
+    assert [record.levelname for record in caplog.records] == ["WARNING", "WARNING", "ERROR"]
+    assert "failed after 2 attempts. Last error: RuntimeError: API down" in caplog.records[-1].getMessage()
+
+
+def test_daily_job_keeps_wall_time_across_dst_changes():
+    new_york = pytz.timezone("America/New_York")
+    job = ScheduledJob("dst", print, "02:30", new_york)
+
+    job.next_run = job.next_after(new_york.localize(datetime(2024, 3, 9, 12)))
+    spring = [job.next_run]
+    for _ in range(2):
+        job.next_run = job.next_after(job.next_run)
+        spring.append(job.next_run)
+
+    # 02:30 does not exist on the spring-forward day and runs at 03:30 EDT instead
+    assert [moment.strftime("%m-%d %H:%M %Z") for moment in spring] == [
+        "03-10 03:30 EDT", "03-11 02:30 EDT", "03-12 02:30 EDT"
+    ]
+    assert spring[2] - spring[1] == timedelta(days=1)
+
+    # 01:30 happens twice on the fall-back day and runs once, on standard time
+    job = ScheduledJob("dst", print, "01:30", new_york)
+    fall = job.occurrences_between(UTC.localize(datetime(2024, 11, 2, 12)), UTC.localize(datetime(2024, 11, 4, 12)))
+    assert [moment.strftime("%m-%d %H:%M %Z") for moment in fall] == ["11-03 01:30 EST", "11-04 01:30 EST"]
+
+
+def test_missed_occurrences_are_caught_up_with_their_due_times(tmp_path):
+    state_path = tmp_path / "state.db"
+    history = JobStateStore(state_path)
+    history.started("daily_summary", datetime(2024, 5, 4, 8, tzinfo=UTC))
+    history.finished("daily_summary", datetime(2024, 5, 4, 8, tzinfo=UTC))
+    history.close()
+
+    config = {"summary_time": "08:00", "timezone": "UTC", "max_catch_up_runs": 3}
+    scheduler = Scheduler(config, state_path=str(state_path))
+    scheduler._now = lambda: datetime(2024, 5, 10, 12, tzinfo=UTC)
+    calls = []
+
+    async def task(current_time):
+        calls.append(current_time)
+
+    async def main():
+        runner = asyncio.create_task(scheduler.run_async())
+        while len(calls) < 3:
+            await asyncio.sleep(0.01)
+        scheduler.stop()
+        await runner
+
+    scheduler.schedule_daily_summary(task)
+    asyncio.run(main())
+
+    # Six days were missed; only the latest three run, each seeing the time it was due
+    assert sorted(calls) == [datetime(2024, 5, day, 8, tzinfo=UTC) for day in (8, 9, 10)]
+    assert scheduler.state.job("daily_summary")["last_success"] == datetime(2024, 5, 10, 8, tzinfo=UTC)
+    assert scheduler.state.pending("daily_summary") == []
+    scheduler.state.close()
@@ -0,0 +1,96 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from whatsapp_crew.tools.send_queue import SendQueue
+from whatsapp_crew.tools.whatsapp_client import WhatsAppAPIError, WhatsAppClient
+
+
+def make_client(handler) -> WhatsAppClient:
+    return WhatsAppClient("token", "phone", transport=httpx.MockTransport(handler))
+
+
+def test_retries_throttled_sends_until_delivered():
+    statuses = [429, 503, 200]
+    posts = []
+
+    def handler(request):
+        posts.append(request.headers["Idempotency-Key"])
+        status = statuses[len(posts) - 1]
+        if status != 200:
+            return httpx.Response(status, headers={"Retry-After": "0"}, json={"error": {}})
+        return httpx.Response(200, json={"messages": [{"id": "wamid.1"}]})
+
+    async def main():
+        async with make_client(handler) as client, SendQueue(client, base_delay=0.001) as queue:
+            return await queue.send("g", "summary", occurrence="daily_summary:2024-05-01"), queue.stats()
+
+    receipt, stats = asyncio.run(main())
+
+    assert receipt["message_id"] == "wamid.1" and receipt["attempts"] == 3
+    assert len(set(posts)) == 1
+    assert stats["retries"] == 2 and stats["sent"] == 1
+
+
+def test_does_not_retry_errors_that_may_have_been_delivered():
+    posts = []
+
+    def handler(request):
+        posts.append(request)
+        return httpx.Response(500, json={"error": {"message": "internal"}})
+
+    async def main():
+        async with make_client(handler) as client, SendQueue(client, base_delay=0.001) as queue:
+            await queue.send("g", "summary")
+
+    with pytest.raises(WhatsAppAPIError):
+        asyncio.run(main())
+    assert len(posts) == 1
+
+
+def test_repeated_occurrence_is_posted_once_across_restarts(tmp_path):
+    ledger = tmp_path / "sent.jsonl"
+    posts = []
+
+    def handler(request):
+        posts.append(json.loads(request.content)["text"]["body"])
+        return httpx.Response(200, json={"messages": [{"id": f"wamid.{len(posts)}"}]})
+
+    async def run(queue: SendQueue, text: str, occurrence: str):
+        async with make_client(handler) as client:
+            queue.client = client
+            async with queue:
+                return await asyncio.gather(*(queue.send("g", text, occurrence=occurrence) for _ in range(3)))
+
+    first = asyncio.run(run(SendQueue(ledger_path=ledger), "summary", "daily_summary:2024-05-01"))
+    # A restarted job regenerates its text for the same occurrence
+    retried = asyncio.run(run(SendQueue(ledger_path=ledger), "summary v2", "daily_summary:2024-05-01"))
+    asyncio.run(run(SendQueue(ledger_path=ledger), "summary", "daily_summary:2024-05-02"))
+
+    assert posts == ["summary", "summary"]
+    assert {receipt["message_id"] for receipt in first + retried} == {"wamid.1"}
+
+
+def test_delivered_keys_expire_after_ledger_ttl(tmp_path):
+    ledger = tmp_path / "sent.jsonl"
+    posts = []
+
+    def handler(request):
+        posts.append(request)
+        return httpx.Response(200, json={"messages": [{"id": f"wamid.{len(posts)}"}]})
+
+    async def send(queue: SendQueue):
+        async with make_client(handler) as client, queue:
+            await queue.send("g", "summary", client=client, occurrence="weekly")
+
+    asyncio.run(send(SendQueue(ledger_path=ledger)))
+    receipt = json.loads(ledger.read_text())
+    receipt["sent_at"] -= 3600
+    ledger.write_text(json.dumps(receipt) + "\n")
+
+    asyncio.run(send(SendQueue(ledger_path=ledger, ledger_ttl=7200)))
+    assert len(posts) == 1
+    asyncio.run(send(SendQueue(ledger_path=ledger, ledger_ttl=60)))
+    assert len(posts) == 2
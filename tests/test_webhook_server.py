@@ -0,0 +1,114 @@
+import asyncio
+import hashlib
+import hmac
+import json
+
+import httpx
+
+from whatsapp_crew.tools.message_storage import MessageStorage
+from whatsapp_crew.tools.webhook_server import WebhookReceiver
+
+PAYLOAD = json.dumps({
+    "entry": [{
+        "changes": [{
+            "field": "messages",
+            "value": {
+                "contacts": [{"wa_id": "491500000001", "profile": {"name": "Alice"}}],
+                "messages": [
+                    {"id": f"wamid.{i}", "from": "491500000001", "timestamp": str(1700000000 + i),
+                     "type": "text", "text": {"body": f"message {i}"}}
+                    for i in range(3)
+                ],
+            },
+        }],
+    }],
+}).encode()
+
+
+def sign(secret: str, body: bytes) -> str:
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+class FlakyStorage(MessageStorage):
+    """Fails the first ``failures`` writes."""
+
+    def __init__(self, base_dir: str, failures: int):
+        super().__init__(base_dir)
+        self.failures = failures
+
+    def store_messages(self, group_id, messages):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("disk full")
+        return super().store_messages(group_id, messages)
+
+
+def serve(receiver: WebhookReceiver, requests):
+    async def main():
+        await receiver.start(port=0)
+        try:
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{receiver.port}") as client:
+                return await requests(client)
+        finally:
+            await receiver.close()
+
+    return asyncio.run(main())
+
+
+def test_subscription_handshake_checks_verify_token(tmp_path):
+    receiver = WebhookReceiver(MessageStorage(str(tmp_path)), "token")
+
+    async def requests(client):
+        ok = await client.get("/", params={"hub.mode": "subscribe", "hub.verify_token": "token", "hub.challenge": "42"})
+        bad = await client.get("/", params={"hub.mode": "subscribe", "hub.verify_token": "nope", "hub.challenge": "42"})
+        return ok, bad
+
+    ok, bad = serve(receiver, requests)
+    assert (ok.status_code, ok.text) == (200, "42")
+    assert bad.status_code == 403
+
+
+def test_rejects_bad_signature_and_acks_only_stored_messages(tmp_path):
+    storage = MessageStorage(str(tmp_path))
+    receiver = WebhookReceiver(storage, "token", app_secret="secret", default_group_id="g")
+
+    async def requests(client):
+        forged = await client.post("/", content=PAYLOAD, headers={"X-Hub-Signature-256": sign("other", PAYLOAD)})
+        stored_before = len(storage.get_messages("g"))
+        signed = await client.post("/", content=PAYLOAD, headers={"X-Hub-Signature-256": sign("secret", PAYLOAD)})
+        # Acknowledged only once the messages are on disk
+        return forged, stored_before, signed, storage.get_messages("g")
+
+    forged, stored_before, signed, stored = serve(receiver, requests)
+    assert forged.status_code == 401 and stored_before == 0
+    assert signed.status_code == 200
+    assert [msg["message_id"] for msg in stored] == ["wamid.0", "wamid.1", "wamid.2"]
+    assert stored[0]["sender"]["name"] == "Alice"
+
+
+def test_failed_store_is_refused_and_stored_once_on_redelivery(tmp_path):
+    storage = FlakyStorage(str(tmp_path), failures=2)
+    receiver = WebhookReceiver(storage, "token", default_group_id="g", max_store_attempts=2, retry_delay=0.001)
+
+    async def requests(client):
+        refused = await client.post("/", content=PAYLOAD)
+        redelivered = await client.post("/", content=PAYLOAD)
+        again = await client.post("/", content=PAYLOAD)
+        return refused, redelivered, again
+
+    refused, redelivered, again = serve(receiver, requests)
+    assert refused.status_code == 503
+    assert redelivered.status_code == again.status_code == 200
+    assert [msg["message_id"] for msg in storage.get_messages("g")] == ["wamid.0", "wamid.1", "wamid.2"]
+    assert receiver.stats["failed"] == 3 and receiver.stats["errors"] == 2
+
+
+def test_full_buffer_refuses_the_whole_payload(tmp_path):
+    storage = MessageStorage(str(tmp_path))
+    receiver = WebhookReceiver(storage, "token", default_group_id="g", max_buffer=2)
+
+    async def requests(client):
+        return await client.post("/", content=PAYLOAD)
+
+    assert serve(receiver, requests).status_code == 503
+    assert storage.get_messages("g") == [] and receiver.stats["rejected"] == 3
@@ -0,0 +1,81 @@
+import httpx
+
+from whatsapp_crew.tools.whatsapp_client import WhatsAppClient
+from whatsapp_crew.tools.whatsapp_tool import WhatsAppTool
+
+CONFIG = {
+    "whatsapp": {
+        "api_version": "v17.0",
+        "phone_number_id": "phone",
+        "access_token": "token",
+        "group_id": "group_a",
+        "group_ids": ["group_a", "group_b"],
+    }
+}
+
+
+def raw_message(group_id: str, i: int) -> dict:
+    return {
+        "id": f"wamid.{group_id}.{i}",
+        "from": "491500000001",
+        "timestamp": str(1700000000 + i),
+        "type": "text",
+        "text": {"body": f"message {i}"},
+        "contact": {"name": "Alice"},
+    }
+
+
+def make_tool(monkeypatch, handler):
+    monkeypatch.setattr(WhatsAppTool, "_load_config", lambda self: CONFIG)
+    monkeypatch.setattr(
+        WhatsAppTool, "client",
+        lambda self, **overrides: WhatsAppClient.from_config(
+            self.config["whatsapp"], transport=httpx.MockTransport(handler), **overrides
+        )
+    )
+    return WhatsAppTool()
+
+
+def test_receive_messages_returns_one_groups_list(monkeypatch):
+    def handler(request):
+        group_id = request.url.params["group_id"]
+        return httpx.Response(200, json={"data": [raw_message(group_id, 0), raw_message(group_id, 1)]})
+
+    tool = make_tool(monkeypatch, handler)
+
+    messages = tool._receive_messages()
+    assert [message.message_id for message in messages] == ["wamid.group_a.0", "wamid.group_a.1"]
+    assert {message.group_id for message in tool._receive_messages(group_id="group_b")} == {"group_b"}
+
+
+def test_receive_groups_keeps_other_groups_when_one_fails(monkeypatch):
+    def handler(request):
+        group_id = request.url.params["group_id"]
+        if group_id == "group_b":
+            return httpx.Response(400, json={"error": {"message": "unknown group"}})
+        return httpx.Response(200, json={"data": [raw_message(group_id, 0)]})
+
+    tool = make_tool(monkeypatch, handler)
+
+    results = tool.receive_groups()
+    assert [message.message_id for message in results["group_a"]] == ["wamid.group_a.0"]
+    assert isinstance(results["group_b"], Exception)
+    assert "Retrieved 1 messages from 1 of 2 groups" in tool._run("receive")
+
+
+def test_send_message_twice_posts_once(monkeypatch):
+    posts = []
+
+    def handler(request):
+        posts.append(request.headers["Idempotency-Key"])
+        return httpx.Response(200, json={"messages": [{"id": f"wamid.sent.{len(posts)}"}]})
+
+    tool = make_tool(monkeypatch, handler)
+
+    first = tool._send_message("Daily summary")
+    retried = tool._send_message("Daily summary, regenerated")
+    assert first == retried == "Message sent successfully. Message ID: wamid.sent.1"
+    assert len(posts) == 1
+
+    tool._send_message("Next day's summary", occurrence="send:2024-05-02")
+    assert len(posts) == 2